@@ -0,0 +1,6 @@
+"""
+Shared building blocks for the stock index prediction pipeline.
+
+The numbered scripts in the project root are the stage entry points; the
+modules in this package hold the logic they share.
+"""
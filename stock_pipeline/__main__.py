@@ -0,0 +1,5 @@
+import sys
+
+from stock_pipeline.cli import main
+
+sys.exit(main())
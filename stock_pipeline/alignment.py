@@ -0,0 +1,194 @@
+"""
+As-of joins of feature sources onto event timestamps.
+
+Exact-date merges drop an event as soon as one source has no row on that
+very date, e.g. a press conference on a day without trading. Here every
+source is joined as of the event time instead: each event takes the
+latest row of the source at or before it (or the next one, or the
+nearest), optionally only within a tolerance and only from rows of the
+same group (instrument, central bank).
+
+The events are sorted once and every source is merged onto the sorted
+keys with pd.merge_asof, a single linear pass over two sorted arrays, so
+aligning n events against m source rows costs O(n + m) per source after
+sorting. Keys are compared as datetime64[ns], which covers intraday
+timestamps just like dates.
+
+TradingCalendar moves event dates onto trading sessions (a Saturday
+announcement is priced on Monday) and reports what it moved or dropped.
+"""
+import numpy as np
+import pandas as pd
+
+DIRECTIONS = ("backward", "forward", "nearest")
+ALIGNMENTS = ("exact", "asof")
+
+
+def _timedelta(tolerance):
+    return None if tolerance is None else pd.Timedelta(tolerance)
+
+
+def _keys(df, on):
+    """Join key of every row as datetime64[ns], from a column or the index"""
+    values = df[on] if on in df.columns else df.index.get_level_values(on)
+    return pd.DatetimeIndex(values).as_unit('ns').to_numpy()
+
+
+class TradingCalendar:
+    """
+    Trading sessions, e.g. the dates of the stock table.
+
+    Attributes:
+        sessions (pd.DatetimeIndex): Sorted unique sessions
+    """
+
+    def __init__(self, sessions):
+        self.sessions = pd.DatetimeIndex(sessions).as_unit('ns').unique().sort_values()
+
+    def is_session(self, dates):
+        """Boolean array, True where a date is a session"""
+        return pd.DatetimeIndex(dates).as_unit('ns').isin(self.sessions)
+
+    def roll(self, dates, direction="forward", tolerance=None):
+        """
+        Session of every date.
+
+        Args:
+            dates (iterable): Dates or timestamps
+            direction (str): 'forward' (first session on or after the date),
+                'backward' (last session on or before) or 'nearest'
+            tolerance (str or pd.Timedelta, optional): Largest allowed
+                distance to the session, e.g. '3D'
+
+        Returns:
+            pd.DatetimeIndex: Sessions, NaT where none lies within tolerance
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction '{direction}'. Choose one of {list(DIRECTIONS)}")
+        dates = pd.DatetimeIndex(dates).as_unit('ns')
+        values = dates.to_numpy()
+        sessions = self.sessions.to_numpy()
+        n = len(sessions)
+        if n == 0:
+            return pd.DatetimeIndex(np.full(len(values), np.datetime64('NaT', 'ns')))
+
+        after = np.searchsorted(sessions, values, side='left')
+        before = np.searchsorted(sessions, values, side='right') - 1
+        forward = np.where(after < n, sessions[np.minimum(after, n - 1)], np.datetime64('NaT', 'ns'))
+        backward = np.where(before >= 0, sessions[np.maximum(before, 0)], np.datetime64('NaT', 'ns'))
+        if direction == 'forward':
+            result = forward
+        elif direction == 'backward':
+            result = backward
+        else:
+            use_forward = np.isnat(backward) | (~np.isnat(forward) & (forward - values < values - backward))
+            result = np.where(use_forward, forward, backward)
+
+        tolerance = _timedelta(tolerance)
+        if tolerance is not None:
+            distance = np.abs(result - values)
+            result = np.where(~np.isnat(result) & (distance <= tolerance.to_timedelta64()),
+                              result, np.datetime64('NaT', 'ns'))
+        return pd.DatetimeIndex(result)
+
+
+class AsofSource:
+    """
+    A feature source to join as of the event time.
+
+    Args:
+        frame (pd.DataFrame): Source rows, keyed by column or index `on`
+        columns (list, optional): Columns to take, defaults to all others
+        tolerance (str or pd.Timedelta, optional): Largest distance between
+            event and source row, None for unlimited
+        direction (str): 'backward' (latest row at or before the event),
+            'forward' or 'nearest'
+        on (str): Key column or index level of `frame`
+        by (str or list, optional): Group columns present in both tables;
+            rows only match within their group
+        allow_exact_matches (bool): False takes strictly earlier (later) rows
+    """
+
+    def __init__(self, frame, columns=None, tolerance=None, direction="backward", on="Date",
+                 by=None, allow_exact_matches=True):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction '{direction}'. Choose one of {list(DIRECTIONS)}")
+        self.frame = frame
+        self.by = [by] if isinstance(by, str) else list(by or [])
+        self.columns = list(columns) if columns is not None else [
+            col for col in frame.columns if col != on and col not in self.by]
+        self.tolerance = _timedelta(tolerance)
+        self.direction = direction
+        self.on = on
+        self.allow_exact_matches = allow_exact_matches
+
+    def sorted_frame(self):
+        """Key, group and value columns sorted by key"""
+        right = pd.DataFrame({'_key': _keys(self.frame, self.on)})
+        for col in self.by + self.columns:
+            right[col] = self.frame[col].to_numpy()
+        right = right.dropna(subset=['_key'])
+        return right.sort_values('_key', kind='stable').reset_index(drop=True)
+
+
+def align(events, sources, on="Date"):
+    """
+    Join several sources onto events in one sorted pass each.
+
+    Args:
+        events (pd.DataFrame): Event rows keyed by column or index `on`;
+            group columns of the sources must be columns of `events`
+        sources (list): AsofSource objects
+        on (str): Key column or index level of `events`
+
+    Returns:
+        pd.DataFrame: Copy of `events` (same order and index) with the
+        source columns added; NaN where no source row lies within tolerance
+    """
+    keys = _keys(events, on)
+    order = np.argsort(keys, kind='stable')
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    result = events.copy()
+
+    for source in sources:
+        left = pd.DataFrame({'_key': keys[order]})
+        for col in source.by:
+            left[col] = events[col].to_numpy()[order]
+        joined = pd.merge_asof(left, source.sorted_frame(), on='_key', by=source.by or None,
+                               tolerance=source.tolerance, direction=source.direction,
+                               allow_exact_matches=source.allow_exact_matches)
+        # merge_asof keeps the (sorted) left order, so `inverse` restores the event order
+        for col in source.columns:
+            result[col] = joined[col].take(inverse).array
+    return result
+
+
+def asof_join(left, right, columns=None, tolerance=None, direction="backward", on="Date", by=None):
+    """
+    Columns of `right` for every row of `left`, as of the row's key.
+
+    Shorthand for `align(left, [AsofSource(right, ...)], on)`.
+    """
+    return align(left, [AsofSource(right, columns, tolerance, direction, on, by)], on)
+
+
+def match_report(requested, matched):
+    """
+    How requested dates were matched to sessions.
+
+    Args:
+        requested (pd.DatetimeIndex): Dates before rolling
+        matched (pd.DatetimeIndex): TradingCalendar.roll of them
+
+    Returns:
+        dict: 'exact', 'moved' (list of (date, session)) and 'dropped'
+        (list of dates without a session within tolerance)
+    """
+    requested = pd.DatetimeIndex(requested)
+    matched = pd.DatetimeIndex(matched)
+    missing = matched.isna()
+    moved = ~missing & (matched != requested)
+    return {'exact': int((~missing & ~moved).sum()),
+            'moved': list(zip(requested[moved], matched[moved])),
+            'dropped': list(requested[missing])}
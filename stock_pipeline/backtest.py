@@ -0,0 +1,249 @@
+"""
+Walk-forward (rolling-origin) backtests over the ECB meeting dates.
+
+At every meeting the models are trained on the meetings before it, either
+on all of them (expanding window) or on the last `window` meetings
+(sliding window), and then predict the rows of that meeting. The
+statistics of the training window are prefix sums of per-meeting
+sufficient statistics, so moving the origin by one meeting only adds the
+new meeting's rows (and, for sliding windows, subtracts the oldest). The
+StandardScaler of the window is derived from the same statistics. No step
+refits from the raw rows.
+
+For comparison, `backtest` can also evaluate the balanced random split
+of the training notebook for many seeds the same way: the training
+statistics are the totals minus the test rows.
+
+Configurations are independent and run on worker processes.
+"""
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from stock_pipeline.modeling import choose_test_dates, mse, r2, rate_change_groups
+from stock_pipeline.search import SufficientStats, fit_grid, parallel_map
+from stock_pipeline.training import DEFAULT_MODELS, target_params
+
+
+class DateStats:
+    """
+    Prefix sums of the per-date sufficient statistics of a feature matrix.
+
+    Attributes:
+        dates (pd.DatetimeIndex): Sorted unique dates
+        codes (np.ndarray): Position in `dates` of every row
+    """
+
+    def __init__(self, X, Y, dates):
+        dates = pd.DatetimeIndex(dates).normalize()
+        self.dates = dates.unique().sort_values()
+        self.codes = self.dates.get_indexer(dates)
+        n_dates, (_, n_features), n_targets = len(self.dates), X.shape, Y.shape[1]
+
+        def prefix(values, shape):
+            per_date = np.zeros((n_dates,) + shape)
+            np.add.at(per_date, self.codes, values)
+            return np.concatenate([np.zeros((1,) + shape), np.cumsum(per_date, axis=0)])
+
+        self._n = prefix(np.ones(len(X)), ())
+        self._sum_x = prefix(X, (n_features,))
+        self._sum_y = prefix(Y, (n_targets,))
+        self._xx = prefix(X[:, :, None] * X[:, None, :], (n_features, n_features))
+        self._xy = prefix(X[:, :, None] * Y[:, None, :], (n_features, n_targets))
+        self._yy = prefix(Y ** 2, (n_targets,))
+
+    def window(self, start, stop):
+        """Statistics of the rows on dates[start:stop]"""
+        return SufficientStats(int(self._n[stop] - self._n[start]),
+                               self._sum_x[stop] - self._sum_x[start],
+                               self._sum_y[stop] - self._sum_y[start],
+                               self._xx[stop] - self._xx[start],
+                               self._xy[stop] - self._xy[start],
+                               self._yy[stop] - self._yy[start])
+
+    def total(self):
+        return self.window(0, len(self.dates))
+
+    def weighted(self, weights):
+        """Statistics of every date counted `weights` times, e.g. a bootstrap resample of the dates"""
+        weights = np.asarray(weights, dtype=np.float64)
+
+        def total(prefix):
+            return np.tensordot(weights, np.diff(prefix, axis=0), axes=1)
+
+        return SufficientStats(int(np.rint(total(self._n))), total(self._sum_x), total(self._sum_y),
+                               total(self._xx), total(self._xy), total(self._yy))
+
+
+def _fit_predict(stats, index, model, params, targets, X_test):
+    """Standardize, fit one candidate per target and predict `X_test`, shape (rows, targets)"""
+    scaled, mean, scale = stats.select(index).standardized()
+    candidates = [target_params(params, target) for target in targets]
+    coef, intercept = fit_grid(scaled, model, candidates)
+    diagonal = np.arange(len(targets))
+    X_scaled = (X_test[:, index] - mean) / scale
+    return X_scaled @ coef[diagonal, :, diagonal].T + intercept[diagonal, diagonal]
+
+
+def _walk_forward_arrays(matrix, date_stats, index, model, params, window, min_train):
+    """Rows predicted, predictions and baseline (training window mean), each per step"""
+    if window is not None and window < min_train:
+        raise ValueError(f"Sliding window ({window}) must cover min_train ({min_train}) meetings")
+    rows, pred, baseline = [], [], []
+    for step in range(min_train, len(date_stats.dates)):
+        start = 0 if window is None else max(step - window, 0)
+        stats = date_stats.window(start, step)
+        step_rows = np.flatnonzero(date_stats.codes == step)
+        rows.append(step_rows)
+        pred.append(_fit_predict(stats, index, model, params, matrix.targets, matrix.X[step_rows]))
+        baseline.append(np.broadcast_to(stats.sum_y / stats.n, (len(step_rows), len(matrix.targets))))
+    return np.concatenate(rows), np.concatenate(pred), np.concatenate(baseline)
+
+
+def walk_forward(matrix, variant, model="BayesianRidge", params=None, window=None, min_train=8,
+                 date_stats=None):
+    """
+    Predict every meeting from the meetings before it.
+
+    Args:
+        matrix (FeatureMatrix): Features and targets
+        variant (str or list): Dataset variant or feature columns
+        model (str): 'BayesianRidge', 'Ridge' or 'LinearRegression'
+        params (dict, optional): Parameters, shared or per target; defaults
+            to training.DEFAULT_MODELS[model]
+        window (int, optional): Meetings in the sliding training window
+            (fewer while not enough meetings precede); None trains on all
+            earlier meetings (expanding window)
+        min_train (int): Meetings before the first prediction
+        date_stats (DateStats, optional): Precomputed statistics of `matrix`
+
+    Returns:
+        pd.DataFrame: One row per predicted row with Date, the targets and
+        '<target>_Pred' / '<target>_Baseline' (mean of the training window)
+    """
+    params = DEFAULT_MODELS[model] if params is None else params
+    date_stats = date_stats or DateStats(matrix.X, matrix.Y, matrix.dates)
+    rows, pred, baseline = _walk_forward_arrays(matrix, date_stats, matrix.variant_index(variant),
+                                                model, params, window, min_train)
+    df = pd.DataFrame(matrix.Y[rows], columns=matrix.targets)
+    df.insert(0, 'Date', date_stats.dates[date_stats.codes[rows]])
+    for t, target in enumerate(matrix.targets):
+        df[f'{target}_Pred'] = pred[:, t]
+        df[f'{target}_Baseline'] = baseline[:, t]
+    return df
+
+
+def _score_rows(scheme, window, seed, config, targets, y, pred, baseline, steps):
+    return [{'Scheme': scheme, 'Window': window, 'Seed': seed,
+             'Variant': config['variant'], 'Model': config['model'], 'Target': target,
+             'MSE': mse(y[:, t], pred[:, t]), 'R2': r2(y[:, t], pred[:, t]),
+             'Baseline_MSE': mse(y[:, t], baseline[:, t]), 'Steps': steps, 'Rows': len(y)}
+            for t, target in enumerate(targets)]
+
+
+def _config_params(config):
+    return DEFAULT_MODELS[config['model']] if config.get('params') is None else config['params']
+
+
+def _walk_forward_task(args):
+    matrix, configs, min_train = args
+    date_stats = DateStats(matrix.X, matrix.Y, matrix.dates)
+    results = []
+    for config in configs:
+        rows, pred, baseline = _walk_forward_arrays(matrix, date_stats, matrix.variant_index(config['variant']),
+                                                    config['model'], _config_params(config),
+                                                    config['window'], min_train)
+        window = 'expanding' if config['window'] is None else f"sliding_{config['window']}"
+        results += _score_rows('walk_forward', window, pd.NA, config, matrix.targets, matrix.Y[rows],
+                               pred, baseline, len(np.unique(date_stats.codes[rows])))
+    return results
+
+
+def _random_split_task(args):
+    matrix, splits, configs = args
+    date_stats = DateStats(matrix.X, matrix.Y, matrix.dates)
+    total = date_stats.total()
+    row_dates = date_stats.dates[date_stats.codes]
+    results = []
+    for config in configs:
+        index = matrix.variant_index(config['variant'])
+        for seed, test_dates in splits.items():
+            test = np.flatnonzero(row_dates.isin(test_dates))
+            train_stats = total - SufficientStats.from_data(matrix.X[test], matrix.Y[test])
+            pred = _fit_predict(train_stats, index, config['model'], _config_params(config),
+                                matrix.targets, matrix.X[test])
+            baseline = np.broadcast_to(train_stats.sum_y / train_stats.n, pred.shape)
+            results += _score_rows('random_split', 'random', seed, config, matrix.targets,
+                                   matrix.Y[test], pred, baseline, 1)
+    return results
+
+
+def _chunks(items, n):
+    """`items` split into at most `n` contiguous chunks"""
+    n = max(min(n, len(items)), 1)
+    bounds = np.linspace(0, len(items), n + 1).astype(int)
+    return [items[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def backtest_configs(variants, models, windows):
+    """
+    All combinations of variants, models and windows.
+
+    Args:
+        variants (list): Variant names
+        models (list or dict): Model names, or model -> params
+        windows (list): None / 'expanding' for an expanding window or a
+            sliding window length in meetings
+
+    Returns:
+        list: Configs with the keys 'variant', 'model', 'params' and 'window'
+    """
+    models = models if isinstance(models, dict) else dict.fromkeys(models)
+    windows = [None if w in (None, 'expanding') else int(w) for w in windows]
+    return [{'variant': variant, 'model': model, 'params': params, 'window': window}
+            for variant, (model, params), window in itertools.product(variants, models.items(), windows)]
+
+
+def backtest(matrix, configs, min_train=8, seeds=(), frame=None, test_size=15, workers=None):
+    """
+    Walk-forward scores of many configurations, optionally next to random splits.
+
+    Args:
+        matrix (FeatureMatrix): Features and targets
+        configs (list): See backtest_configs
+        min_train (int): Meetings before the first walk-forward prediction
+        seeds (iterable): Seeds of the balanced random split to evaluate for
+            every variant and model (needs `frame`)
+        frame (pd.DataFrame or FeatureStore, optional): Date-indexed table
+            with 'Interest Rate_Change' (or the feature store) used to
+            balance the random splits
+        test_size (int): Test rows of a random split
+        workers (int, optional): Processes, defaults to the CPU count
+
+    Returns:
+        pd.DataFrame: One row per scheme, window, seed, variant, model and
+        target with MSE, R2, Baseline_MSE, Steps and Rows
+    """
+    workers = workers or os.cpu_count() or 1
+    # One task per worker so the per-date statistics are built once per process
+    tasks = [(matrix, chunk, min_train) for chunk in _chunks(list(configs), workers)]
+    results = list(parallel_map(_walk_forward_task, tasks, workers))
+
+    seeds = list(seeds)
+    if seeds:
+        if frame is None:
+            raise ValueError("Random split seeds need the dataset frame to balance the test dates")
+        if isinstance(frame, pd.DataFrame):
+            groups = rate_change_groups(frame.index, frame['Interest Rate_Change'])
+        else:
+            groups = frame.rate_change_groups()
+        splits = {seed: choose_test_dates(groups, test_size, seed) for seed in seeds}
+        pairs = {(config['variant'], config['model']): config for config in configs}
+        tasks = [(matrix, splits, chunk) for chunk in _chunks(list(pairs.values()), workers)]
+        results += list(parallel_map(_random_split_task, tasks, workers))
+
+    df = pd.DataFrame([row for rows in results for row in rows])
+    df['Seed'] = df['Seed'].astype('Int64')
+    return df
@@ -0,0 +1,573 @@
+"""
+Benchmarks of the pipeline stages on synthetic data at larger scales.
+
+The sample in '01_Raw Data' covers three indices, three years and 25 press
+conferences. The generators below create data shaped like it (OHLCV
+sheets as in stock_data.xlsx, ECB data portal downloads, the press
+release days table, statement texts and event datasets), multiplied by a
+scale factor:
+
+    save_to_excel   3 x scale index sheets of 775 trading days
+    save_to_excel_openpyxl  the same workbook with excel_engine 'openpyxl'
+    onehot          3 x scale index sheets combined and one-hot encoded
+    onehot_categorical  the same sheets with encoding 'categorical'
+    rates           ECB downloads with 9677 x scale rows (sub-daily steps
+                    beyond scale 1 so the dates stay valid)
+    windows         event windows of 25 meetings over 3 x scale indices
+    sections        section extraction and sentence/chunk splitting of
+                    25 x scale statements
+    fit             StandardScaler + BayesianRidge per variant and target,
+                    69 x scale rows (like the train stage)
+    fit_shared      training.train_variants on the same rows
+
+Every benchmark is timed over `repeat` runs (wall and CPU time). A separate
+run under tracemalloc records the peak of Python and NumPy allocations.
+Results are appended as JSON lines with the run id, commit and library
+versions, so `compare_runs` can flag regressions between runs.
+
+The startup benchmarks (`run_startup`) time fresh interpreters instead:
+the quick CLI commands, the import of every stage module and of every
+numbered script. A separate run with `-X importtime` lists the heavy
+libraries (HEAVY_MODULES) an entry point loads, and entry points slower
+than the limit (200 ms) are flagged.
+"""
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from stock_pipeline import metrics
+from stock_pipeline.config import PROJECT_ROOT
+from stock_pipeline.stages import STAGES
+
+TRADING_DAYS = 775
+ECB_DAYS = 9677
+N_MEETINGS = 25
+EXCEL_MAX_ROWS = 1048576
+
+_WORDS = ("inflation euro area monetary policy governing council rates growth energy prices "
+          "wage demand financing conditions outlook risks labour market transmission banks "
+          "lending services manufacturing projections uncertainty target medium term").split()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+
+def synthetic_ohlcv(n_days=TRADING_DAYS, start="2022-06-01", seed=0, level=15000.0):
+    """One index sheet like stock_data.xlsx: business days with OHLC, volume and actions"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=n_days)
+    close = level * np.exp(np.cumsum(rng.normal(0, 0.01, n_days)))
+    open_ = close * (1 + rng.normal(0, 0.003, n_days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, n_days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, n_days)))
+    return pd.DataFrame({
+        'Open': open_.round(2), 'High': high.round(2), 'Low': low.round(2), 'Close': close.round(2),
+        'Volume': rng.integers(10_000_000, 90_000_000, n_days),
+        'Dividends': 0.0, 'Stock Splits': 0.0
+    }, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+def synthetic_stock_data(n_indices, n_days=TRADING_DAYS, seed=0):
+    """Downloader result for `n_indices` symbols: symbol -> {'df', 'currency'}"""
+    return {f"IDX{i}": {'df': synthetic_ohlcv(n_days, seed=seed + i), 'currency': 'EUR'}
+            for i in range(n_indices)}
+
+
+def meeting_dates(n_meetings=N_MEETINGS, start="2022-06-09"):
+    """Press release days roughly every six weeks, on business days"""
+    dates = pd.date_range(start, periods=n_meetings, freq="6W-THU")
+    return pd.DatetimeIndex(dates)
+
+
+def synthetic_release_days(dates):
+    """Press release days table like 'ECB Press Release Days.xlsx'"""
+    return pd.DataFrame({'folder_name': [d.strftime('%d_%B_%Y') for d in dates],
+                         'date': [d.strftime('%d.%m.%Y') for d in dates]})
+
+
+def synthetic_ecb_file(path, n_rows, change=False, seed=0, end="2025-06-14", steps_per_day=1):
+    """
+    ECB data portal download with its 14 metadata rows and the series columns.
+
+    Args:
+        path (str): Target .xlsx file
+        n_rows (int): Data rows
+        change (bool): Write the period-to-period change series instead of the level
+        seed (int): Seed of the rate path
+        end (str): Last date of the series
+        steps_per_day (int): Rows per day; more than one keeps long series
+            within the valid date range
+    """
+    from stock_pipeline.stages.rates import RATE_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=end, periods=n_rows, freq=pd.Timedelta(days=1) / steps_per_day)
+    steps = np.where(rng.random(n_rows) < 0.002, rng.choice([-0.25, 0.25, 0.5], n_rows), 0.0)
+    level = np.round(np.cumsum(steps), 2)
+    column = list(RATE_COLUMNS)[1 if change else 0]
+    values = np.diff(level, prepend=np.nan) if change else level
+    fmt = '%Y-%m-%d' if steps_per_day == 1 else '%Y-%m-%d %H:%M:%S'
+
+    header = [["ECB Data Portal", None, None], ["Downloaded on: 2025-06-14 17:24:24", None, None],
+              [None, None, None]]
+    header += [[key, None, value] for key, value in [
+        ("TITLE", column), ("SERIES KEY", "FM.D.U2.EUR.4F.KR.DFR.LEV"), ("TIME SERIES PAGE", ""),
+        ("GEOGRAPHICAL AREA", "Euro area (changing composition) (U2)"), ("FREQUENCY", "Daily"),
+        ("DATASET", "FM"), ("DATA SOURCE", "FINANCIAL PROVIDERS"), ("COLLECTION TYPE", "End of period (E)"),
+        ("UNIT", "Percent per annum"), ("LAST UPDATED", "2025-06-14 01:32:13")]]
+    header += [[None, None, None], ["DATE", "TIME PERIOD", column]]
+    body = pd.DataFrame({0: dates.strftime(fmt), 1: dates.strftime('%d %b %Y'), 2: values})
+    df = pd.concat([pd.DataFrame(header), body], ignore_index=True)
+    df.to_excel(path, index=False, header=False)
+    return dates
+
+
+def synthetic_statement(seed, n_paragraphs=24, sentences_per_paragraph=5):
+    """Statement text with the section headers on lines of their own"""
+    from stock_pipeline.text_extraction import HEADERS
+
+    rng = np.random.default_rng(seed)
+
+    def sentence():
+        words = rng.choice(_WORDS, rng.integers(12, 30))
+        return " ".join(words).capitalize() + "."
+
+    sections = ["Monetary policy decisions"] + [h for h in HEADERS if h != "Conclusion"] + ["Conclusion"]
+    lines = ["European Central Bank", "Combined monetary policy decisions and statement"]
+    for i in range(n_paragraphs):
+        if i % max(n_paragraphs // len(sections), 1) == 0 and sections:
+            lines.append(sections.pop(0))
+        lines.append(" ".join(sentence() for _ in range(sentences_per_paragraph)))
+    lines.append("We are now ready to take your questions.")
+    return "\n".join(lines)
+
+
+def synthetic_dataset(n_rows, seed=0):
+    """Complete event dataset like 'dataset': base, sentiment and target columns"""
+    from stock_pipeline.datasets import BASE_COLUMNS, SENTIMENT_COLUMNS, TARGET_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    n_dates = max(n_rows // 3, 1)
+    dates = pd.bdate_range("2000-01-03", periods=n_dates).repeat(3)[:n_rows]
+    index = np.tile([0, 1, 2], n_dates)[:n_rows]
+    data = {col: rng.normal(0, 2, n_rows) for col in BASE_COLUMNS}
+    data['Index_MDAX'] = (index == 1).astype(float)
+    data['Index_SDAX'] = (index == 2).astype(float)
+    data['Interest Rate_Old'] = np.round(rng.uniform(-0.5, 4, n_rows), 2)
+    data['Interest Rate_Change'] = rng.choice([-0.25, 0.0, 0.25], n_rows)
+    for col in SENTIMENT_COLUMNS:
+        data[col] = rng.uniform(-0.5, 0.5, n_rows)
+    X = np.column_stack([data[col] for col in BASE_COLUMNS + SENTIMENT_COLUMNS])
+    for t, col in enumerate(TARGET_COLUMNS):
+        data[col] = X @ rng.normal(0, 0.3, X.shape[1]) + rng.normal(0, 1 + t, n_rows)
+    return pd.DataFrame(data, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks: setup(scale, workdir) -> (callable, {'rows_in': ..., 'bytes_in': ...})
+# ---------------------------------------------------------------------------
+
+def _bytes(frames):
+    return int(sum(df.memory_usage(deep=True).sum() for df in frames))
+
+
+def bench_save_to_excel(scale, workdir, engine="auto"):
+    from stock_pipeline.stages.download import StockDataDownloader
+
+    data = synthetic_stock_data(3 * scale)
+    downloader = StockDataDownloader(workdir, "stock_data.xlsx", provider=object(), excel_engine=engine)
+    frames = [item['df'] for item in data.values()]
+    return (lambda: downloader.save_to_excel(data)), {
+        'rows_in': sum(len(df) for df in frames), 'bytes_in': _bytes(frames),
+        'output': os.path.join(workdir, "stock_data.xlsx")}
+
+
+def bench_save_to_excel_openpyxl(scale, workdir):
+    return bench_save_to_excel(scale, workdir, engine="openpyxl")
+
+
+def bench_onehot(scale, workdir, encoding="dense"):
+    from stock_pipeline import storage
+    from stock_pipeline.stages import onehot
+
+    sheets = {f"IDX{i}_EUR": df.rename_axis('Date')
+              for i, df in enumerate(item['df'] for item in synthetic_stock_data(3 * scale).values())}
+    folder = os.path.join(workdir, "raw")
+    storage.write_sheets(sheets, folder, "stock_data", index=True)
+    config = {"input_folder": folder, "sheet_names": list(sheets), "output_folder": os.path.join(workdir, "out"),
+              "encoding": encoding}
+    return (lambda: onehot.run(config)), {
+        'rows_in': sum(len(df) for df in sheets.values()), 'bytes_in': _bytes(sheets.values()),
+        'output': os.path.join(workdir, "out", "stock_data_combined_onehot.parquet")}
+
+
+def bench_onehot_categorical(scale, workdir):
+    return bench_onehot(scale, workdir, encoding="categorical")
+
+
+def bench_rates(scale, workdir):
+    from stock_pipeline import storage
+    from stock_pipeline.stages import rates
+
+    n_rows = ECB_DAYS * scale
+    if n_rows + 16 > EXCEL_MAX_ROWS:
+        raise ValueError(f"{n_rows} rows exceed the Excel row limit of the ECB downloads")
+    dates = synthetic_ecb_file(os.path.join(workdir, "rate.xlsx"), n_rows, steps_per_day=scale)
+    synthetic_ecb_file(os.path.join(workdir, "change.xlsx"), n_rows, change=True, steps_per_day=scale)
+    days = dates[dates > pd.Timestamp("2022-06-01")].normalize().unique()
+    release = synthetic_release_days(days[::max(len(days) // (N_MEETINGS * scale), 1)])
+    storage.write_table(release, workdir, "release_days")
+    config = {"input_folder": workdir, "rate_file": "rate.xlsx", "change_file": "change.xlsx",
+              "input_folder_date": workdir, "date_table": "release_days",
+              "output_folder": os.path.join(workdir, "out")}
+    return (lambda: rates.run(config)), {
+        'rows_in': 2 * n_rows, 'bytes_in': os.path.getsize(os.path.join(workdir, "rate.xlsx")) * 2,
+        'output': os.path.join(workdir, "out", "interest_rate_2022_2025.parquet")}
+
+
+def bench_windows(scale, workdir):
+    from stock_pipeline.windows import build_event_windows
+
+    frames = []
+    for i, item in enumerate(synthetic_stock_data(3 * scale).values()):
+        df = item['df'][['Open', 'Close']].copy()
+        df['Instrument'] = i
+        frames.append(df)
+    df_stock = pd.concat(frames)
+    codes = df_stock.pop('Instrument').to_numpy()
+    events = meeting_dates()
+    return (lambda: build_event_windows(df_stock, events, group_codes=codes)), {
+        'rows_in': len(df_stock), 'bytes_in': _bytes([df_stock])}
+
+
+def bench_sections(scale, workdir):
+    from stock_pipeline.sentiment import segment_documents
+    from stock_pipeline.text_extraction import HEADERS, extract_sections_precise
+
+    texts = {f"doc{i}": synthetic_statement(i) for i in range(N_MEETINGS * scale)}
+
+    def run():
+        sections = {key: extract_sections_precise(text, HEADERS) for key, text in texts.items()}
+        segment_documents({key: parts.get("Conclusion", "") for key, parts in sections.items()})
+
+    return run, {'rows_in': len(texts), 'bytes_in': sum(len(t.encode('utf-8')) for t in texts.values())}
+
+
+def bench_fit(scale, workdir):
+    from sklearn.preprocessing import StandardScaler
+
+    from stock_pipeline.datasets import TARGET_COLUMNS, VARIANTS, feature_columns
+    from stock_pipeline.modeling import TARGET_PARAMS, bayesian_ridge
+
+    df = synthetic_dataset(69 * scale)
+
+    def run():
+        for variant in VARIANTS:
+            X = StandardScaler().fit_transform(df[feature_columns(variant)].values)
+            for target in TARGET_COLUMNS:
+                bayesian_ridge(TARGET_PARAMS[target]).fit(X, df[target].values)
+
+    return run, {'rows_in': len(df), 'bytes_in': _bytes([df])}
+
+
+def bench_fit_shared(scale, workdir):
+    from stock_pipeline.training import FeatureMatrix, train_variants
+
+    df = synthetic_dataset(69 * scale)
+    dates = df.index.unique()
+    test_dates = list(dates[::max(len(dates) // 5, 1)][:5])
+    return (lambda: train_variants(FeatureMatrix.from_frame(df), test_dates)), {
+        'rows_in': len(df), 'bytes_in': _bytes([df])}
+
+
+BENCHMARKS = {
+    "save_to_excel": bench_save_to_excel,
+    "save_to_excel_openpyxl": bench_save_to_excel_openpyxl,
+    "onehot": bench_onehot,
+    "onehot_categorical": bench_onehot_categorical,
+    "rates": bench_rates,
+    "windows": bench_windows,
+    "sections": bench_sections,
+    "fit": bench_fit,
+    "fit_shared": bench_fit_shared,
+}
+
+
+# ---------------------------------------------------------------------------
+# Harness
+# ---------------------------------------------------------------------------
+
+def measure(fn, repeat=3):
+    """
+    Wall and CPU time of `repeat` calls plus one call under tracemalloc.
+
+    Returns:
+        dict: wall_s (best), wall_s_median, cpu_s (best), peak_alloc_bytes,
+        max_rss_bytes (None where it cannot be measured)
+    """
+    walls, cpus = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            wall, cpu = time.perf_counter(), time.process_time()
+            fn()
+            walls.append(time.perf_counter() - wall)
+            cpus.append(time.process_time() - cpu)
+
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {'wall_s': min(walls), 'wall_s_median': float(np.median(walls)), 'cpu_s': min(cpus),
+            'peak_alloc_bytes': peak, 'max_rss_bytes': metrics.max_rss_bytes()}
+
+
+def environment():
+    """Commit, versions and machine the results were measured on"""
+    import sklearn
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'sklearn': sklearn.__version__, 'machine': platform.machine(),
+            'cpus': os.cpu_count()}
+
+
+def run_suite(benchmarks=None, scales=(10, 100, 1000), repeat=3, max_seconds=120.0, run_id=None):
+    """
+    Run benchmarks at increasing scales.
+
+    A larger scale is skipped when the linear extrapolation of the last
+    measured scale exceeds `max_seconds`.
+
+    Args:
+        benchmarks (list, optional): Names in BENCHMARKS, default all
+        scales (iterable): Scale factors relative to the sample data
+        repeat (int): Timed runs per benchmark and scale
+        max_seconds (float): Time budget of a single run
+        run_id (str, optional): Id of the run, defaults to the current time
+
+    Returns:
+        list: One record per benchmark and scale with 'status' 'ok',
+        'skipped' or 'error'
+    """
+    run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S')
+    env = environment()
+    records = []
+    width = max(len(name) for name in BENCHMARKS)
+    for name in benchmarks or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            raise KeyError(f"Unknown benchmark '{name}'. Choose one of {list(BENCHMARKS)}")
+        last = None
+        for scale in sorted(scales):
+            record = {'run_id': run_id, 'benchmark': name, 'scale': scale, **env}
+            if last is not None and last[1] * scale / last[0] > max_seconds:
+                record.update(status='skipped',
+                              reason=f"estimated {last[1] * scale / last[0]:.0f}s > {max_seconds:.0f}s budget")
+                records.append(record)
+                print(f"{name:<{width}} x{scale:<5} skipped ({record['reason']})")
+                continue
+
+            workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fn, info = BENCHMARKS[name](scale, workdir)
+                output = info.pop('output', None)
+                record.update(info)
+                record.update(measure(fn, repeat))
+                if output and os.path.exists(output):
+                    record['bytes_out'] = os.path.getsize(output)
+                record['status'] = 'ok'
+                last = (scale, record['wall_s'])
+                print(f"{name:<{width}} x{scale:<5} {record['wall_s']:9.3f}s  cpu {record['cpu_s']:9.3f}s  "
+                      f"peak {record['peak_alloc_bytes'] / 2 ** 20:8.1f} MiB  rows {record.get('rows_in', 0):,}")
+            except Exception as e:
+                record.update(status='error', error=f"{type(e).__name__}: {e}")
+                print(f"{name:<{width}} x{scale:<5} error: {record['error']}")
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            records.append(record)
+    return records
+
+
+# ---------------------------------------------------------------------------
+# Startup time
+# ---------------------------------------------------------------------------
+
+HEAVY_MODULES = ("numpy", "pandas", "pyarrow", "openpyxl", "sklearn", "scipy", "pypdf", "yfinance",
+                 "torch", "transformers")
+
+_VALIDATE_CONFIG = {"build": {"n_lags": 14}}
+
+
+def startup_commands(root=PROJECT_ROOT, config_file=None):
+    """
+    Interpreter arguments of every entry point.
+
+    Returns:
+        dict: Name -> arguments after `python`: the quick CLI commands
+        (cli, status, validate, list-dates), `import:<stage>` for every
+        stage module and `script:<name>` for every numbered script (loaded
+        without running its main block)
+    """
+    commands = {
+        "cli": ["-m", "stock_pipeline", "--help"],
+        "status": ["-m", "stock_pipeline", "status", "--root", root],
+        "list-dates": ["-m", "stock_pipeline", "list-dates", "--root", root],
+    }
+    if config_file:
+        commands["validate"] = ["-m", "stock_pipeline", "validate", "--config", config_file]
+    for stage, module in STAGES.items():
+        commands[f"import:{stage}"] = ["-c", f"import {module}"]
+    for name in sorted(os.listdir(PROJECT_ROOT)):
+        if name[:2].isdigit() and name.endswith(".py"):
+            path = os.path.join(PROJECT_ROOT, name)
+            commands[f"script:{name[:-3]}"] = ["-c", f"import runpy; runpy.run_path({path!r})"]
+    return commands
+
+
+def imported_modules(args, cwd=PROJECT_ROOT):
+    """Top-level packages a fresh interpreter imports for `args` (from -X importtime)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=cwd,
+                            capture_output=True, text=True, timeout=120)
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.count("|") == 2:
+            name = line.rsplit("|", 1)[1].strip()
+            if name != "package":
+                modules.add(name.split(".")[0])
+    return modules
+
+
+def measure_startup(args, repeat=10, cwd=PROJECT_ROOT):
+    """
+    Wall time of `repeat` fresh interpreters running `args`.
+
+    Returns:
+        dict: wall_s (best), wall_s_median, returncode and the stderr tail
+        of the last run
+    """
+    walls = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, text=True, timeout=120)
+        walls.append(time.perf_counter() - start)
+    return {'wall_s': min(walls), 'wall_s_median': float(np.median(walls)),
+            'returncode': result.returncode, 'stderr': result.stderr.strip()[-500:]}
+
+
+def run_startup(names=None, repeat=10, limit_ms=200, root=PROJECT_ROOT, run_id=None):
+    """
+    Time the startup of the entry points in fresh interpreters.
+
+    Args:
+        names (list, optional): Names in startup_commands, default all
+        repeat (int): Timed runs per entry point
+        limit_ms (float): Startup time flagged as too slow
+        root (str): Project root passed to status and list-dates
+        run_id (str, optional): Id of the run, defaults to the current time
+
+    Returns:
+        list: One record per entry point (benchmark 'startup:<name>',
+        scale 1) with 'heavy_modules' and 'over_limit'
+    """
+    run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S')
+    env = environment()
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    records = []
+    try:
+        config_file = os.path.join(workdir, "config.json")
+        with open(config_file, "w", encoding="utf-8") as f:
+            json.dump(_VALIDATE_CONFIG, f)
+        commands = startup_commands(root, config_file)
+        width = len('startup:') + max(len(name) for name in commands)
+        for name in names or list(commands):
+            if name not in commands:
+                raise KeyError(f"Unknown entry point '{name}'. Choose one of {list(commands)}")
+            record = {'run_id': run_id, 'benchmark': f"startup:{name}", 'scale': 1, **env}
+            try:
+                record.update(measure_startup(commands[name], repeat))
+                heavy = sorted(imported_modules(commands[name]) & set(HEAVY_MODULES))
+                record.update(status='ok' if 'Traceback' not in record['stderr'] else 'error',
+                              heavy_modules=heavy, limit_ms=limit_ms,
+                              over_limit=record['wall_s'] * 1000 > limit_ms)
+                flag = "  ⚠️ over limit" if record['over_limit'] else ""
+                print(f"{'startup:' + name:<{width}} {record['wall_s'] * 1000:7.0f} ms  "
+                      f"heavy: {', '.join(heavy) or '-'}{flag}")
+            except (OSError, subprocess.SubprocessError) as e:
+                record.update(status='error', error=f"{type(e).__name__}: {e}")
+                print(f"{'startup:' + name:<{width}} error: {record['error']}")
+            records.append(record)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return records
+
+
+def append_results(records, path):
+    """Append records to a JSON lines file"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+def load_results(path):
+    """All records of a JSON lines results file as a DataFrame"""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    with open(path, encoding="utf-8") as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def compare_runs(results, run_id=None, baseline_id=None, threshold=1.25, min_seconds=0.05):
+    """
+    Compare the timings of two runs.
+
+    Args:
+        results (pd.DataFrame): Records from load_results
+        run_id (str, optional): Run to check, defaults to the latest
+        baseline_id (str, optional): Run to compare with, defaults to the
+            one before `run_id`
+        threshold (float): Ratio of wall times counted as a regression
+        min_seconds (float): Runs faster than this are never flagged (timer noise)
+
+    Returns:
+        pd.DataFrame: benchmark, scale, both wall times, ratio and a
+        'regression' flag; empty if there is no earlier run
+    """
+    if results.empty:
+        return pd.DataFrame()
+    ok = results[results['status'] == 'ok']
+    runs = sorted(ok['run_id'].unique())
+    run_id = run_id or (runs[-1] if runs else None)
+    earlier = [r for r in runs if r < run_id]
+    baseline_id = baseline_id or (earlier[-1] if earlier else None)
+    if baseline_id is None:
+        return pd.DataFrame()
+
+    keys = ['benchmark', 'scale']
+    current = ok[ok['run_id'] == run_id][keys + ['wall_s', 'peak_alloc_bytes']]
+    baseline = ok[ok['run_id'] == baseline_id][keys + ['wall_s', 'peak_alloc_bytes']]
+    df = current.merge(baseline, on=keys, suffixes=('', '_baseline'))
+    df['ratio'] = df['wall_s'] / df['wall_s_baseline']
+    df['regression'] = (df['ratio'] > threshold) & (df['wall_s'] > min_seconds)
+    df.insert(0, 'baseline_id', baseline_id)
+    df.insert(0, 'run_id', run_id)
+    return df.reset_index(drop=True)
@@ -0,0 +1,305 @@
+"""
+Document profiles of central banks for the text extraction.
+
+A CentralBankProfile describes the statements of one institution: the
+section headers (each alone on a line), phrases that end a section early,
+the regular expressions of the statement date and a file name fallback.
+
+SectionParser compiles several profiles into one engine and parses a
+document for all of them in a single pass:
+
+    headers      one dict from the lowercased header to the profiles using
+                 it, so every line costs one hash lookup regardless of the
+                 number of headers and profiles
+    dates        the document is lowercased once and every date pattern is
+                 only tried (anchored) where its literal lead-in occurs,
+                 found with str.find instead of a case-insensitive scan
+
+`identify` picks the profile that matches a document best, so folders
+with statements of several institutions can be processed together.
+"""
+import os
+import re
+
+from stock_pipeline.text_extraction import CONCLUSION_END, HEADERS, SECTION_MAPPING, convert_month_to_number
+
+# Named groups every date pattern has to define
+DATE_GROUPS = ("day", "month", "year")
+
+_REGEX_SPECIAL = set("\\.^$*+?{}[]|()")
+
+
+def literal_prefix(pattern):
+    """Lowercased literal text a pattern starts with ('' if there is none)"""
+    prefix = []
+    for char in pattern:
+        if char in _REGEX_SPECIAL:
+            # A quantifier applies to the last literal character
+            if char in "?*{" and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return "".join(prefix).lower()
+
+
+class CentralBankProfile:
+    """
+    Statement layout of one central bank.
+
+    Args:
+        name (str): Short name, also the sub-folder of the text output
+        headers (list): Section headers, matched case-insensitively on
+            lines of their own
+        section_mapping (dict, optional): Header -> section file key,
+            defaults to '<n>_<HEADER>' in header order
+        date_patterns (list): Regular expressions with the named groups
+            day, month and year, tried in order
+        end_markers (dict, optional): Header -> phrase; the section ends
+            (inclusively) at the first line containing the phrase
+        filename_patterns (list): Regular expressions (same groups) on the
+            file name without extension, used when the text has no date
+    """
+
+    def __init__(self, name, headers, section_mapping=None, date_patterns=(), end_markers=None,
+                 filename_patterns=()):
+        self.name = name
+        self.headers = list(headers)
+        self.section_mapping = dict(section_mapping) if section_mapping is not None else {
+            header: f"{i}_{header.upper().replace(' ', '_')}" for i, header in enumerate(self.headers, 1)}
+        self.date_patterns = list(date_patterns)
+        self.end_markers = {header.lower(): marker.lower() for header, marker in (end_markers or {}).items()}
+        self.filename_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in filename_patterns]
+        for pattern in self.date_patterns + list(filename_patterns):
+            missing = [group for group in DATE_GROUPS if f"(?P<{group}>" not in pattern]
+            if missing:
+                raise ValueError(f"Date pattern of {name} lacks the groups {missing}: {pattern}")
+
+    @classmethod
+    def from_dict(cls, name, spec):
+        """Profile of a config entry {"headers": [...], "date_patterns": [...], ...}"""
+        return cls(name, **spec)
+
+
+PROFILES = {}
+
+
+def register_profile(profile):
+    """Add (or replace) a profile under its name"""
+    PROFILES[profile.name] = profile
+    return profile
+
+
+register_profile(CentralBankProfile(
+    "ECB", HEADERS, SECTION_MAPPING,
+    date_patterns=[r"Combined monetary policy decisions and\s*statement\s*"
+                   r"(?P<day>\d{1,2})\s+(?P<month>\w+)\s+(?P<year>\d{4})"],
+    end_markers={"Conclusion": CONCLUSION_END},
+    filename_patterns=[r"^PRESS CONFERENCE_(?P<day>\d{1,2})_(?P<month>[A-Za-z]+)_(?P<year>\d{4})$"],
+))
+
+register_profile(CentralBankProfile(
+    "FED",
+    ["Implementation Note", "Decisions Regarding Monetary Policy Implementation",
+     "Transcript of Chair's Press Conference", "Opening Statement", "Questions and Answers"],
+    date_patterns=[r"For release at [^\n]*?\s+"
+                   r"(?P<month>[A-Z][a-z]+)\.?\s+(?P<day>\d{1,2}),\s+(?P<year>\d{4})",
+                   r"Federal Open Market Committee[^\n]*?\s+"
+                   r"(?P<month>[A-Z][a-z]+)\.?\s+(?P<day>\d{1,2}),\s+(?P<year>\d{4})"],
+    end_markers={"Opening Statement": "I look forward to your questions"},
+    filename_patterns=[r"^(?:monetary|fomcpresconf)(?P<year>\d{4})(?P<month>\d{2})(?P<day>\d{2})"],
+))
+
+register_profile(CentralBankProfile(
+    "BOE",
+    ["Monetary Policy Summary", "Minutes of the Monetary Policy Committee meeting",
+     "Current economic and financial conditions", "The immediate policy decision"],
+    date_patterns=[r"Monetary Policy Committee meeting ending on\s+"
+                   r"(?P<day>\d{1,2})\s+(?P<month>[A-Z][a-z]+)\s+(?P<year>\d{4})",
+                   r"Monetary Policy Summary,?\s+(?P<day>\d{1,2})\s+(?P<month>[A-Z][a-z]+)\s+(?P<year>\d{4})"],
+    filename_patterns=[r"^monetary-policy-summary-and-minutes-(?P<month>[a-z]+)-(?P<day>\d{1,2})?-?(?P<year>\d{4})$"],
+))
+
+
+def get_profiles(names=None, extra=None):
+    """
+    Profiles by name.
+
+    Args:
+        names (list, optional): Profile names, defaults to all registered
+        extra (dict, optional): Name -> CentralBankProfile or config dict,
+            added to (or replacing) the registered profiles
+
+    Raises:
+        KeyError: For an unknown name
+    """
+    profiles = dict(PROFILES)
+    for name, spec in (extra or {}).items():
+        profiles[name] = spec if isinstance(spec, CentralBankProfile) else CentralBankProfile.from_dict(name, spec)
+    if names is None:
+        return list(profiles.values())
+    unknown = [name for name in names if name not in profiles]
+    if unknown:
+        raise KeyError(f"Unknown central bank profiles {unknown}. Choose from {list(profiles)}")
+    return [profiles[name] for name in names]
+
+
+def format_date(day, month, year, date_format):
+    """Folder name of a date: 06_March_2025 ('text') or 06_03_2025 ('number')"""
+    day = (day or "1").zfill(2)
+    if month.isdigit():
+        month = month.zfill(2)
+    elif date_format == "number":
+        month = convert_month_to_number(month)
+    return f"{day}_{month}_{year}"
+
+
+class SectionParser:
+    """
+    Sections and dates of documents for several profiles in one pass.
+
+    Args:
+        profiles (list): CentralBankProfile objects, defaults to all
+            registered profiles
+    """
+
+    def __init__(self, profiles=None):
+        self.profiles = list(profiles) if profiles is not None else get_profiles()
+        self.names = [profile.name for profile in self.profiles]
+        # Lowercased header -> [(profile position, header)]
+        self.header_index = {}
+        for position, profile in enumerate(self.profiles):
+            for header in profile.headers:
+                self.header_index.setdefault(header.lower(), []).append((position, header))
+
+        # (profile position, compiled pattern, literal lead-in) in priority order
+        self.date_patterns = [(position, re.compile(pattern, re.IGNORECASE | re.DOTALL), literal_prefix(pattern))
+                              for position, profile in enumerate(self.profiles)
+                              for pattern in profile.date_patterns]
+
+    def __getstate__(self):
+        # Worker processes rebuild the engine from the profiles
+        return {"profiles": self.profiles}
+
+    def __setstate__(self, state):
+        self.__init__(state["profiles"])
+
+    def sections(self, text):
+        """
+        Sections of every profile.
+
+        Returns:
+            list: Per profile a dict header -> section text (header line
+            included), in the order of `profiles`
+        """
+        n = len(self.profiles)
+        results = [{} for _ in range(n)]
+        current = [None] * n
+        buffers = [None] * n
+        markers = [profile.end_markers for profile in self.profiles]
+        open_sections = 0
+        header_index = self.header_index
+
+        for line in text.splitlines():
+            stripped_line = line.strip()
+            lowered = stripped_line.lower()
+            ended = ()
+            if open_sections:
+                ended = [p for p in range(n) if current[p] is not None
+                         and current[p].lower() in markers[p] and markers[p][current[p].lower()] in lowered]
+                for p in ended:
+                    buffers[p].append(line)
+                    results[p][current[p]] = '\n'.join(buffers[p]).strip()
+                    current[p] = buffers[p] = None
+                    open_sections -= 1
+
+            starts = header_index.get(lowered, ())
+            started = set()
+            for p, header in starts:
+                if p in ended:
+                    continue
+                if current[p] is not None:
+                    results[p][current[p]] = '\n'.join(buffers[p]).strip()
+                    open_sections -= 1
+                current[p] = header
+                buffers[p] = [stripped_line]
+                open_sections += 1
+                started.add(p)
+            if open_sections:
+                for p in range(n):
+                    if current[p] is not None and p not in started:
+                        buffers[p].append(line)
+
+        for p in range(n):
+            if current[p] is not None:
+                results[p][current[p]] = '\n'.join(buffers[p]).strip()
+        return results
+
+    def dates(self, text):
+        """First date match of every profile, (day, month, year) or None"""
+        found = [None] * len(self.profiles)
+        lowered = text.lower()
+        # Offsets only carry over if lowercasing kept the length (it does for ASCII)
+        aligned = len(lowered) == len(text)
+        for position, pattern, lead in self.date_patterns:
+            if found[position] is not None:
+                continue
+            if lead and aligned:
+                match = None
+                start = lowered.find(lead)
+                while start >= 0 and match is None:
+                    match = pattern.match(text, start)
+                    start = lowered.find(lead, start + 1)
+            else:
+                match = pattern.search(text)
+            if match:
+                found[position] = match.group(*DATE_GROUPS)
+        return found
+
+    def parse(self, text):
+        """
+        Sections and date of a document for every profile.
+
+        Returns:
+            dict: Profile name -> {'sections': header -> text,
+            'date': (day, month, year) or None}
+        """
+        return {name: {"sections": sections, "date": date}
+                for name, sections, date in zip(self.names, self.sections(text), self.dates(text))}
+
+    def identify(self, parsed):
+        """
+        Name of the best matching profile of a parsed document.
+
+        A date match counts most, then the number of sections found.
+
+        Returns:
+            str or None: None if no profile found a date or a section
+        """
+        scores = {name: (result["date"] is not None, len(result["sections"]))
+                  for name, result in parsed.items()}
+        best = max(scores, key=scores.get, default=None)
+        return best if best is not None and any(scores[best]) else None
+
+    def date_folder(self, name, parsed, date_format, pdf_name):
+        """
+        Folder name of a document's date for profile `name`.
+
+        Falls back to the file name patterns and finally to
+        'xxxx_no date found__<file name>'.
+        """
+        date = parsed[name]["date"]
+        pdf_basename = os.path.splitext(os.path.basename(pdf_name))[0]
+        if date is None:
+            for pattern in self.profiles[self.names.index(name)].filename_patterns:
+                match = pattern.match(pdf_basename)
+                if match:
+                    date = match.group(*DATE_GROUPS)
+                    break
+        if date is None:
+            return f"xxxx_no date found__{pdf_basename}"
+        return format_date(*date, date_format)
+
+    def section_files(self, name, sections):
+        """Section file key -> content of the mapped sections of profile `name`"""
+        mapping = self.profiles[self.names.index(name)].section_mapping
+        return {mapping[title]: content for title, content in sections.items() if title in mapping}
@@ -0,0 +1,292 @@
+"""
+Command line interface of the pipeline.
+
+    python -m stock_pipeline <stage> [--config FILE] [--set key=value ...] [flags]
+    python -m stock_pipeline run [stage ...] [--config FILE] [--jobs N] [--force] [--dry-run]
+    python -m stock_pipeline status [stage ...] [--config FILE]
+    python -m stock_pipeline validate --config FILE
+    python -m stock_pipeline list-dates [--config FILE]
+
+Stages and run accept --metrics FILE (JSON lines per stage and item), --prometheus
+FILE (Prometheus text file) and --profile cprofile|pyinstrument.
+
+Settings are applied in this order, later ones win: the stage's
+DEFAULT_CONFIG, the stage section of the config file, `--set` overrides,
+and finally the dedicated flags of the stage.
+
+`run` executes the stale stages of the whole pipeline (or of the given
+target stages and their upstream stages) with the config file sections.
+
+status, validate and list-dates only read the state file, the config file
+and the extracted text folders; they import neither pandas nor any model
+library and start in a fraction of a second.
+"""
+import argparse
+import contextlib
+import sys
+
+from stock_pipeline import metrics
+from stock_pipeline.config import load_config_file, merge_config, parse_override, resolve_path, validate_config
+from stock_pipeline.stages import NAME_WIDTH, STAGES, load_stage
+
+HELP = {
+    "download": "Download index data from Yahoo Finance",
+    "extract": "Extract text sections from the press conference PDFs",
+    "rates": "Parse the ECB interest rate files",
+    "onehot": "Combine the index data and one-hot encode the index",
+    "sentiment": "Score the press conference texts with FinBERT and RoBERTa",
+    "build": "Build the event window dataset and its variants",
+    "intraday": "Minute-offset event windows around the ECB announcements",
+    "tune": "Search the model hyperparameters on every dataset variant",
+    "train": "Train the Bayesian Ridge models",
+    "compare": "Compare all dataset variants, targets and models on one feature matrix",
+    "backtest": "Walk-forward backtests over the ECB meetings",
+    "significance": "Bootstrap and permutation tests of the dataset variants",
+    "serve": "Serve event-day predictions of the trained models over HTTP",
+    "bench": "Benchmark the stages on synthetic data at larger scales and the startup time",
+}
+
+# Stage-specific flags: (flag, config key, argparse keywords)
+STAGE_FLAGS = {
+    "download": [
+        ("--symbols", "symbols", {"nargs": "+", "help": "Ticker symbols"}),
+        ("--start", "start_date", {"help": "Start date YYYY-MM-DD"}),
+        ("--end", "end_date", {"help": "End date YYYY-MM-DD (exclusive)"}),
+        ("--interval", "interval", {"help": "Bar interval, e.g. 1d"}),
+        ("--workers", "max_workers", {"type": int, "help": "Parallel downloads"}),
+    ],
+    "extract": [
+        ("--central-bank", "central_bank", {"help": "Entry of pdf_folders and profile (ECB, FED, BOE) or 'auto'"}),
+        ("--date-format", "date_format", {"choices": ["text", "number"],
+                                          "help": "Folder date style"}),
+        ("--workers", "workers", {"type": int, "help": "Worker processes"}),
+        ("--force", "force", {"action": "store_const", "const": True,
+                              "help": "Re-extract unchanged PDFs"}),
+    ],
+    "rates": [
+        ("--alignment", "alignment", {"choices": ["exact", "asof"],
+                                      "help": "Rate on the exact day or the latest one before it"}),
+    ],
+    "onehot": [
+        ("--encoding", "encoding", {"choices": ["dense", "categorical"],
+                                    "help": "One Index_<name> column per index or one categorical column"}),
+    ],
+    "sentiment": [
+        ("--batch-size", "batch_size", {"type": int, "help": "Texts per forward pass"}),
+        ("--chunking", "chunking", {"choices": ["chars", "tokens"], "help": "Chunk splitting"}),
+        ("--chunk-tokens", "chunk_tokens", {"type": int, "help": "Token budget per chunk"}),
+        ("--chunk-stride", "chunk_stride", {"type": int, "help": "Tokens shared by consecutive chunks"}),
+        ("--stub", "stub", {"action": "store_const", "const": True,
+                            "help": "Score without model weights (for tests)"}),
+    ],
+    "build": [
+        ("--n-lags", "n_lags", {"type": int, "help": "Closes before the event"}),
+        ("--n-leads", "n_leads", {"type": int, "help": "Closes after the event"}),
+        ("--alignment", "alignment", {"choices": ["exact", "asof"],
+                                      "help": "Exact dates or as-of joins onto the next trading day"}),
+        ("--partition", "partition", {"choices": ["year", "instrument"],
+                                      "help": "Out-of-core build, one partition of the stock table at a time"}),
+    ],
+    "intraday": [
+        ("--interval", "interval", {"help": "Bar interval, e.g. 1m"}),
+        ("--bars-file", "bars_file", {"help": "Local .parquet/.csv minute file instead of downloading"}),
+        ("--before", "minutes_before", {"type": int, "help": "Minutes fetched before the first event"}),
+        ("--after", "minutes_after", {"type": int, "help": "Minutes fetched after the last event"}),
+        ("--workers", "max_workers", {"type": int, "help": "Parallel downloads"}),
+    ],
+    "tune": [
+        ("--model", "model", {"choices": ["BayesianRidge", "Ridge", "LinearRegression"],
+                              "help": "Model to tune"}),
+        ("--splits", "n_splits", {"type": int, "help": "Cross-validation folds"}),
+        ("--workers", "workers", {"type": int, "help": "Worker processes"}),
+    ],
+    "train": [
+        ("--random-state", "random_state", {"type": int, "help": "Seed of the test split"}),
+    ],
+    "compare": [
+        ("--random-state", "random_state", {"type": int, "help": "Seed of the test split"}),
+    ],
+    "backtest": [
+        ("--windows", "windows", {"nargs": "+", "help": "'expanding' or sliding window lengths"}),
+        ("--min-train", "min_train", {"type": int, "help": "Meetings before the first prediction"}),
+        ("--seeds", "n_seeds", {"type": int, "help": "Random splits to compare with"}),
+        ("--workers", "workers", {"type": int, "help": "Worker processes"}),
+    ],
+    "significance": [
+        ("--resamples", "n_resamples", {"type": int, "help": "Bootstrap resamples of the meetings"}),
+        ("--permutations", "n_permutations", {"type": int, "help": "Shuffles of the sentiment columns"}),
+        ("--time-budget", "time_budget", {"type": float, "help": "Seconds for all resamples"}),
+        ("--reference", "reference", {"help": "Variant the MSE differences refer to"}),
+        ("--workers", "workers", {"type": int, "help": "Worker processes"}),
+    ],
+    "serve": [
+        ("--variant", "variant", {"help": "Model name of the train stage"}),
+        ("--host", "host", {"help": "Interface to listen on"}),
+        ("--port", "port", {"type": int, "help": "Port to listen on"}),
+    ],
+    "bench": [
+        ("--only", "benchmarks", {"nargs": "+", "help": "Benchmarks to run ('startup' for the entry points)"}),
+        ("--scales", "scales", {"type": int, "nargs": "+", "help": "Scale factors"}),
+        ("--repeat", "repeat", {"type": int, "help": "Timed runs per benchmark and scale"}),
+        ("--max-seconds", "max_seconds", {"type": float, "help": "Time budget of a single run"}),
+    ],
+}
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument("--metrics", metavar="FILE", help="Append stage and item metrics as JSON lines")
+    parser.add_argument("--prometheus", metavar="FILE", help="Write the metrics as a Prometheus text file")
+    parser.add_argument("--profile", choices=metrics.PROFILERS, help="Profile the stages")
+    parser.add_argument("--profile-dir", default="profiles", help="Folder of the profile files")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="stock_pipeline", description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="stage", required=True, metavar="stage")
+    for name in STAGES:
+        sub = subparsers.add_parser(name, help=HELP[name], description=HELP[name])
+        sub.add_argument("--root", help="Project root the config paths are relative to")
+        sub.add_argument("--config", help="JSON config file with one section per stage")
+        sub.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                         help="Override a config entry (value parsed as JSON), repeatable")
+        sub.add_argument("--format", dest="storage_format", choices=["parquet", "feather", "excel"],
+                         help="Storage format of the stage outputs")
+        sub.add_argument("--excel-export", dest="excel_export", action="store_const", const=True,
+                         help="Also write .xlsx copies")
+        for flag, key, kwargs in STAGE_FLAGS.get(name, []):
+            sub.add_argument(flag, dest=key, **kwargs)
+        add_metrics_arguments(sub)
+
+    run = subparsers.add_parser("run", help="Run all stale stages of the pipeline",
+                                description="Run all stale stages of the pipeline")
+    run.add_argument("targets", nargs="*", metavar="stage",
+                     help="Target stages (with their upstream stages), default all")
+    run.add_argument("--root", help="Project root the config paths are relative to")
+    run.add_argument("--config", help="JSON config file with one section per stage")
+    run.add_argument("--jobs", type=int, default=4, help="Stages running at the same time")
+    run.add_argument("--force", action="store_true", help="Run stages even if up to date")
+    run.add_argument("--dry-run", action="store_true", help="Only report stale stages")
+    add_metrics_arguments(run)
+
+    status = subparsers.add_parser("status", help="Show which stages are current, stale or never run",
+                                   description="Show which stages are current, stale or never run")
+    status.add_argument("targets", nargs="*", metavar="stage",
+                        help="Target stages (with their upstream stages), default all")
+    status.add_argument("--root", help="Project root the config paths are relative to")
+    status.add_argument("--config", help="JSON config file with one section per stage")
+
+    validate = subparsers.add_parser("validate", help="Check a config file against the stage defaults",
+                                     description="Check a config file against the stage defaults")
+    validate.add_argument("--config", required=True, help="JSON config file with one section per stage")
+
+    list_dates = subparsers.add_parser("list-dates", help="List the press release days of the extracted texts",
+                                       description="List the press release days of the extracted texts")
+    list_dates.add_argument("--root", help="Project root the config paths are relative to")
+    list_dates.add_argument("--config", help="JSON config file with one section per stage")
+    return parser
+
+
+def run_pipeline_command(args):
+    from stock_pipeline.pipeline import run_pipeline
+
+    configs = load_config_file(args.config) if args.config else {}
+    # Profilers see one stage at a time only when stages do not overlap
+    jobs = 1 if args.profile else args.jobs
+    report = run_pipeline(args.targets or None, configs, root=args.root, jobs=jobs,
+                          force=args.force, dry_run=args.dry_run,
+                          profile=args.profile, profile_dir=args.profile_dir)
+    return 1 if any(entry["status"] in ("failed", "skipped") for entry in report.values()) else 0
+
+
+def status_command(args):
+    from stock_pipeline.pipeline import pipeline_status
+
+    configs = load_config_file(args.config) if args.config else {}
+    report = pipeline_status(args.targets or None, configs, root=args.root)
+    for stage, entry in report.items():
+        line = f"   • {stage:<{NAME_WIDTH}} {entry['status']:<10} {entry['finished'] or '-'}"
+        if entry["upstream"]:
+            line += f"  (upstream not current: {', '.join(entry['upstream'])})"
+        print(line)
+    return 0 if all(entry["status"] == "current" for entry in report.values()) else 1
+
+
+def validate_command(args):
+    configs = load_config_file(args.config)
+    problems = []
+    for section, overrides in configs.items():
+        if section not in STAGES:
+            problems.append(f"{section}: unknown stage. Choose one of {list(STAGES)}")
+            continue
+        defaults = load_stage(section).DEFAULT_CONFIG
+        problems += [f"{section}: {problem}" for problem in validate_config(defaults, overrides)]
+    for problem in problems:
+        print(f"   • {problem}")
+    print(f"{args.config}: {len(configs)} sections, "
+          + (f"{len(problems)} problem(s)" if problems else "valid"))
+    return 1 if problems else 0
+
+
+def list_dates_command(args):
+    from stock_pipeline.stages.extract import DEFAULT_CONFIG, press_release_folders
+
+    section = load_config_file(args.config).get("extract", {}) if args.config else {}
+    config = merge_config(DEFAULT_CONFIG, section)
+    folders = press_release_folders(resolve_path(args.root, config["input_folder"]))
+    for name, date in folders:
+        print(f"{date:%Y-%m-%d}  {name}")
+    print(f"{len(folders)} press release days")
+    return 0
+
+
+def stage_config(args, stage_module):
+    """Merge config file section, --set overrides and flags of a parsed command"""
+    config = {}
+    if args.config:
+        config.update(load_config_file(args.config).get(args.stage, {}))
+    for override in args.overrides:
+        key, value = parse_override(override)
+        config[key] = value
+
+    flag_keys = ["storage_format", "excel_export"] + [key for _, key, _ in STAGE_FLAGS.get(args.stage, [])]
+    for key in flag_keys:
+        value = getattr(args, key, None)
+        if value is not None and key in stage_module.DEFAULT_CONFIG:
+            config[key] = value
+    return config
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    metrics_file, prometheus_file = getattr(args, "metrics", None), getattr(args, "prometheus", None)
+    recording = (metrics.recording(metrics_file, prometheus_file) if metrics_file or prometheus_file
+                 else contextlib.nullcontext())
+    with recording:
+        return run_command(args)
+
+
+COMMANDS = {
+    "run": run_pipeline_command,
+    "status": status_command,
+    "validate": validate_command,
+    "list-dates": list_dates_command,
+}
+
+
+def run_command(args):
+    if args.stage in COMMANDS:
+        try:
+            return COMMANDS[args.stage](args)
+        except (KeyError, ValueError, OSError) as e:
+            print(f"{args.stage}: {e}", file=sys.stderr)
+            return 1
+
+    stage_module = load_stage(args.stage)
+    try:
+        config = stage_config(args, stage_module)
+        with metrics.stage(args.stage, args.profile, args.profile_dir):
+            stage_module.run(config, root=args.root)
+    except (KeyError, ValueError, FileNotFoundError) as e:
+        print(f"{args.stage}: {e}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,154 @@
+"""
+Bounded concurrent execution with retries and exponential backoff.
+
+`run_bounded` maps a function over items on a thread pool of fixed size.
+Every item is retried on failure with exponentially growing pauses; items
+that still fail are reported in a structured result instead of aborting
+the whole batch.
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from stock_pipeline import metrics
+
+
+class PermanentError(Exception):
+    """Raised by a task for failures that a retry cannot fix (e.g. no data)"""
+
+
+class TaskFailure:
+    """
+    Final failure of one item after all attempts.
+
+    Args:
+        item: The item that failed (e.g. a symbol)
+        error (Exception): Last exception raised
+        attempts (int): Number of attempts made
+    """
+
+    def __init__(self, item, error, attempts):
+        self.item = item
+        self.error = error
+        self.attempts = attempts
+
+    def to_dict(self):
+        return {
+            "item": self.item,
+            "error_type": type(self.error).__name__,
+            "error": str(self.error),
+            "attempts": self.attempts,
+        }
+
+    def __repr__(self):
+        return f"TaskFailure({self.item!r}, {type(self.error).__name__}: {self.error}, attempts={self.attempts})"
+
+
+class BatchResult:
+    """
+    Outcome of a batch: successful results and failures keyed by item.
+
+    Attributes:
+        results (dict): item -> return value of the task
+        failures (dict): item -> TaskFailure
+        elapsed (float): Wall time of the batch in seconds
+    """
+
+    def __init__(self, results, failures, elapsed):
+        self.results = results
+        self.failures = failures
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def summary(self):
+        return {
+            "succeeded": len(self.results),
+            "failed": len(self.failures),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "failures": [failure.to_dict() for failure in self.failures.values()],
+        }
+
+
+def backoff_delay(attempt, backoff=1.0, max_backoff=30.0, jitter=True):
+    """Pause before retry number `attempt` (1-based): backoff * 2**(attempt-1)"""
+    delay = min(max_backoff, backoff * 2 ** (attempt - 1))
+    if jitter:
+        delay *= 0.5 + random.random() / 2
+    return delay
+
+
+def call_with_retries(fn, item, retries=3, backoff=1.0, max_backoff=30.0, sleep=time.sleep):
+    """
+    Call `fn(item)` and retry on failure.
+
+    PermanentError is not retried.
+
+    Returns:
+        tuple: (result, attempts)
+
+    Raises:
+        Exception: The last error, with the attempt count in `attempts`
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn(item), attempt
+        except PermanentError as e:
+            e.attempts = attempt
+            raise
+        except Exception as e:
+            if attempt > retries:
+                e.attempts = attempt
+                raise
+            sleep(backoff_delay(attempt, backoff, max_backoff))
+
+
+def run_bounded(fn, items, max_workers=8, retries=3, backoff=1.0, max_backoff=30.0,
+                on_done=None):
+    """
+    Run `fn` over `items` with at most `max_workers` calls in flight.
+
+    Args:
+        fn (callable): Task taking one item
+        items (iterable): Items to process
+        max_workers (int): Concurrency limit
+        retries (int): Retries per item after the first attempt
+        backoff (float): Base pause in seconds, doubled on every retry
+        max_backoff (float): Upper bound of a single pause
+        on_done (callable, optional): Called as on_done(item, result, failure)
+            when an item finishes, e.g. for progress output
+
+    Returns:
+        BatchResult: Results and failures keyed by item
+    """
+    items = list(items)
+    start = time.perf_counter()
+    results, failures = {}, {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        # Each task runs in a copy of the caller's context so its metrics belong to the current stage
+        futures = {
+            executor.submit(metrics.copy_context().run, call_with_retries, fn, item, retries, backoff,
+                            max_backoff): item
+            for item in items
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                result, _ = future.result()
+                results[item] = result
+                failure = None
+            except Exception as e:
+                failure = TaskFailure(item, e, getattr(e, "attempts", 1))
+                failures[item] = failure
+                result = None
+            if on_done is not None:
+                on_done(item, result, failure)
+
+    # Keep the input order for downstream consumers
+    ordered = {item: results[item] for item in items if item in results}
+    return BatchResult(ordered, failures, time.perf_counter() - start)
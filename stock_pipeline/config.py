@@ -0,0 +1,98 @@
+"""
+Configuration helpers shared by the stages and the command line interface.
+
+Every stage module defines a DEFAULT_CONFIG dict with the same entries the
+numbered scripts expose in their CONFIG. Paths in a config are relative to
+the project root and may use either '/' or '\\' as separator.
+
+Config files are JSON objects with one section per stage, e.g.
+
+    {
+        "download": {"symbols": ["^GDAXI"], "interval": "1wk"},
+        "build": {"n_lags": 10}
+    }
+"""
+import json
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def resolve_path(root, path):
+    """Absolute path of a config path relative to `root`, independent of the OS separator"""
+    if path is None:
+        return None
+    path = path.replace("\\", "/")
+    if os.path.isabs(path):
+        return os.path.normpath(path)
+    return os.path.normpath(os.path.join(root or PROJECT_ROOT, *path.split("/")))
+
+
+def merge_config(defaults, overrides=None):
+    """Copy of `defaults` updated with `overrides`; unknown keys are rejected"""
+    overrides = overrides or {}
+    unknown = set(overrides) - set(defaults)
+    if unknown:
+        raise KeyError(f"Unknown config entries: {sorted(unknown)}. Known: {sorted(defaults)}")
+    merged = dict(defaults)
+    merged.update(overrides)
+    return merged
+
+
+def validate_config(defaults, overrides):
+    """
+    Problems of a config section, without raising.
+
+    An entry is unknown if it is not in `defaults`, and mistyped if its
+    type differs from the default's (None defaults accept anything, numbers
+    are interchangeable, and so are lists and tuples).
+
+    Returns:
+        list: One message per problem, empty if the section is valid
+    """
+    if not isinstance(overrides, dict):
+        return [f"section must be a JSON object, not {type(overrides).__name__}"]
+    problems = []
+    for key, value in overrides.items():
+        if key not in defaults:
+            problems.append(f"unknown entry '{key}'")
+            continue
+        default = defaults[key]
+        if default is None or value is None:
+            continue
+        expected = type(default)
+        if expected in (int, float):
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        elif expected in (list, tuple):
+            valid = isinstance(value, (list, tuple))
+        else:
+            valid = isinstance(value, expected)
+        if not valid:
+            problems.append(f"'{key}' should be {expected.__name__} like the default {default!r}, "
+                            f"got {type(value).__name__} {value!r}")
+    return problems
+
+
+def load_config_file(path):
+    """Read a JSON config file with one section per stage"""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"Config file {path} must contain a JSON object")
+    return config
+
+
+def parse_override(text):
+    """
+    Parse a 'key=value' override from the command line.
+
+    The value is read as JSON if possible ('3', 'true', '["^GDAXI"]'),
+    otherwise kept as a string.
+    """
+    if "=" not in text:
+        raise ValueError(f"Override '{text}' must look like key=value")
+    key, value = text.split("=", 1)
+    try:
+        return key.strip(), json.loads(value)
+    except json.JSONDecodeError:
+        return key.strip(), value
@@ -0,0 +1,64 @@
+"""
+Feature groups and the dataset variants built from the event windows.
+
+The variants differ only in the sentiment column they add to the base
+features; the targets are the percentage changes of the close relative to
+the last close before the press release.
+"""
+PRICE_COLUMNS = ['Close_t-4', 'Close_t-3', 'Close_t-2']
+FEATURE_COLUMNS_WITH_OLD = ['Index_MDAX', 'Index_SDAX', 'Interest Rate_Old', 'Interest Rate_Change']
+BASE_COLUMNS = PRICE_COLUMNS + FEATURE_COLUMNS_WITH_OLD
+TARGET_COLUMNS = ['Close', 'Close_t+1', 'Close_t+2']
+REFERENCE_COLUMN = 'Close_t-1'
+SENTIMENT_COLUMNS = ['FinBERT_Sentences', 'FinBERT_Chunks', 'RoBERTa_Sentences', 'RoBERTa_Chunks']
+
+# Dataset name -> sentiment columns added to the base features
+VARIANTS = {
+    'dataset': SENTIMENT_COLUMNS,
+    'dataset_base': [],
+    'dataset_finbert_sentences': ['FinBERT_Sentences'],
+    'dataset_finbert_chunks': ['FinBERT_Chunks'],
+    'dataset_roberta_sentences': ['RoBERTa_Sentences'],
+    'dataset_roberta_chunks': ['RoBERTa_Chunks']
+}
+
+
+def pct_change_to_reference(df, columns, reference=REFERENCE_COLUMN):
+    """Percentage change of `columns` relative to the reference close"""
+    return df[columns].sub(df[reference], axis=0).div(df[reference], axis=0) * 100
+
+
+def feature_columns(variant):
+    """Feature columns of a dataset variant"""
+    return BASE_COLUMNS + VARIANTS[variant]
+
+
+def build_variants(df_neu, remove_dates=None):
+    """
+    Create all dataset variants from the complete event window table.
+
+    Args:
+        df_neu (pd.DataFrame): Date-indexed table with lags, leads, interest
+            rate and sentiment columns
+        remove_dates (list, optional): Outlier dates to drop
+
+    Returns:
+        dict: Variant name -> DataFrame with feature and target columns
+    """
+    import pandas as pd
+
+    # Remove outliers
+    df_filtered = df_neu.loc[~df_neu.index.isin(pd.to_datetime(remove_dates or []))]
+
+    # Percentage-based targets and price features
+    df_targets = pct_change_to_reference(df_filtered, TARGET_COLUMNS)
+    df_features = df_filtered[BASE_COLUMNS + SENTIMENT_COLUMNS].copy()
+    df_features[PRICE_COLUMNS] = pct_change_to_reference(df_filtered, PRICE_COLUMNS)
+
+    datasets = {}
+    for name in VARIANTS:
+        df_temp = df_features[feature_columns(name)].copy()
+        for col in TARGET_COLUMNS:
+            df_temp[col] = df_targets[col]
+        datasets[name] = df_temp
+    return datasets
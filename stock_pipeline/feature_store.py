@@ -0,0 +1,220 @@
+"""
+Precomputed event features with lookup by (date, instrument).
+
+The build stage writes the event windows once more as a feature store:
+every price column (lags, event day, leads) already as the percentage
+change to the reference close Close_t-1, which is kept as the raw close,
+plus the interest rate, the rate change category (-1 lowered, 0 unchanged,
++1 raised) and the sentiment scores. The instrument is a small integer
+code instead of one-hot columns.
+
+Rows are sorted by date and held in one float64 array, so
+
+    lookup(date, instrument)    is one dict access
+    rows(dates), date_slice()   are searchsorted ranges over the dates
+    matrix(columns)             builds training.FeatureMatrix without
+                                recomputing features (Index_<name> columns
+                                come from the codes)
+    rate_change_groups()        gives the dates of the balanced test split,
+                                computed once for all seeds
+
+so splits, backtests and serving read the same table without rescanning.
+"""
+import numpy as np
+import pandas as pd
+
+from stock_pipeline import storage
+from stock_pipeline.datasets import REFERENCE_COLUMN, TARGET_COLUMNS, pct_change_to_reference
+from stock_pipeline.instruments import INSTRUMENT_COLUMN, ONEHOT_PREFIX, OneHotView, instrument_codes
+
+RATE_COLUMN = 'Interest Rate_Change'
+RATE_CATEGORY_COLUMN = 'Rate_Category'
+DATE_COLUMN = 'Date'
+
+
+def price_columns(df):
+    """Close and Open columns of an event window table, except the reference close"""
+    return [col for col in df.columns
+            if (col.startswith('Close') or col == 'Open') and col != REFERENCE_COLUMN]
+
+
+class FeatureStore:
+    """
+    Event features in one array, indexed by date and instrument.
+
+    Attributes:
+        dates (np.ndarray): Event date of every row (datetime64[ns], sorted)
+        codes (np.ndarray): Instrument code of every row
+        instruments (list): Instrument names in code order
+        columns (list): Names of the value columns
+        values (np.ndarray): Features, shape (rows, columns), float64
+        rate_category (np.ndarray): Sign of the interest rate change per row
+    """
+
+    def __init__(self, dates, codes, instruments, columns, values, rate_category=None):
+        dates = pd.DatetimeIndex(dates).normalize().as_unit('ns').to_numpy()
+        order = np.argsort(dates, kind='stable')
+        self.dates = dates[order]
+        self.codes = np.asarray(codes, dtype=np.int16)[order]
+        self.instruments = list(instruments)
+        self.columns = list(columns)
+        self.values = np.asarray(values, dtype=np.float64)[order]
+        self._position = {col: i for i, col in enumerate(self.columns)}
+        if rate_category is None:
+            rate_category = (np.sign(np.nan_to_num(self.column(RATE_COLUMN))) if RATE_COLUMN in self._position
+                             else np.zeros(len(self.dates)))
+        else:
+            rate_category = np.asarray(rate_category)[order]
+        self.rate_category = rate_category.astype(np.int8)
+
+        # (date, code) -> row
+        self._code = {name: code for code, name in enumerate(self.instruments)}
+        self._row = {key: row for row, key in enumerate(zip(self.dates.view(np.int64).tolist(),
+                                                             self.codes.tolist()))}
+        if len(self._row) != len(self.dates):
+            raise ValueError("Feature store has several rows for the same date and instrument")
+        self.unique_dates = np.unique(self.dates)
+        self._groups = None
+
+    @classmethod
+    def from_events(cls, df, remove_dates=None):
+        """
+        Store of the complete event window table of the build stage.
+
+        Args:
+            df (pd.DataFrame): Date-indexed table with the Close_t-k/Close_t+k
+                columns, the instrument (Index_<name> columns or an 'Index'
+                column), interest rate and sentiment columns
+            remove_dates (list, optional): Outlier dates to drop, as in
+                datasets.build_variants
+        """
+        df = df.loc[~df.index.isin(pd.to_datetime(remove_dates or []))]
+        codes, instruments = instrument_codes(df)
+        prices = price_columns(df)
+        others = [col for col in df.columns
+                  if col not in prices and col != REFERENCE_COLUMN and col != INSTRUMENT_COLUMN
+                  and not col.startswith(ONEHOT_PREFIX)]
+        values = np.column_stack([pct_change_to_reference(df, prices).to_numpy(dtype=np.float64),
+                                  df[[REFERENCE_COLUMN] + others].to_numpy(dtype=np.float64)])
+        return cls(df.index, codes, instruments, prices + [REFERENCE_COLUMN] + others, values)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Store of its table layout (see to_frame)"""
+        codes, instruments = instrument_codes(df)
+        columns = [col for col in df.columns
+                   if col not in (DATE_COLUMN, INSTRUMENT_COLUMN, RATE_CATEGORY_COLUMN)]
+        return cls(df[DATE_COLUMN], codes, instruments, columns, df[columns].to_numpy(dtype=np.float64),
+                   df[RATE_CATEGORY_COLUMN].to_numpy())
+
+    def to_frame(self):
+        """Date, categorical Index, Rate_Category and the value columns"""
+        df = pd.DataFrame({DATE_COLUMN: self.dates,
+                           INSTRUMENT_COLUMN: pd.Categorical.from_codes(self.codes, categories=self.instruments),
+                           RATE_CATEGORY_COLUMN: self.rate_category})
+        return pd.concat([df, pd.DataFrame(self.values, columns=self.columns)], axis=1)
+
+    def save(self, folder, name="feature_store", fmt="parquet", excel_export=False):
+        """Write the store with the storage layer, returns the path"""
+        return storage.write_table(self.to_frame(), folder, name, fmt=fmt, excel_export=excel_export)
+
+    @classmethod
+    def load(cls, folder, name="feature_store", fmt="parquet"):
+        return cls.from_frame(storage.read_table(folder, name, fmt=fmt, date_columns=[DATE_COLUMN]))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def column(self, name):
+        """Values of one column (a view)"""
+        return self.values[:, self._position[name]]
+
+    def position(self, date, instrument):
+        """
+        Row of an event.
+
+        Raises:
+            KeyError: If the store has no row for the date and instrument
+        """
+        if instrument not in self._code:
+            raise KeyError(f"Unknown instrument '{instrument}'. Known: {self.instruments}")
+        key = (pd.Timestamp(date).normalize().as_unit('ns').value, self._code[instrument])
+        if key not in self._row:
+            raise KeyError(f"No event of {instrument} on {pd.Timestamp(date):%Y-%m-%d}")
+        return self._row[key]
+
+    def lookup(self, date, instrument):
+        """Column -> value of one event"""
+        return dict(zip(self.columns, self.values[self.position(date, instrument)].tolist()))
+
+    def date_slice(self, start=None, stop=None):
+        """Rows with start <= date < stop, as a slice"""
+        first = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'ns'))
+        last = len(self.dates) if stop is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(stop), 'ns'))
+        return slice(int(first), int(last))
+
+    def rows(self, dates):
+        """Positions of all rows on the given dates, in store order"""
+        dates = np.unique(pd.DatetimeIndex(dates).normalize().as_unit('ns').to_numpy())
+        starts = np.searchsorted(self.dates, dates, side='left')
+        stops = np.searchsorted(self.dates, dates, side='right')
+        if not len(dates):
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops)])
+
+    def date_mask(self, dates):
+        """Boolean mask of the rows on the given dates"""
+        mask = np.zeros(len(self.dates), dtype=bool)
+        mask[self.rows(dates)] = True
+        return mask
+
+    def take(self, columns=None, rows=None):
+        """
+        Values of some columns and rows.
+
+        Args:
+            columns (list, optional): Value columns or Index_<name> columns
+                (one-hot from the codes), defaults to all value columns
+            rows (slice or array, optional): Rows, defaults to all
+
+        Returns:
+            np.ndarray: float64 array of shape (rows, columns)
+        """
+        rows = slice(None) if rows is None else rows
+        if columns is None:
+            return self.values[rows]
+        view = OneHotView(self.codes[rows], self.instruments)
+        onehot = set(view.columns)
+        missing = [col for col in columns if col not in self._position and col not in onehot]
+        if missing:
+            raise KeyError(f"Columns {missing} are not in the feature store")
+        out = np.empty((len(view), len(columns)), dtype=np.float64)
+        stored = [i for i, col in enumerate(columns) if col in self._position]
+        out[:, stored] = self.values[rows][:, [self._position[columns[i]] for i in stored]]
+        encoded = [i for i, col in enumerate(columns) if col not in self._position]
+        if encoded:
+            out[:, encoded] = view.toarray([columns[i] for i in encoded])
+        return out
+
+    def frame(self, columns=None, rows=None):
+        """Date-indexed DataFrame of some columns and rows"""
+        columns = self.columns if columns is None else list(columns)
+        rows = slice(None) if rows is None else rows
+        index = pd.DatetimeIndex(self.dates[rows], name=DATE_COLUMN)
+        return pd.DataFrame(self.take(columns, rows), index=index, columns=columns)
+
+    def matrix(self, columns, targets=TARGET_COLUMNS):
+        """training.FeatureMatrix of the given feature and target columns"""
+        from stock_pipeline.training import FeatureMatrix
+
+        return FeatureMatrix(self.take(list(columns)), self.take(list(targets)),
+                             pd.DatetimeIndex(self.dates), columns, targets)
+
+    def rate_change_groups(self):
+        """Dates by interest rate change (see modeling.rate_change_groups), computed once"""
+        from stock_pipeline.modeling import rate_change_groups
+
+        if self._groups is None:
+            self._groups = rate_change_groups(self.dates, self.rate_category)
+        return self._groups
@@ -0,0 +1,121 @@
+"""
+Instrument encodings of the combined stock table.
+
+The onehot stage can store the index of every row in two ways:
+
+    dense        one float Index_<name> column per instrument (the layout of
+                 the notebooks), rows x instruments values
+    categorical  a single categorical 'Index' column holding a small integer
+                 code per row; memory grows with the rows only
+
+OneHotView turns the codes back into one-hot columns when they are needed:
+as a pandas sparse frame or densely for selected columns only. The build
+stage materializes just the Index_<name> columns of the dataset variants,
+on the event rows, so model fitting still sees ordinary dense features.
+"""
+import numpy as np
+import pandas as pd
+
+from stock_pipeline.windows import instrument_codes as onehot_codes
+
+ENCODINGS = ("dense", "categorical")
+INSTRUMENT_COLUMN = 'Index'
+ONEHOT_PREFIX = 'Index_'
+
+
+def onehot_columns(df):
+    """The Index_<name> columns of a table"""
+    return [col for col in df.columns if col.startswith(ONEHOT_PREFIX)]
+
+
+def instrument_codes(df):
+    """
+    Instrument code and name of every row, from either encoding.
+
+    Args:
+        df (pd.DataFrame): Table with an 'Index' column (categorical, or
+            names e.g. when read back from Excel) or Index_<name> columns
+
+    Returns:
+        tuple: (codes as np.ndarray, instrument names in code order)
+
+    Raises:
+        ValueError: If the table has neither encoding
+    """
+    if INSTRUMENT_COLUMN in df.columns:
+        column = df[INSTRUMENT_COLUMN]
+        if not isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.astype('category')
+        return column.cat.codes.to_numpy(), [str(name) for name in column.cat.categories]
+    columns = onehot_columns(df)
+    if not columns:
+        raise ValueError(f"Table has neither an '{INSTRUMENT_COLUMN}' column nor {ONEHOT_PREFIX}* columns")
+    return onehot_codes(df, columns), [col[len(ONEHOT_PREFIX):] for col in columns]
+
+
+class OneHotView:
+    """
+    One-hot columns of instrument codes, computed on demand.
+
+    Attributes:
+        codes (np.ndarray): Instrument code per row
+        categories (list): Instrument names in code order
+    """
+
+    def __init__(self, codes, categories):
+        self.codes = np.asarray(codes)
+        self.categories = list(categories)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(*instrument_codes(df))
+
+    @property
+    def columns(self):
+        return [f'{ONEHOT_PREFIX}{name}' for name in self.categories]
+
+    @property
+    def shape(self):
+        return len(self.codes), len(self.categories)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _positions(self, columns):
+        if columns is None:
+            return np.arange(len(self.categories))
+        position = {col: i for i, col in enumerate(self.columns)}
+        missing = [col for col in columns if col not in position]
+        if missing:
+            raise KeyError(f"Unknown instrument columns {missing}")
+        return np.array([position[col] for col in columns], dtype=np.intp)
+
+    def toarray(self, columns=None, dtype=np.float64):
+        """Dense one-hot matrix, optionally of the given Index_<name> columns only"""
+        positions = self._positions(columns)
+        column_of = np.full(len(self.categories), -1, dtype=np.intp)
+        column_of[positions] = np.arange(len(positions))
+        target = column_of[self.codes]
+        rows = np.flatnonzero(target >= 0)
+        out = np.zeros((len(self.codes), len(positions)), dtype=dtype)
+        out[rows, target[rows]] = 1
+        return out
+
+    def to_frame(self, index=None, columns=None, sparse=True, dtype=np.float64):
+        """
+        One-hot columns as a DataFrame.
+
+        Args:
+            index (pd.Index, optional): Row index of the frame
+            columns (list, optional): Only these Index_<name> columns
+            sparse (bool): Sparse columns (memory per row, not per value)
+            dtype: Value type
+        """
+        if not sparse or columns is not None:
+            names = self.columns if columns is None else list(columns)
+            return pd.DataFrame(self.toarray(columns, dtype), index=index, columns=names)
+        categorical = pd.Categorical.from_codes(self.codes, categories=self.categories)
+        df = pd.get_dummies(categorical, prefix=ONEHOT_PREFIX.rstrip('_'), sparse=True, dtype=dtype)
+        if index is not None:
+            df.index = index
+        return df
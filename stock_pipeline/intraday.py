@@ -0,0 +1,313 @@
+"""
+Minute bars around the ECB press releases.
+
+The market reacts within minutes of the rate decision (14:15 CET) and the
+press conference (14:45 CET), which daily closes cannot resolve. Instead
+of full-day minute history only short windows around these times are
+fetched or loaded, and the bars are kept compactly: int64 timestamps
+(nanoseconds, exchange local time), a small integer symbol code and
+float32 prices per bar. Timezone-aware bars (Yahoo Finance returns
+Europe/Berlin timestamps) are converted to exchange local time first, so
+they line up with the naive event times.
+
+`minute_offset_matrix` is the intraday counterpart of the Close_t-k /
+Close_t+k day windows: for every event and offset it takes the close of
+the last bar at or before event + offset minutes, with one searchsorted
+per symbol.
+"""
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close']
+
+# Event name -> local time of the ECB announcement
+DEFAULT_EVENT_TIMES = {"Decision": "14:15", "Press_Conference": "14:45"}
+
+# Timezone of the event times and of the stored bars
+EXCHANGE_TIMEZONE = "Europe/Berlin"
+
+
+def offset_columns(offsets, field='Close'):
+    """Column names of minute offsets (e.g. Close_m-15, Close_m+0, Close_m+5)"""
+    return [f'{field}_m{offset:+d}' for offset in offsets]
+
+
+def event_timestamps(days, event_times=DEFAULT_EVENT_TIMES):
+    """
+    Timestamps of the announcements on every press release day.
+
+    Args:
+        days (iterable): Press release days
+        event_times (dict): Event name -> 'HH:MM' local time
+
+    Returns:
+        pd.DataFrame: Date, Event and Timestamp per day and event, sorted
+        by Timestamp
+    """
+    days = pd.DatetimeIndex(days).normalize().unique()
+    frames = [pd.DataFrame({'Date': days, 'Event': name, 'Timestamp': days + pd.Timedelta(f'{time}:00')})
+              for name, time in event_times.items()]
+    return pd.concat(frames, ignore_index=True).sort_values('Timestamp', kind='stable').reset_index(drop=True)
+
+
+def event_windows(timestamps, minutes_before=60, minutes_after=120):
+    """
+    Time ranges to fetch: [event - before, event + after], overlaps merged.
+
+    Returns:
+        list: Sorted, disjoint (start, end) pd.Timestamp pairs
+    """
+    starts = pd.DatetimeIndex(timestamps).sort_values() - pd.Timedelta(minutes=minutes_before)
+    ends = pd.DatetimeIndex(timestamps).sort_values() + pd.Timedelta(minutes=minutes_after)
+    windows = []
+    for start, end in zip(starts, ends):
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def local_nanoseconds(stamps, timezone=EXCHANGE_TIMEZONE):
+    """
+    int64 nanoseconds of exchange local time.
+
+    Timezone-aware stamps are converted to `timezone` and made naive, naive
+    stamps are taken as local time already.
+    """
+    stamps = pd.DatetimeIndex(stamps)
+    if stamps.tz is not None:
+        stamps = stamps.tz_convert(timezone).tz_localize(None)
+    return stamps.as_unit('ns').asi8
+
+
+def in_windows(timestamps, windows):
+    """Boolean mask of the int64 (ns) timestamps inside any of the sorted windows"""
+    if not windows:
+        return np.zeros(len(timestamps), dtype=bool)
+    starts = np.array([start.value for start, _ in windows], dtype=np.int64)
+    ends = np.array([end.value for _, end in windows], dtype=np.int64)
+    position = np.searchsorted(starts, timestamps, side='right') - 1
+    return (position >= 0) & (timestamps <= ends[np.maximum(position, 0)])
+
+
+class MinuteBars:
+    """
+    Compact minute bars of several symbols.
+
+    Attributes:
+        timestamps (np.ndarray): int64 nanoseconds, sorted within a symbol
+        codes (np.ndarray): Symbol code per bar, sorted
+        values (np.ndarray): float32 prices, shape (bars, fields)
+        symbols (list): Symbol names in code order
+        fields (list): Price fields of `values`
+    """
+
+    def __init__(self, timestamps, codes, values, symbols, fields=('Close',)):
+        order = np.lexsort((timestamps, codes))
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)[order]
+        self.codes = np.asarray(codes, dtype=np.int16)[order]
+        self.fields = list(fields)
+        self.values = np.asarray(values, dtype=np.float32).reshape(len(order), len(self.fields))[order]
+        self.symbols = list(symbols)
+        self._bounds = np.searchsorted(self.codes, np.arange(len(self.symbols) + 1))
+
+    @classmethod
+    def from_frames(cls, frames, fields=('Close',), windows=None, timezone=EXCHANGE_TIMEZONE):
+        """
+        Bars of provider frames (symbol -> time-indexed OHLC frame).
+
+        Args:
+            frames (dict): Symbol -> DataFrame as returned by a provider
+            fields (tuple): Price columns to keep
+            windows (list, optional): Keep only bars inside these windows
+            timezone (str): Exchange timezone timezone-aware indexes are
+                converted to (see local_nanoseconds)
+        """
+        parts = []
+        for symbol, df in frames.items():
+            stamps = local_nanoseconds(df.index, timezone)
+            keep = in_windows(stamps, windows) if windows is not None else np.ones(len(stamps), dtype=bool)
+            parts.append(cls(stamps[keep], np.zeros(keep.sum(), dtype=np.int16),
+                             df[list(fields)].to_numpy(dtype=np.float32)[keep], [symbol], fields))
+        return cls.combine(parts, fields)
+
+    @classmethod
+    def from_frame(cls, df, timezone=EXCHANGE_TIMEZONE):
+        """Bars of a table written by `to_frame`"""
+        symbols = df['Symbol'].astype('category')
+        fields = [col for col in df.columns if col not in ('Timestamp', 'Symbol')]
+        if pd.api.types.is_datetime64_any_dtype(df['Timestamp']):
+            timestamps = local_nanoseconds(df['Timestamp'], timezone)
+        else:
+            timestamps = df['Timestamp'].to_numpy()
+        return cls(timestamps, symbols.cat.codes.to_numpy(), df[fields].to_numpy(dtype=np.float32),
+                   [str(name) for name in symbols.cat.categories], fields)
+
+    def to_frame(self):
+        """Table with int64 'Timestamp', categorical 'Symbol' and float32 fields"""
+        df = pd.DataFrame({'Timestamp': self.timestamps,
+                           'Symbol': pd.Categorical.from_codes(self.codes, categories=self.symbols)})
+        for i, field in enumerate(self.fields):
+            df[field] = self.values[:, i]
+        return df
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.codes.nbytes + self.values.nbytes
+
+    def series(self, symbol, field='Close'):
+        """(timestamps, values) of one symbol and field"""
+        code = self.symbols.index(symbol)
+        rows = slice(self._bounds[code], self._bounds[code + 1])
+        return self.timestamps[rows], self.values[rows, self.fields.index(field)]
+
+    def days(self, symbol):
+        """Days with bars of a symbol"""
+        timestamps, _ = self.series(symbol, self.fields[0])
+        return pd.DatetimeIndex(np.unique(timestamps - timestamps % (86400 * 10 ** 9)))
+
+    @classmethod
+    def combine(cls, parts, fields=('Close',)):
+        """
+        Bars of several parts in one pass (e.g. one per window or symbol).
+
+        Parts must not share bars; use `concat` to overwrite bars instead.
+        """
+        if not parts:
+            return cls(np.empty(0, np.int64), np.empty(0, np.int16), np.empty((0, len(fields))), [], fields)
+        symbols = list(dict.fromkeys(symbol for part in parts for symbol in part.symbols))
+        position = {symbol: code for code, symbol in enumerate(symbols)}
+        codes = [np.array([position[s] for s in part.symbols], dtype=np.int16)[part.codes]
+                 if len(part) else part.codes for part in parts]
+        return cls(np.concatenate([part.timestamps for part in parts]), np.concatenate(codes),
+                   np.concatenate([part.values for part in parts]), symbols, parts[0].fields)
+
+    def concat(self, other):
+        """Bars of both, `other` winning on equal symbol and timestamp"""
+        symbols = self.symbols + [symbol for symbol in other.symbols if symbol not in self.symbols]
+        if other.fields != self.fields:
+            raise ValueError(f"Fields differ: {self.fields} vs {other.fields}")
+        remap = np.array([symbols.index(symbol) for symbol in other.symbols], dtype=np.int16)
+        timestamps = np.concatenate([other.timestamps, self.timestamps])
+        codes = np.concatenate([remap[other.codes] if len(other) else other.codes, self.codes])
+        values = np.concatenate([other.values, self.values])
+        _, first = np.unique(np.stack([codes.astype(np.int64), timestamps]), axis=1, return_index=True)
+        return MinuteBars(timestamps[first], codes[first], values[first], symbols, self.fields)
+
+
+def load_minute_bars(path, windows, symbols=None, fields=('Close',), time_column='Timestamp',
+                     symbol_column='Symbol', chunksize=1_000_000, timezone=EXCHANGE_TIMEZONE):
+    """
+    Bars of a local minute file, reading only what falls into the windows.
+
+    Parquet files are filtered while reading (row groups outside the
+    windows are skipped); CSV files are read in chunks of `chunksize` rows,
+    so neither is held in memory as a whole.
+
+    Args:
+        path (str): .parquet or .csv file with time, symbol and price columns
+        windows (list): (start, end) pairs from `event_windows`
+        symbols (list, optional): Only these symbols
+        fields (tuple): Price columns to keep
+        timezone (str): Exchange timezone of the windows; CSV times with a
+            UTC offset are converted to it
+
+    Returns:
+        MinuteBars: The bars inside the windows
+    """
+    columns = [time_column, symbol_column] + list(fields)
+    frames = []
+    if path.endswith('.parquet'):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(path, format='parquet')
+        time_type = dataset.schema.field(time_column).type
+
+        def bound(ts):
+            if str(time_type) == 'int64':
+                return ts.value
+            if getattr(time_type, 'tz', None):
+                return ts.tz_localize(timezone)
+            return ts.to_datetime64()
+
+        condition = None
+        for start, end in windows:
+            part = (ds.field(time_column) >= bound(start)) & (ds.field(time_column) <= bound(end))
+            condition = part if condition is None else condition | part
+        if symbols is not None:
+            condition = ds.field(symbol_column).isin(list(symbols)) & condition
+        frames.append(dataset.to_table(columns=columns, filter=condition).to_pandas())
+    else:
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+            stamps = local_nanoseconds(pd.to_datetime(chunk[time_column]), timezone)
+            keep = in_windows(stamps, windows)
+            if symbols is not None:
+                keep &= chunk[symbol_column].isin(list(symbols)).to_numpy()
+            frames.append(chunk.loc[keep].assign(**{time_column: stamps[keep]}))
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    df = df.rename(columns={time_column: 'Timestamp', symbol_column: 'Symbol'})
+    df['Symbol'] = df['Symbol'].astype(str)
+    return MinuteBars.from_frame(df[['Timestamp', 'Symbol'] + list(fields)], timezone)
+
+
+def minute_offset_matrix(bars, symbol, timestamps, offsets, field='Close', tolerance='5min'):
+    """
+    Prices at minute offsets around events of one symbol.
+
+    Args:
+        bars (MinuteBars): Bars of the symbol
+        symbol (str): Symbol name in `bars`
+        timestamps (np.ndarray): Event times as datetime64 or int64 ns
+        offsets (list): Minutes relative to the event (negative = before)
+        field (str): Price field
+        tolerance (str): Oldest bar accepted for an offset
+
+    Returns:
+        np.ndarray: float32, shape (events, offsets); the value of the last
+        bar at or before event + offset, NaN if none within tolerance
+    """
+    bar_times, values = bars.series(symbol, field)
+    events = pd.DatetimeIndex(timestamps).as_unit('ns').asi8
+    targets = events[:, None] + np.asarray(offsets, dtype=np.int64)[None, :] * 60 * 10 ** 9
+    position = np.searchsorted(bar_times, targets, side='right') - 1
+    found = position >= 0
+    position = np.maximum(position, 0)
+    if len(bar_times):
+        found &= targets - bar_times[position] <= pd.Timedelta(tolerance).value
+        return np.where(found, values[position], np.float32(np.nan)).astype(np.float32)
+    return np.full(targets.shape, np.nan, dtype=np.float32)
+
+
+def build_intraday_events(bars, events, offsets, names=None, field='Close', tolerance='5min'):
+    """
+    Minute-offset features of every event and symbol.
+
+    Args:
+        bars (MinuteBars): Bars around the events
+        events (pd.DataFrame): Date, Event and Timestamp (event_timestamps)
+        offsets (list): Minutes relative to the event
+        names (dict, optional): Symbol -> display name for the 'Index' column
+        field (str): Price field
+        tolerance (str): See minute_offset_matrix
+
+    Returns:
+        pd.DataFrame: One row per event and symbol with Date, Event,
+        Timestamp, categorical Index and float32 '<field>_m<offset>' columns
+    """
+    names = names or {}
+    labels = [names.get(symbol, symbol) for symbol in bars.symbols]
+    frames = []
+    for code, symbol in enumerate(bars.symbols):
+        matrix = minute_offset_matrix(bars, symbol, events['Timestamp'], offsets, field, tolerance)
+        df = events[['Date', 'Event', 'Timestamp']].reset_index(drop=True)
+        df['Index'] = pd.Categorical.from_codes(np.full(len(df), code), categories=labels)
+        frames.append(pd.concat([df, pd.DataFrame(matrix, columns=offset_columns(offsets, field))], axis=1))
+    if not frames:
+        return pd.DataFrame(columns=['Date', 'Event', 'Timestamp', 'Index'] + offset_columns(offsets, field))
+    return pd.concat(frames, ignore_index=True).sort_values(['Timestamp', 'Index'], kind='stable',
+                                                           ignore_index=True)
@@ -0,0 +1,233 @@
+"""
+Market data providers and the local bar cache used by the downloader.
+
+A provider is any object with two methods:
+
+    history(symbol, start, end, interval) -> date-indexed OHLCV DataFrame
+    currency(symbol) -> currency code (e.g. 'EUR')
+
+`history` and `currency` may additionally accept a `timeout` keyword
+(seconds per request); it is only passed when a timeout is configured.
+
+`YFinanceProvider` talks to Yahoo Finance; tests and offline runs can pass
+any object with the same methods instead.
+
+`BarCache` keeps one Parquet file per (symbol, interval) plus a small JSON
+file with the high-water mark (last cached bar) of each series and the
+currency of each symbol, so reruns only fetch the missing tail.
+"""
+import json
+import os
+import re
+import threading
+
+import pandas as pd
+
+from stock_pipeline import storage
+
+
+class YFinanceProvider:
+    """Fetch bars and metadata from Yahoo Finance"""
+
+    def history(self, symbol, start, end, interval='1d', timeout=10):
+        """Download bars for [start, end) with a timezone-naive index"""
+        import yfinance as yf
+
+        df = yf.Ticker(symbol).history(start=start, end=end, interval=interval, timeout=timeout)
+        if not df.empty:
+            df.index = df.index.tz_localize(None)
+        return df
+
+    def currency(self, symbol, timeout=10):
+        """
+        Currency the symbol is quoted in, defaults to EUR.
+
+        Read from the metadata of a short history request: `Ticker.info`
+        takes no timeout and can hang a download worker.
+        """
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        ticker.history(period='5d', timeout=timeout)
+        return (ticker.history_metadata or {}).get('currency') or 'EUR'
+
+
+class BarCache:
+    """
+    Local per-symbol bar cache with a high-water mark per series.
+
+    Safe to share between download threads: every series has its own file
+    and metadata updates are serialised.
+
+    Args:
+        cache_dir (str): Folder for the cached bars and metadata
+        storage_format (str): Storage format of the cached bars
+    """
+
+    METADATA_FILE = "metadata.json"
+
+    def __init__(self, cache_dir, storage_format='parquet'):
+        self.cache_dir = cache_dir
+        self.storage_format = storage_format
+        os.makedirs(cache_dir, exist_ok=True)
+        self._metadata_path = os.path.join(cache_dir, self.METADATA_FILE)
+        self._metadata = self._load_metadata()
+        self._lock = threading.Lock()
+
+    def _load_metadata(self):
+        if os.path.exists(self._metadata_path):
+            with open(self._metadata_path, encoding='utf-8') as f:
+                return json.load(f)
+        return {"bars": {}, "currency": {}}
+
+    def _save_metadata(self):
+        # Caller holds self._lock
+        tmp_path = f"{self._metadata_path}.tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump(self._metadata, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._metadata_path)
+
+    @staticmethod
+    def _key(symbol, interval):
+        return f"{symbol}|{interval}"
+
+    @staticmethod
+    def _table_name(symbol, interval):
+        safe_symbol = re.sub(r'[^A-Za-z0-9.-]', '_', symbol)
+        return f"{safe_symbol}_{interval}"
+
+    def high_water_mark(self, symbol, interval):
+        """Timestamp of the last cached bar, None if nothing is cached"""
+        entry = self._metadata["bars"].get(self._key(symbol, interval))
+        return pd.Timestamp(entry["high_water_mark"]) if entry else None
+
+    def load(self, symbol, interval):
+        """Cached bars of a series, None if nothing is cached"""
+        if self._key(symbol, interval) not in self._metadata["bars"]:
+            return None
+        try:
+            return storage.read_table(self.cache_dir, self._table_name(symbol, interval),
+                                      fmt=self.storage_format, index_col='Date')
+        except FileNotFoundError:
+            return None
+
+    def merge(self, symbol, interval, new_bars, fetched_from):
+        """
+        Merge freshly fetched bars into the cache.
+
+        Newer rows replace cached rows with the same timestamp, so a partial
+        last bar from the previous run gets refreshed.
+
+        Args:
+            symbol (str): Ticker symbol
+            interval (str): Bar interval
+            new_bars (pd.DataFrame): Bars returned by the provider
+            fetched_from (pd.Timestamp): Start of the requested range, so a
+                range without trading days at its start is not refetched
+
+        Returns:
+            pd.DataFrame: The complete cached series after the merge
+        """
+        cached = self.load(symbol, interval)
+        new_bars = new_bars.rename_axis('Date')
+        if cached is None or cached.empty:
+            merged = new_bars
+        elif new_bars.empty:
+            merged = cached
+        else:
+            merged = pd.concat([cached, new_bars])
+            merged = merged[~merged.index.duplicated(keep='last')]
+        merged = merged.sort_index()
+        if merged.empty:
+            return merged
+
+        storage.write_table(merged, self.cache_dir, self._table_name(symbol, interval),
+                            fmt=self.storage_format, index=True)
+        with self._lock:
+            covered_from = self.covered_from(symbol, interval)
+            if covered_from is None or fetched_from < covered_from:
+                covered_from = fetched_from
+            self._metadata["bars"][self._key(symbol, interval)] = {
+                "high_water_mark": merged.index.max().isoformat(),
+                "covered_from": covered_from.isoformat(),
+                "rows": int(len(merged)),
+            }
+            self._save_metadata()
+        return merged
+
+    def covered_from(self, symbol, interval):
+        """Earliest requested start the cache covers, None if nothing is cached"""
+        entry = self._metadata["bars"].get(self._key(symbol, interval))
+        return pd.Timestamp(entry["covered_from"]) if entry else None
+
+    def currency(self, symbol):
+        """Cached currency of a symbol, None if unknown"""
+        return self._metadata["currency"].get(symbol)
+
+    def set_currency(self, symbol, currency):
+        """Remember the currency of a symbol"""
+        with self._lock:
+            self._metadata["currency"][symbol] = currency
+            self._save_metadata()
+
+
+def fetch_with_cache(provider, cache, symbol, start, end, interval='1d', timeout=None):
+    """
+    Return bars for [start, end), fetching only what the cache is missing.
+
+    If the cache already covers `start`, only the tail from the high-water
+    mark onwards is requested (the last cached bar is fetched again because
+    it may have been incomplete). Otherwise the full range is fetched; a
+    range that ends before the cached bars is extended to the high-water
+    mark, so the cached series stays free of gaps.
+
+    Args:
+        provider: Object with a `history(symbol, start, end, interval)` method
+        cache (BarCache): Bar cache, or None to always fetch the full range
+        symbol (str): Ticker symbol
+        start (str): Start date 'YYYY-MM-DD'
+        end (str): End date 'YYYY-MM-DD' (exclusive)
+        interval (str): Bar interval
+        timeout (float, optional): Per-request timeout handed to the provider
+
+    Returns:
+        pd.DataFrame: Bars within [start, end)
+    """
+    kwargs = {'timeout': timeout} if timeout is not None else {}
+    if cache is None:
+        return provider.history(symbol, start, end, interval, **kwargs)
+
+    start_ts, end_ts = pd.Timestamp(start), pd.Timestamp(end)
+    covered_from = cache.covered_from(symbol, interval)
+    high_water_mark = cache.high_water_mark(symbol, interval)
+
+    fetch_end = end
+    if covered_from is None or start_ts < covered_from:
+        fetch_start = start_ts
+        if covered_from is not None and end_ts < covered_from:
+            # Fetch up to the cached bars, otherwise covered_from would move over a gap
+            fetch_end = (high_water_mark.normalize() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    else:
+        fetch_start = high_water_mark.normalize()
+
+    if fetch_start < end_ts:
+        new_bars = provider.history(symbol, fetch_start.strftime('%Y-%m-%d'), fetch_end, interval, **kwargs)
+        bars = cache.merge(symbol, interval, new_bars, fetch_start)
+    else:
+        bars = cache.load(symbol, interval)
+
+    if bars is None or bars.empty:
+        return pd.DataFrame()
+    return bars.loc[(bars.index >= start_ts) & (bars.index < end_ts)]
+
+
+def currency_with_cache(provider, cache, symbol, timeout=None):
+    """Currency of a symbol, asking the provider (with `timeout`, if given) only on a cache miss"""
+    kwargs = {'timeout': timeout} if timeout is not None else {}
+    if cache is None:
+        return provider.currency(symbol, **kwargs)
+    currency = cache.currency(symbol)
+    if currency is None:
+        currency = provider.currency(symbol, **kwargs)
+        cache.set_currency(symbol, currency)
+    return currency
@@ -0,0 +1,347 @@
+"""
+Structured metrics of stage and item runs.
+
+A stage run (download, extract, ...) and every item inside it (a symbol, a
+PDF, a dataset variant) is measured as a span:
+
+    wall_s, cpu_s        wall and CPU time (CPU of the whole process, plus
+                         children_cpu_s of finished worker processes)
+    max_rss_bytes        peak resident set size of the process so far
+                         (None where neither `resource` nor psutil is available)
+    rows_in/out,         counted by the storage layer for every table read
+    bytes_in/out         or written while the span is active
+    status, error        'ok' or 'error' with type, message and traceback
+
+Spans are only recorded while a MetricsRecorder is active (see
+`recording`); otherwise `stage`, `item` and `count` cost one lookup.
+Records are appended as JSON lines as they finish and can be written as a
+Prometheus text file (node_exporter textfile collector format) at the end.
+
+`stage(..., profile='cprofile')` additionally profiles the stage and writes
+<stage>.prof to the profile folder (or <stage>.txt for pyinstrument).
+"""
+import contextlib
+import contextvars
+import json
+import os
+import platform
+import threading
+import time
+import traceback
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+_recorder = None
+_current_span = contextvars.ContextVar("stock_pipeline_span", default=None)
+
+COUNTERS = ("rows_in", "rows_out", "bytes_in", "bytes_out")
+
+
+def max_rss_bytes():
+    """Peak resident set size of this process so far, None if it cannot be measured"""
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if platform.system() == "Darwin" else rss * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    # peak_wset is the peak working set on Windows
+    return getattr(memory, "peak_wset", memory.rss)
+
+
+def _children_cpu():
+    """CPU time of finished child processes, None if it cannot be measured"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def error_details(exc):
+    """Type, message and traceback of an exception as a dict"""
+    return {"type": type(exc).__name__, "message": str(exc),
+            "traceback": "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))}
+
+
+class Span:
+    """Measurement of one stage or item while it runs"""
+
+    def __init__(self, kind, name, stage=None, item_type=None, parent=None):
+        self.kind = kind
+        self.name = name
+        self.stage = stage
+        self.item_type = item_type
+        self.parent = parent
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.extra = {}
+        self._start = datetime.now().isoformat(timespec="milliseconds")
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._children_cpu = _children_cpu()
+
+    def finish(self, error=None):
+        """The span as a record"""
+        children_cpu = _children_cpu()
+        record = {
+            "kind": self.kind,
+            "stage": self.stage,
+            "item_type": self.item_type,
+            "item": self.name if self.kind == "item" else None,
+            "started": self._start,
+            "wall_s": time.perf_counter() - self._wall,
+            "cpu_s": time.process_time() - self._cpu,
+            "children_cpu_s": (children_cpu - self._children_cpu
+                               if children_cpu is not None else None),
+            "max_rss_bytes": max_rss_bytes(),
+            **self.counters,
+            "status": "ok" if error is None else "error",
+            "error": error,
+        }
+        record.update(self.extra)
+        return record
+
+
+class MetricsRecorder:
+    """
+    Collects span records and writes them as JSON lines and Prometheus text.
+
+    Args:
+        jsonl_path (str, optional): File the records are appended to
+        prometheus_path (str, optional): Text file written by `close`
+    """
+
+    def __init__(self, jsonl_path=None, prometheus_path=None):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.records = []
+        self.lock = threading.Lock()
+        self.run_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+        if jsonl_path:
+            os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+
+    def emit(self, record):
+        record = {"run_id": self.run_id, **record}
+        with self.lock:
+            self.records.append(record)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+
+    def close(self):
+        if self.prometheus_path:
+            write_prometheus(self.records, self.prometheus_path)
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items() if value is not None)
+
+
+def prometheus_text(records):
+    """
+    Records in the Prometheus text exposition format.
+
+    Stage and item spans become gauges labelled by stage (and item type and
+    item); errors are counted per stage and item type. Values that could
+    not be measured (None) are left out.
+    """
+    metrics = {
+        "wall_seconds": ("wall_s", "Wall time of the last run"),
+        "cpu_seconds": ("cpu_s", "CPU time of the process during the last run"),
+        "children_cpu_seconds": ("children_cpu_s", "CPU time of finished worker processes"),
+        "max_rss_bytes": ("max_rss_bytes", "Peak resident set size of the process"),
+        "rows_in": ("rows_in", "Rows read"),
+        "rows_out": ("rows_out", "Rows written"),
+        "bytes_in": ("bytes_in", "Bytes read"),
+        "bytes_out": ("bytes_out", "Bytes written"),
+    }
+    latest = {}
+    errors = {}
+    for record in records:
+        key = (record["kind"], record["stage"], record["item_type"], record["item"])
+        latest[key] = record
+        if record["status"] == "error":
+            error_key = (record["stage"], record["item_type"] or "stage")
+            errors[error_key] = errors.get(error_key, 0) + 1
+
+    lines = []
+    for kind in ("stage", "item"):
+        for metric, (field, help_text) in metrics.items():
+            name = f"stock_pipeline_{kind}_{metric}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for (record_kind, stage, item_type, item), record in latest.items():
+                if record_kind == kind and record.get(field) is not None:
+                    labels = _labels(stage=stage, type=item_type, item=item, status=record["status"])
+                    lines.append(f"{name}{{{labels}}} {record[field]}")
+    lines += ["# HELP stock_pipeline_errors_total Failed stages and items",
+              "# TYPE stock_pipeline_errors_total counter"]
+    for (stage, item_type), count in errors.items():
+        lines.append(f"stock_pipeline_errors_total{{{_labels(stage=stage, type=item_type)}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(records, path):
+    """Write the Prometheus text file atomically (as the textfile collector expects)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(records))
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def recording(jsonl_path=None, prometheus_path=None):
+    """Activate a MetricsRecorder for the duration of the block"""
+    global _recorder
+    recorder = MetricsRecorder(jsonl_path, prometheus_path)
+    previous, _recorder = _recorder, recorder
+    try:
+        yield recorder
+    finally:
+        _recorder = previous
+        recorder.close()
+
+
+def active():
+    """True while a recorder is active"""
+    return _recorder is not None
+
+
+@contextlib.contextmanager
+def _span(kind, name, stage=None, item_type=None):
+    recorder = _recorder
+    if recorder is None:
+        yield None
+        return
+    parent = _current_span.get()
+    if stage is None and parent is not None:
+        stage = parent.stage
+    span = Span(kind, name, stage, item_type, parent)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        _current_span.reset(token)
+        recorder.emit(span.finish(error_details(e)))
+        raise
+    _current_span.reset(token)
+    recorder.emit(span.finish())
+
+
+@contextlib.contextmanager
+def _profiled(name, profile, profile_dir):
+    if profile is None:
+        yield None
+        return
+    if profile not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profile}'. Choose one of {list(PROFILERS)}")
+    os.makedirs(profile_dir, exist_ok=True)
+    if profile == "cprofile":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        path = os.path.join(profile_dir, f"{name}.prof")
+        profiler.enable()
+        try:
+            yield path
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            print(f"Profile written to {path} (python -m pstats {path})")
+    else:
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ValueError("pyinstrument is not installed (pip install pyinstrument)")
+        profiler = Profiler()
+        path = os.path.join(profile_dir, f"{name}.txt")
+        profiler.start()
+        try:
+            yield path
+        finally:
+            profiler.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_text(unicode=True))
+            print(f"Profile written to {path}")
+
+
+@contextlib.contextmanager
+def stage(name, profile=None, profile_dir="profiles"):
+    """
+    Measure a stage run, optionally under a profiler.
+
+    Args:
+        name (str): Stage name
+        profile (str, optional): 'cprofile' or 'pyinstrument'
+        profile_dir (str): Folder of the profile files
+    """
+    with _span("stage", name, stage=name) as span:
+        with _profiled(name, profile, profile_dir) as path:
+            if span is not None and path is not None:
+                span.extra["profile"] = path
+            yield span
+
+
+def item(item_type, name):
+    """Measure one item (symbol, PDF, variant) of the current stage"""
+    return _span("item", str(name), item_type=item_type)
+
+
+def count(**counters):
+    """Add rows/bytes to the current span and the spans around it"""
+    span = _current_span.get()
+    if span is None:
+        return
+    with _recorder.lock:
+        while span is not None:
+            for key, value in counters.items():
+                span.counters[key] += int(value)
+            span = span.parent
+
+
+def record_item(item_type, name, wall_s, cpu_s=None, error=None, **counters):
+    """
+    Record an item measured elsewhere, e.g. in a worker process.
+
+    Args:
+        item_type (str): e.g. 'pdf'
+        name (str): Item name
+        wall_s (float): Wall time of the item
+        cpu_s (float, optional): CPU time of the item
+        error (dict, optional): error_details() of a failure
+        **counters: rows_in, rows_out, bytes_in, bytes_out
+    """
+    recorder = _recorder
+    if recorder is None:
+        return
+    parent = _current_span.get()
+    record = {
+        "kind": "item", "stage": parent.stage if parent else None, "item_type": item_type,
+        "item": str(name), "started": None, "wall_s": wall_s, "cpu_s": cpu_s,
+        "children_cpu_s": 0.0 if resource is not None else None, "max_rss_bytes": max_rss_bytes(),
+        **dict.fromkeys(COUNTERS, 0), **counters,
+        "status": "ok" if error is None else "error", "error": error,
+    }
+    if parent is not None:
+        count(**counters)
+    recorder.emit(record)
+
+
+def record_error(item_type, name, exc):
+    """Record a failed item whose exception is handled by the caller"""
+    record_item(item_type, name, 0.0, error=error_details(exc))
+
+
+def copy_context():
+    """Context to run pool tasks in, so their spans belong to the current stage"""
+    return contextvars.copy_context()
@@ -0,0 +1,141 @@
+"""
+Model settings and helpers shared by training, tuning and serving.
+
+TARGET_PARAMS are the tuned Bayesian Ridge parameters per target from the
+hyperparameter notebook; `balanced_test_dates` reproduces the train/test
+split of the training notebook.
+"""
+import numpy as np
+import pandas as pd
+
+TARGET_PARAMS = {
+    'Close': {
+        'n_iter': 1,
+        'tol': 1e-07,
+        'alpha_1': 1e-06,
+        'alpha_2': 1e-05,
+        'lambda_1': 1e-05,
+        'lambda_2': 1e-06,
+        'alpha_init': 0.1,
+        'lambda_init': None,
+        'fit_intercept': False
+    },
+    'Close_t+1': {
+        'n_iter': 1,
+        'tol': 1e-07,
+        'alpha_1': 1e-05,
+        'alpha_2': 1e-06,
+        'lambda_1': 1e-06,
+        'lambda_2': 1e-05,
+        'alpha_init': 1.0,
+        'lambda_init': 0.01,
+        'fit_intercept': False
+    },
+    'Close_t+2': {
+        'n_iter': 1,
+        'tol': 1e-07,
+        'alpha_1': 1e-06,
+        'alpha_2': 1e-05,
+        'lambda_1': 1e-05,
+        'lambda_2': 1e-06,
+        'alpha_init': 0.01,
+        'lambda_init': None,
+        'fit_intercept': False
+    }
+}
+
+
+def mse(y_true, y_pred):
+    return float(np.mean((y_true - y_pred) ** 2))
+
+
+def r2(y_true, y_pred):
+    ss_res = np.sum((y_true - y_pred) ** 2)
+    ss_tot = np.sum((y_true - np.mean(y_true)) ** 2)
+    return float(1 - ss_res / ss_tot) if ss_tot > 0 else 0.0
+
+
+def bayesian_ridge(params):
+    """
+    BayesianRidge with notebook parameters.
+
+    Newer scikit-learn versions renamed `n_iter` to `max_iter`; the notebook
+    name is translated when the installed version no longer knows it.
+    """
+    from sklearn.linear_model import BayesianRidge
+
+    params = dict(params)
+    if 'n_iter' in params and 'n_iter' not in BayesianRidge().get_params():
+        params['max_iter'] = params.pop('n_iter')
+    return BayesianRidge(**params)
+
+
+def rate_change_groups(dates, change):
+    """
+    Dates with an unchanged, raised and lowered interest rate.
+
+    Args:
+        dates (iterable): Date of every row
+        change (iterable): Interest rate change (or its sign) of every row
+
+    Returns:
+        dict: 'dates' (unique normalized dates in order of appearance) and
+        the lists 'zero', 'positive' and 'negative' of dates with at least
+        one such row
+    """
+    codes, unique_dates = pd.factorize(pd.DatetimeIndex(dates).normalize())
+    change = np.asarray(change, dtype=np.float64)
+
+    def dates_with(mask):
+        return list(unique_dates[np.bincount(codes, weights=mask, minlength=len(unique_dates)) > 0])
+
+    return {'dates': unique_dates, 'zero': dates_with(change == 0.00),
+            'positive': dates_with(change > 0.00), 'negative': dates_with(change < 0.00)}
+
+
+def choose_test_dates(groups, test_size=15, random_state=33):
+    """
+    Choose test dates like the training notebook.
+
+    One date each with an unchanged, raised and lowered interest rate, the
+    rest at random. `test_size` counts rows (three indices per date).
+
+    Args:
+        groups (dict): rate_change_groups of the dataset
+        test_size (int): Number of test rows
+        random_state (int): Seed of the legacy NumPy generator
+
+    Returns:
+        list: Selected dates (normalized timestamps)
+    """
+    rng = np.random.RandomState(random_state)
+    n_dates = test_size // 3
+
+    selected_dates = [rng.choice(groups['zero']), rng.choice(groups['positive']), rng.choice(groups['negative'])]
+
+    remaining = [d for d in groups['dates'] if d not in selected_dates]
+    if n_dates > 3:
+        selected_dates.extend(rng.choice(remaining, size=n_dates - 3, replace=False))
+    return [pd.Timestamp(d) for d in selected_dates]
+
+
+def balanced_test_dates(df, test_size=15, random_state=33, rate_column='Interest Rate_Change'):
+    """
+    Choose test dates like the training notebook (see choose_test_dates).
+
+    Args:
+        df (pd.DataFrame): Date-indexed dataset
+        test_size (int): Number of test rows
+        random_state (int): Seed of the legacy NumPy generator
+        rate_column (str): Column with the interest rate change
+
+    Returns:
+        list: Selected dates (normalized timestamps)
+    """
+    return choose_test_dates(rate_change_groups(df.index, df[rate_column]), test_size, random_state)
+
+
+def split_by_dates(df, test_dates):
+    """Train and test rows of a date-indexed table"""
+    test_mask = df.index.normalize().isin(test_dates)
+    return df.loc[~test_mask], df.loc[test_mask]
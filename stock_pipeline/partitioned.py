@@ -0,0 +1,169 @@
+"""
+Out-of-core event windows, one partition of the stock table at a time.
+
+The in-memory build loads the whole stock table. For long histories of
+many instruments the table is instead read in partitions with filtered
+scans of the stored file (see storage.scan_table):
+
+    year        one calendar year of all instruments at a time. Windows
+                near the boundaries need rows of the neighbouring years, so
+                the last n_lags rows per instrument of everything before
+                and the first n_leads rows per instrument of the next year
+                (the halo) are added to the partition. Output stays
+                sorted by date as in the in-memory build.
+    instrument  the full history of one instrument at a time. Windows
+                never cross instruments, so no halo is needed; the output
+                is ordered by instrument, then date. `sort_by_date` copies
+                such a table in date order one year at a time, which is
+                how the build stage orders its outputs.
+
+Peak memory is about two partitions plus the halo, independent of how
+many partitions the table has. Leads that would reach beyond the next
+partition (an instrument with fewer than n_leads rows in a year) are NaN.
+"""
+import numpy as np
+import pandas as pd
+
+from stock_pipeline import storage
+from stock_pipeline.instruments import INSTRUMENT_COLUMN, ONEHOT_PREFIX
+from stock_pipeline.windows import build_event_windows
+
+PARTITIONS = ("year", "instrument")
+
+
+def table_instruments(folder, name, fmt="parquet"):
+    """Instrument names of a stored stock table, from its schema or its 'Index' column"""
+    columns = storage.table_columns(folder, name, fmt)
+    if INSTRUMENT_COLUMN in columns:
+        return [str(value) for value in storage.column_values(folder, name, INSTRUMENT_COLUMN, fmt)]
+    return [col[len(ONEHOT_PREFIX):] for col in columns if col.startswith(ONEHOT_PREFIX)]
+
+
+def row_instruments(df):
+    """Instrument name of every row, from either encoding"""
+    if INSTRUMENT_COLUMN in df.columns:
+        return df[INSTRUMENT_COLUMN].astype(str).to_numpy()
+    columns = [col for col in df.columns if col.startswith(ONEHOT_PREFIX)]
+    names = np.array([col[len(ONEHOT_PREFIX):] for col in columns], dtype=object)
+    return names[df[columns].to_numpy(dtype=float).argmax(axis=1)]
+
+
+def stock_partitions(folder, name, by="year", fmt="parquet", date_column="Date"):
+    """
+    Read a stored stock table partition by partition.
+
+    Args:
+        folder (str): Folder of the stock table
+        name (str): Table name without extension
+        by (str): 'year' or 'instrument'
+        fmt (str): Storage format
+        date_column (str): Date column, becomes the index
+
+    Yields:
+        tuple: (partition label, date-indexed DataFrame sorted by date)
+    """
+    if by not in PARTITIONS:
+        raise ValueError(f"Unknown partitioning '{by}'. Choose one of {list(PARTITIONS)}")
+
+    def scan(where):
+        df = storage.scan_table(folder, name, fmt, where=where, date_columns=[date_column])
+        return df.sort_values(date_column, kind='stable').set_index(date_column)
+
+    if by == "year":
+        dates = storage.column_values(folder, name, date_column, fmt)
+        years = sorted({pd.Timestamp(date).year for date in dates})
+        for year in years:
+            yield year, scan([(date_column, '>=', pd.Timestamp(year, 1, 1)),
+                              (date_column, '<', pd.Timestamp(year + 1, 1, 1))])
+        return
+
+    columns = storage.table_columns(folder, name, fmt)
+    for instrument in table_instruments(folder, name, fmt):
+        if INSTRUMENT_COLUMN in columns:
+            where = [(INSTRUMENT_COLUMN, '==', instrument)]
+        else:
+            where = [(f'{ONEHOT_PREFIX}{instrument}', '==', 1)]
+        yield instrument, scan(where)
+
+
+def sort_by_date(folder, name, target, fmt="parquet", date_column="Date"):
+    """
+    Copy a stored table sorted by date, reading one year of rows at a time.
+
+    The sort is stable, so rows of the same date keep their stored order
+    (e.g. the instrument order of instrument partitions).
+
+    Args:
+        folder (str): Folder of both tables
+        name (str): Table to sort, without extension
+        target (str): Name of the sorted copy
+        fmt (str): Columnar storage format
+        date_column (str): Date column to sort by
+
+    Returns:
+        str: Path of the sorted table
+    """
+    dates = storage.column_values(folder, name, date_column, fmt)
+    years = sorted({pd.Timestamp(date).year for date in dates})
+    with storage.TableWriter(folder, target, fmt) as writer:
+        for year in years:
+            df = storage.scan_table(folder, name, fmt, where=[(date_column, '>=', pd.Timestamp(year, 1, 1)),
+                                                            (date_column, '<', pd.Timestamp(year + 1, 1, 1))])
+            writer.write(df.sort_values(date_column, kind='stable'))
+    return writer.path
+
+
+def _head(df, instruments, n):
+    return df.groupby(instruments, sort=False).head(n) if n else df.iloc[:0]
+
+
+def _tail(df, instruments, n):
+    return df.groupby(instruments, sort=False).tail(n) if n else df.iloc[:0]
+
+
+def partitioned_event_windows(partitions, event_dates, instruments, n_lags=14, n_leads=3,
+                              value_col='Close', halo=True):
+    """
+    Event windows of every partition.
+
+    Args:
+        partitions (iterable): (label, date-indexed DataFrame) pairs, e.g.
+            from stock_partitions; with `halo` they must be consecutive
+            date ranges
+        event_dates (iterable): Dates to build windows for
+        instruments (list): All instrument names (gives the group codes)
+        n_lags, n_leads, value_col: See windows.build_event_windows
+        halo (bool): Carry lag/lead rows across partition boundaries
+            (year partitions); False for instrument partitions
+
+    Yields:
+        tuple: (partition label, event windows of the partition)
+    """
+    event_dates = pd.DatetimeIndex(event_dates)
+    code_of = {name: code for code, name in enumerate(instruments)}
+
+    def windows(block, part):
+        codes = np.array([code_of[name] for name in row_instruments(block)], dtype=np.intp)
+        dates = event_dates[event_dates.isin(part.index)]
+        return build_event_windows(block, dates, n_lags, n_leads, value_col, group_codes=codes)
+
+    if not halo:
+        for label, part in partitions:
+            yield label, windows(part, part)
+        return
+
+    tail = None
+    pending = None
+    for label, part in partitions:
+        if pending is not None:
+            previous_label, previous = pending
+            head = _head(part, row_instruments(part), n_leads)
+            block = pd.concat([frame for frame in (tail, previous, head) if frame is not None])
+            yield previous_label, windows(block, previous)
+            seen = pd.concat([frame for frame in (tail, previous) if frame is not None])
+            tail = _tail(seen, row_instruments(seen), n_lags)
+        pending = label, part
+    if pending is not None:
+        previous_label, previous = pending
+        block = pd.concat([frame for frame in (tail, previous) if frame is not None])
+        yield previous_label, windows(block, previous)
@@ -0,0 +1,283 @@
+"""
+Pipeline runner with content-addressed stage caching.
+
+The stages form a small DAG (PIPELINE). Before a stage runs, its
+fingerprint is computed from the stage name, its effective config and the
+content hashes of its declared inputs. If the fingerprint matches the one
+recorded after its last successful run and all outputs still exist, the
+stage is skipped. Because the inputs of a stage are the outputs of its
+upstream stages, a rerun upstream that produces identical files does not
+invalidate anything downstream.
+
+Independent stages (e.g. rates, onehot and sentiment) run concurrently on
+a thread pool. File hashes are memoised by size and modification time, so unchanged
+inputs are not read again.
+
+The sentiment workbook is an input of the build stage, so a new export
+from the Kaggle notebook triggers a rebuild just like a local sentiment run.
+
+`pipeline_status` computes the same fingerprints without running or
+importing the heavy dependencies of any stage (the stage modules import
+pandas and the models only inside `run`).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from stock_pipeline import metrics, storage
+from stock_pipeline.config import PROJECT_ROOT, merge_config
+from stock_pipeline.stages import NAME_WIDTH, load_stage
+from stock_pipeline.text_extraction import file_sha256
+
+# Stage -> upstream stages
+PIPELINE = {
+    "download": [],
+    "extract": [],
+    "rates": ["extract"],
+    "onehot": ["download"],
+    "sentiment": ["extract"],
+    "build": ["rates", "onehot", "sentiment"],
+    "tune": ["build"],
+    "train": ["build"],
+    "compare": ["build"],
+    "backtest": ["build"],
+    "significance": ["build"],
+}
+
+STATE_FILE = ".pipeline_state.json"
+
+
+def upstream_closure(stages, pipeline=PIPELINE):
+    """The given stages and everything they depend on, in pipeline order"""
+    needed = set()
+    todo = list(stages)
+    while todo:
+        stage = todo.pop()
+        if stage not in pipeline:
+            raise KeyError(f"Unknown stage '{stage}'. Choose one of {list(pipeline)}")
+        if stage not in needed:
+            needed.add(stage)
+            todo.extend(pipeline[stage])
+    return [stage for stage in pipeline if stage in needed]
+
+
+def expand_path(path):
+    """
+    Existing files behind a declared path.
+
+    A declared path is a file, a folder or a table path without extension;
+    the latter matches every stored format of the table, including a folder
+    of sheets.
+    """
+    if os.path.isfile(path):
+        return [path]
+    if os.path.isdir(path):
+        return sorted(os.path.join(folder, name)
+                      for folder, _, names in os.walk(path) for name in names)
+    files = []
+    for ext in storage.FORMATS.values():
+        if os.path.isfile(f"{path}{ext}"):
+            files.append(f"{path}{ext}")
+    return files
+
+
+class PipelineState:
+    """
+    Fingerprints of the last successful run of every stage and a memo of
+    file hashes, stored as JSON in the project root.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, STATE_FILE)
+        self._lock = threading.Lock()
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        self.stages = data.get("stages", {})
+        self.files = data.get("files", {})
+
+    def file_hash(self, path):
+        """Content hash of a file, reusing the memo while size and mtime are unchanged"""
+        stat = os.stat(path)
+        key = os.path.relpath(path, self.root)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            cached = self.files.get(key)
+        if cached is not None and cached[:2] == signature:
+            return cached[2]
+        digest = file_sha256(path)
+        with self._lock:
+            self.files[key] = signature + [digest]
+        return digest
+
+    def fingerprint(self, stage, config, input_paths):
+        """Hash of stage name, effective config and input contents"""
+        inputs = {}
+        for declared in input_paths:
+            files = expand_path(declared)
+            inputs[os.path.relpath(declared, self.root)] = {
+                os.path.relpath(path, self.root): self.file_hash(path) for path in files
+            } or None
+        payload = json.dumps({"stage": stage, "config": config, "inputs": inputs},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_current(self, stage, fingerprint, output_paths):
+        entry = self.stages.get(stage)
+        return (entry is not None
+                and entry["fingerprint"] == fingerprint
+                and all(expand_path(path) for path in output_paths))
+
+    def record(self, stage, fingerprint, elapsed):
+        with self._lock:
+            self.stages[stage] = {"fingerprint": fingerprint,
+                                  "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                  "elapsed_seconds": round(elapsed, 3)}
+            self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        # Caller holds self._lock
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages, "files": self.files}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def stage_fingerprint(state, stage, module, config, root):
+    """Fingerprint of a stage with its effective config (see fingerprint_config)"""
+    fingerprint_config = getattr(module, "fingerprint_config", None)
+    effective = fingerprint_config(config) if fingerprint_config else config
+    return state.fingerprint(stage, effective, module.inputs(config, root))
+
+
+def pipeline_status(stages=None, configs=None, root=None):
+    """
+    Whether every stage is up to date, without running or recording anything.
+
+    Args:
+        stages (list, optional): Target stages; their upstream stages are
+            included. Defaults to the whole pipeline
+        configs (dict, optional): Stage name -> config overrides
+        root (str, optional): Project root, defaults to the repository
+
+    Returns:
+        dict: Stage -> {'status': 'current' | 'stale' | 'never run',
+        'finished': time of the last successful run or None,
+        'upstream': upstream stages that are not current}
+    """
+    root = root or PROJECT_ROOT
+    configs = configs or {}
+    order = upstream_closure(stages or list(PIPELINE))
+    state = PipelineState(root)
+    report = {}
+    for stage in order:
+        module = load_stage(stage)
+        config = merge_config(module.DEFAULT_CONFIG, configs.get(stage))
+        entry = state.stages.get(stage)
+        if entry is None:
+            status = "never run"
+        elif state.is_current(stage, stage_fingerprint(state, stage, module, config, root),
+                              module.outputs(config, root)):
+            status = "current"
+        else:
+            status = "stale"
+        report[stage] = {"status": status,
+                         "finished": entry["finished"] if entry else None,
+                         "upstream": [dep for dep in PIPELINE[stage] if report[dep]["status"] != "current"]}
+    return report
+
+
+def run_pipeline(stages=None, configs=None, root=None, jobs=4, force=False, dry_run=False,
+                 profile=None, profile_dir="profiles"):
+    """
+    Run the stale stages of the pipeline.
+
+    Args:
+        stages (list, optional): Target stages; their upstream stages are
+            included. Defaults to the whole pipeline
+        configs (dict, optional): Stage name -> config overrides
+        root (str, optional): Project root, defaults to the repository
+        jobs (int): Maximum number of stages running at the same time
+        force (bool): Run the target stages even if they are up to date;
+            upstream stages still run only when stale
+        dry_run (bool): Only report which stages are stale
+        profile (str, optional): Profile every stage that runs with
+            'cprofile' or 'pyinstrument' (see metrics.stage)
+        profile_dir (str): Folder of the profile files
+
+    Returns:
+        dict: Stage -> {'status': 'ran' | 'cached' | 'stale' | 'failed' |
+        'skipped', 'elapsed': seconds, 'error': message or None}
+    """
+    root = root or PROJECT_ROOT
+    configs = configs or {}
+    order = upstream_closure(stages or list(PIPELINE))
+    state = PipelineState(root)
+    forced = set(stages or order) if force else set()
+    report = {}
+
+    modules = {stage: load_stage(stage) for stage in order}
+    merged = {stage: merge_config(modules[stage].DEFAULT_CONFIG, configs.get(stage))
+              for stage in order}
+
+    def execute(stage):
+        module, config = modules[stage], merged[stage]
+        start = time.perf_counter()
+        fingerprint = stage_fingerprint(state, stage, module, config, root)
+        if stage not in forced and state.is_current(stage, fingerprint, module.outputs(config, root)):
+            return "cached", time.perf_counter() - start
+        if dry_run:
+            return "stale", time.perf_counter() - start
+        print(f"\n▶ {stage}")
+        with metrics.stage(stage, profile, profile_dir):
+            module.run(config, root=root)
+        elapsed = time.perf_counter() - start
+        state.record(stage, fingerprint, elapsed)
+        return "ran", elapsed
+
+    pending = list(order)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        while pending or running:
+            for stage in list(pending):
+                upstream = [dep for dep in PIPELINE[stage] if dep in order]
+                if any(report.get(dep, {}).get("status") in ("failed", "skipped", "stale")
+                       for dep in upstream):
+                    blocked = "stale" if dry_run else "skipped"
+                    report[stage] = {"status": blocked, "elapsed": 0.0, "error": None}
+                    pending.remove(stage)
+                elif all(dep in report for dep in upstream):
+                    running[executor.submit(execute, stage)] = stage
+                    pending.remove(stage)
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    status, elapsed = future.result()
+                    report[stage] = {"status": status, "elapsed": elapsed, "error": None}
+                except Exception as e:
+                    report[stage] = {"status": "failed", "elapsed": 0.0,
+                                     "error": f"{type(e).__name__}: {e}"}
+
+    state.save()
+
+    print("\nPipeline summary:")
+    for stage in order:
+        entry = report[stage]
+        line = f"   • {stage:<{NAME_WIDTH}} {entry['status']:<8} {entry['elapsed']:.1f}s"
+        if entry["error"]:
+            line += f"  {entry['error']}"
+        print(line)
+    return report
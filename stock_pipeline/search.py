@@ -0,0 +1,374 @@
+"""
+Vectorized hyperparameter search for the linear models of the notebooks.
+
+GridSearchCV refits every candidate from scratch. Here each fold is reduced
+to sufficient statistics (X'X, X'Y, Y'Y and the column sums), the training
+statistics of a fold are the totals minus the held-out rows, and one
+eigendecomposition of X'X per fold serves every candidate of the grid and
+all targets at once:
+
+    coef = V diag(1 / (s + lambda/alpha)) V' X'y
+
+BayesianRidge's evidence updates (gamma, lambda, alpha) then only involve
+vectors of length n_features, so the whole grid is iterated together with
+NumPy broadcasting over (candidate, eigenvalue, target) arrays. Results
+match scikit-learn's BayesianRidge, Ridge and LinearRegression with the
+same parameters up to floating point error.
+
+Folds follow KFold(n_splits, shuffle=False) and the grid order follows
+ParameterGrid, so candidate indices line up with GridSearchCV's cv_results_.
+A notebook grid with `n_iter` is renamed to `max_iter` before it is
+ordered, the grid current scikit-learn's GridSearchCV would be given.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+MODELS = ("BayesianRidge", "Ridge", "LinearRegression")
+
+DEFAULTS = {
+    "BayesianRidge": {"max_iter": 300, "tol": 1e-3, "alpha_1": 1e-6, "alpha_2": 1e-6,
+                      "lambda_1": 1e-6, "lambda_2": 1e-6, "alpha_init": None,
+                      "lambda_init": None, "fit_intercept": True},
+    "Ridge": {"alpha": 1.0, "fit_intercept": True},
+    "LinearRegression": {"fit_intercept": True},
+}
+
+_EPS = np.finfo(np.float64).eps
+
+
+class SufficientStats:
+    """
+    Sufficient statistics of a least squares problem with several targets.
+
+    Statistics of disjoint row sets add up, so folds, expanding windows and
+    rank-one updates are cheap: `stats + SufficientStats.from_data(x, y)`.
+
+    Attributes:
+        n (int): Number of rows
+        sum_x (np.ndarray): Column sums of X, shape (p,)
+        sum_y (np.ndarray): Column sums of Y, shape (t,)
+        xx (np.ndarray): X'X, shape (p, p)
+        xy (np.ndarray): X'Y, shape (p, t)
+        yy (np.ndarray): Squared column norms of Y, shape (t,)
+    """
+
+    def __init__(self, n, sum_x, sum_y, xx, xy, yy):
+        self.n = n
+        self.sum_x = sum_x
+        self.sum_y = sum_y
+        self.xx = xx
+        self.xy = xy
+        self.yy = yy
+
+    @classmethod
+    def from_data(cls, X, Y):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        Y = np.asarray(Y, dtype=np.float64)
+        Y = Y.reshape(len(X), -1)
+        return cls(len(X), X.sum(axis=0), Y.sum(axis=0), X.T @ X, X.T @ Y, np.einsum("ij,ij->j", Y, Y))
+
+    def __add__(self, other):
+        return SufficientStats(self.n + other.n, self.sum_x + other.sum_x, self.sum_y + other.sum_y,
+                               self.xx + other.xx, self.xy + other.xy, self.yy + other.yy)
+
+    def __sub__(self, other):
+        return SufficientStats(self.n - other.n, self.sum_x - other.sum_x, self.sum_y - other.sum_y,
+                               self.xx - other.xx, self.xy - other.xy, self.yy - other.yy)
+
+    def select(self, columns):
+        """Statistics of the problem restricted to the feature `columns` (index array)"""
+        columns = np.asarray(columns)
+        return SufficientStats(self.n, self.sum_x[columns], self.sum_y,
+                               self.xx[np.ix_(columns, columns)], self.xy[columns], self.yy)
+
+    def centered(self):
+        """
+        Statistics of the mean-centered problem.
+
+        Returns:
+            tuple: (xx, xy, yy, x_mean, y_mean)
+        """
+        x_mean = self.sum_x / self.n
+        y_mean = self.sum_y / self.n
+        xx = self.xx - self.n * np.outer(x_mean, x_mean)
+        xy = self.xy - self.n * np.outer(x_mean, y_mean)
+        yy = self.yy - self.n * y_mean ** 2
+        return xx, xy, yy, x_mean, y_mean
+
+    def standardized(self):
+        """
+        Statistics after scaling X to zero mean and unit variance.
+
+        Same scaling as a StandardScaler fitted on these rows (constant
+        columns keep a scale of 1), derived without touching the rows.
+
+        Returns:
+            tuple: (SufficientStats, mean, scale)
+        """
+        mean = self.sum_x / self.n
+        second_moment = np.diag(self.xx) / self.n
+        var = np.maximum(second_moment - mean ** 2, 0.0)
+        # E[x²] - mean² cancels for constant columns; their centered values are exactly zero
+        constant = var <= 10 * self.n * _EPS * second_moment
+        scale = np.where(constant, 1.0, np.sqrt(var))
+        xx = (self.xx - self.n * np.outer(mean, mean)) / np.outer(scale, scale)
+        xy = (self.xy - np.outer(mean, self.sum_y)) / scale[:, None]
+        xx[constant, :] = 0.0
+        xx[:, constant] = 0.0
+        xy[constant, :] = 0.0
+        stats = SufficientStats(self.n, np.zeros_like(mean), self.sum_y, xx, xy, self.yy)
+        return stats, mean, scale
+
+    def y_var(self):
+        """Population variance of every target"""
+        y_mean = self.sum_y / self.n
+        return np.maximum(self.yy / self.n - y_mean ** 2, 0.0)
+
+
+def parameter_grid(param_grid):
+    """Candidates of a grid in scikit-learn's ParameterGrid order, `n_iter` renamed to `max_iter` first"""
+    if not param_grid:
+        return [{}]
+    param_grid = dict(param_grid)
+    if "n_iter" in param_grid:
+        if "max_iter" in param_grid:
+            raise ValueError("Grid has both 'n_iter' and its new name 'max_iter'")
+        param_grid["max_iter"] = param_grid.pop("n_iter")
+    keys = sorted(param_grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+
+
+def normalize_params(model, params):
+    """Candidate with defaults filled in and `n_iter` read as `max_iter`"""
+    if model not in MODELS:
+        raise ValueError(f"Unknown model '{model}'. Choose one of {list(MODELS)}")
+    params = dict(params)
+    if "n_iter" in params:
+        params["max_iter"] = params.pop("n_iter")
+    merged = dict(DEFAULTS[model])
+    merged.update(params)
+    return merged
+
+
+def kfold_indices(n_samples, n_splits):
+    """Held-out index ranges of KFold(n_splits, shuffle=False)"""
+    if not 2 <= n_splits <= n_samples:
+        raise ValueError(f"n_splits={n_splits} needs 2 <= n_splits <= n_samples={n_samples}")
+    sizes = np.full(n_splits, n_samples // n_splits)
+    sizes[:n_samples % n_splits] += 1
+    stops = np.cumsum(sizes)
+    return [np.arange(stop - size, stop) for stop, size in zip(stops, sizes)]
+
+
+def _decompose(stats, fit_intercept):
+    """Eigenvalues, eigenvectors, projected X'Y, Y'Y and offsets of one fit"""
+    if fit_intercept:
+        xx, xy, yy, x_mean, y_mean = stats.centered()
+    else:
+        xx, xy, yy = stats.xx, stats.xy, stats.yy
+        x_mean, y_mean = np.zeros_like(stats.sum_x), np.zeros_like(stats.sum_y)
+    eig, vecs = np.linalg.eigh(xx)
+    eig = np.clip(eig, 0.0, None)
+    return eig, vecs, vecs.T @ xy, yy, x_mean, y_mean
+
+
+def grid_columns(model, candidates):
+    """
+    Candidates as one array per parameter (None becomes NaN).
+
+    Returns:
+        dict: Parameter name -> np.ndarray of length len(candidates)
+    """
+    candidates = [normalize_params(model, c) for c in candidates]
+    columns = {}
+    for key in DEFAULTS[model]:
+        values = [c[key] for c in candidates]
+        if key == "fit_intercept":
+            columns[key] = np.array(values, dtype=bool)
+        else:
+            columns[key] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return columns
+
+
+def _bayesian_ridge_weights(stats, eig, vecs, proj, yy, columns):
+    """
+    BayesianRidge evidence iterations for many candidates at once.
+
+    Returns:
+        np.ndarray: Coefficients in the eigenbasis, shape (g, p, t)
+    """
+    n_candidates, n_targets = len(columns["tol"]), proj.shape[1]
+    alpha_1, alpha_2 = columns["alpha_1"][:, None], columns["alpha_2"][:, None]
+    lambda_1, lambda_2 = columns["lambda_1"][:, None], columns["lambda_2"][:, None]
+    tol = columns["tol"][:, None]
+    max_iter = columns["max_iter"].astype(int)
+
+    alpha_init, lambda_init = columns["alpha_init"], columns["lambda_init"]
+    alpha = np.where(np.isnan(alpha_init)[:, None], 1.0 / (stats.y_var() + _EPS)[None, :],
+                     alpha_init[:, None]) * np.ones((1, n_targets))
+    lam = np.where(np.isnan(lambda_init), 1.0, lambda_init)[:, None] * np.ones((1, n_targets))
+
+    eig_ = eig[None, :, None]
+
+    def weights(alpha, lam):
+        return proj[None, :, :] / (eig_ + (lam / alpha)[:, None, :])
+
+    coef_old = None
+    converged = np.zeros((n_candidates, n_targets), dtype=bool)
+    for it in range(max_iter.max(initial=0)):
+        active = (it < max_iter)[:, None] & ~converged
+        if not active.any():
+            break
+        w = weights(alpha, lam)
+        sse = yy[None, :] - 2 * np.sum(proj[None] * w, axis=1) + np.sum(eig_ * w ** 2, axis=1)
+        sse = np.maximum(sse, 0.0)
+        gamma = np.sum(alpha[:, None, :] * eig_ / (lam[:, None, :] + alpha[:, None, :] * eig_), axis=1)
+        new_lam = (gamma + 2 * lambda_1) / (np.sum(w ** 2, axis=1) + 2 * lambda_2)
+        new_alpha = (stats.n - gamma + 2 * alpha_1) / (sse + 2 * alpha_2)
+        lam = np.where(active, new_lam, lam)
+        alpha = np.where(active, new_alpha, alpha)
+
+        # Convergence is judged on the coefficients in feature space, like scikit-learn
+        coef = np.matmul(vecs, w)
+        if coef_old is not None:
+            converged |= active & (np.sum(np.abs(coef_old - coef), axis=1) < tol)
+        coef_old = coef if coef_old is None else np.where(active[:, None, :], coef, coef_old)
+    return weights(alpha, lam)
+
+
+def fit_grid(stats, model, candidates):
+    """
+    Fit every candidate of a grid on the same data.
+
+    Args:
+        stats (SufficientStats): Training statistics
+        model (str): 'BayesianRidge', 'Ridge' or 'LinearRegression'
+        candidates (list or dict): Parameter dicts (see normalize_params)
+            or their grid_columns
+
+    Returns:
+        tuple: coef with shape (g, p, t) and intercept with shape (g, t)
+    """
+    columns = candidates if isinstance(candidates, dict) else grid_columns(model, candidates)
+    n_candidates = len(columns["fit_intercept"])
+    n_features, n_targets = stats.xy.shape
+    coef = np.zeros((n_candidates, n_features, n_targets))
+    intercept = np.zeros((n_candidates, n_targets))
+
+    for fit_intercept in (True, False):
+        idx = np.flatnonzero(columns["fit_intercept"] == fit_intercept)
+        if not len(idx):
+            continue
+        eig, vecs, proj, yy, x_mean, y_mean = _decompose(stats, fit_intercept)
+        group = {key: values[idx] for key, values in columns.items()}
+        if model == "BayesianRidge":
+            w = _bayesian_ridge_weights(stats, eig, vecs, proj, yy, group)
+        elif model == "Ridge":
+            w = proj[None, :, :] / (eig[None, :, None] + group["alpha"][:, None, None])
+        else:
+            cutoff = eig.max(initial=0.0) * len(eig) * _EPS
+            inverse = np.divide(1.0, eig, out=np.zeros_like(eig), where=eig > cutoff)
+            w = np.repeat((proj * inverse[:, None])[None], len(idx), axis=0)
+        group_coef = np.matmul(vecs, w)
+        coef[idx] = group_coef
+        intercept[idx] = y_mean[None, :] - x_mean @ group_coef
+    return coef, intercept
+
+
+def predict_grid(X, coef, intercept):
+    """Predictions of all candidates, shape (g, n, t)"""
+    return np.matmul(np.asarray(X, dtype=np.float64), coef) + intercept[:, None, :]
+
+
+def _fold_mse(args):
+    """Validation MSE of every candidate on one fold, shape (g, t)"""
+    total, X, Y, held_out, model, columns = args
+    train_stats = total - SufficientStats.from_data(X[held_out], Y[held_out])
+    coef, intercept = fit_grid(train_stats, model, columns)
+    residual = Y[held_out][None, :, :] - predict_grid(X[held_out], coef, intercept)
+    return np.mean(residual ** 2, axis=1)
+
+
+def cross_validate_grid(X, Y, model, param_grid, n_splits=9, workers=1):
+    """
+    K-fold MSE of every candidate for every target.
+
+    Args:
+        X (np.ndarray): Features, shape (n, p)
+        Y (np.ndarray): Targets, shape (n, t)
+        model (str): 'BayesianRidge', 'Ridge' or 'LinearRegression'
+        param_grid (dict): Parameter name -> list of values
+        n_splits (int): Folds of KFold(shuffle=False)
+        workers (int): Processes for the folds, 1 runs in this process
+
+    Returns:
+        tuple: (candidates, fold_mse) with fold_mse of shape (folds, g, t)
+    """
+    X = np.asarray(X, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64).reshape(len(X), -1)
+    candidates = parameter_grid(param_grid)
+    columns = grid_columns(model, candidates)
+    total = SufficientStats.from_data(X, Y)
+    tasks = [(total, X, Y, held_out, model, columns) for held_out in kfold_indices(len(X), n_splits)]
+    fold_mse = list(parallel_map(_fold_mse, tasks, workers))
+    return candidates, np.stack(fold_mse)
+
+
+def parallel_map(fn, tasks, workers):
+    """map() over worker processes; runs in this process for one worker or task"""
+    if workers == 1 or len(tasks) <= 1:
+        return map(fn, tasks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fn, tasks))
+
+
+def _variant_results(args):
+    variant, X, Y, targets, model, param_grid, n_splits = args
+    candidates, fold_mse = cross_validate_grid(X, Y, model, param_grid, n_splits)
+    mean, std = fold_mse.mean(axis=0), fold_mse.std(axis=0)
+    params = pd.DataFrame(candidates)
+    frames = []
+    for t, target in enumerate(targets):
+        frame = params.copy()
+        frame.insert(0, "Candidate", np.arange(len(candidates)))
+        frame.insert(0, "Model", model)
+        frame.insert(0, "Target", target)
+        frame.insert(0, "Variant", variant)
+        frame["CV_MSE"] = mean[:, t]
+        frame["CV_MSE_Std"] = std[:, t]
+        frame["Rank"] = pd.Series(mean[:, t]).rank(method="min").astype(int).values
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def search(variants, targets, model, param_grid, n_splits=9, workers=None):
+    """
+    Grid search over several dataset variants, all targets at once.
+
+    Args:
+        variants (dict): Variant name -> (X, Y) with Y columns in `targets` order
+        targets (list): Target names
+        model (str): 'BayesianRidge', 'Ridge' or 'LinearRegression'
+        param_grid (dict): Parameter name -> list of values
+        n_splits (int): Folds of KFold(shuffle=False)
+        workers (int, optional): Processes for the variants, defaults to
+            the CPU count; 1 runs in this process
+
+    Returns:
+        pd.DataFrame: One row per variant, target and candidate with the
+        parameters, CV_MSE, CV_MSE_Std and Rank (1 = best per variant/target)
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(variant, X, Y, list(targets), model, param_grid, n_splits)
+             for variant, (X, Y) in variants.items()]
+    return pd.concat(parallel_map(_variant_results, tasks, min(workers, len(tasks))), ignore_index=True)
+
+
+def best_params(results):
+    """Best candidate per variant and target (first one on ties, like GridSearchCV)"""
+    best = results.loc[results.groupby(["Variant", "Target"], sort=False)["CV_MSE"].idxmin()]
+    return best.reset_index(drop=True)
@@ -0,0 +1,388 @@
+"""
+Batched sentiment scoring of the press conference texts.
+
+Reproduces the "All Models Compared" cell of 02-1-Sentiment-Analysis.ipynb
+locally: every statement is split into sentences (Punkt with ECB
+abbreviations) and 512-character chunks, each text is scored as
+P(positive) - P(negative), and the per-document means become the
+FinBERT_* and RoBERTa_* columns.
+
+Instead of one pipeline call per text, all sentences and chunks of all
+documents are collected first, de-duplicated, tokenized once per model and
+run through the model in length-sorted padded batches. `token_chunker`
+is an alternative to the character windows that cuts on token boundaries
+and sentence edges; `model_chunkers` counts the tokens with each scored
+model's own tokenizer (FinBERT's WordPiece and RoBERTa's BPE split text
+differently), so no chunk is truncated by the model.
+
+A scorer is any object with a `score(texts)` method returning one score per
+text plus `name` and `revision` attributes. `TransformersScorer` wraps a
+Hugging Face model; `StubScorer` needs no weights and is meant for tests
+and dry runs. `sentiment_cache.CachedScorer` adds a persistent score cache
+around any of them.
+"""
+import os
+from datetime import datetime
+
+from stock_pipeline.text_extraction import chunk_by_tokens, regex_token_spans
+
+# Column prefix -> Hugging Face model
+MODELS = {
+    "FinBERT": "ProsusAI/finbert",
+    "RoBERTa": "soleimanian/financial-roberta-large-sentiment",
+}
+
+# Punkt abbreviations of the notebook
+ECB_ABBREVIATIONS = {
+    'mr', 'mrs', 'ms', 'dr', 'prof',  # Titles
+    'e.g', 'i.e', 'etc', 'vs', 'cf',  # Latin abbreviations
+    'ecb', 'eu', 'euro', 'gdp', 'cpi', 'ppp',  # Financial abbreviations
+    'u.s', 'u.k', 'u.s.a', 'e.u',  # Countries
+    'jan', 'feb', 'mar', 'apr', 'may', 'jun',  # Months
+    'jul', 'aug', 'sep', 'oct', 'nov', 'dec',
+    'inc', 'ltd', 'corp', 'co', 'llc',  # Companies
+    'no', 'nos', 'vol', 'p', 'pp', 'fig',  # General abbreviations
+    'tel', 'fax', 'email', 'www'  # Contact abbreviations
+}
+
+MIN_SENTENCE_LENGTH = 20
+CHUNK_SIZE = 512
+CHUNK_STEP = 400
+MIN_CHUNK_LENGTH = 50
+
+_sentence_tokenizer = None
+
+
+def split_sentences(text):
+    """Sentences longer than 20 characters, split by Punkt with ECB abbreviations"""
+    global _sentence_tokenizer
+    if _sentence_tokenizer is None:
+        from nltk.tokenize.punkt import PunktParameters, PunktSentenceTokenizer
+
+        punkt_param = PunktParameters()
+        punkt_param.abbrev_types = set(ECB_ABBREVIATIONS)
+        _sentence_tokenizer = PunktSentenceTokenizer(punkt_param)
+
+    sentences = (s.strip() for s in _sentence_tokenizer.tokenize(text))
+    return [s for s in sentences if len(s) > MIN_SENTENCE_LENGTH]
+
+
+def split_chunks(text, size=CHUNK_SIZE, step=CHUNK_STEP, min_length=MIN_CHUNK_LENGTH):
+    """Character windows of `size` every `step` characters, skipping near-empty ones"""
+    return [text[i:i + size] for i in range(0, len(text), step)
+            if len(text[i:i + size].strip()) > min_length]
+
+
+def hf_token_spans(model_name, revision=None):
+    """Token span function (see text_extraction.chunk_by_tokens) of a model's fast tokenizer"""
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revision)
+
+    def token_spans(text):
+        encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        return [tuple(offsets) for offsets in encoded["offset_mapping"]]
+    return token_spans
+
+
+def token_chunker(max_tokens=510, stride=0, tokenizer=None):
+    """
+    Chunk function splitting on token boundaries and sentence edges.
+
+    Args:
+        max_tokens (int): Token budget per chunk
+        stride (int): Tokens shared by consecutive chunks
+        tokenizer (str, optional): Model whose tokenizer counts the tokens;
+            words and punctuation marks are counted if None
+
+    Returns:
+        tuple: (chunker, token_spans) - chunker maps a text to chunk strings
+    """
+    token_spans = hf_token_spans(tokenizer) if tokenizer else regex_token_spans
+
+    def chunker(text):
+        return [chunk["text"] for chunk in chunk_by_tokens(text, token_spans, max_tokens, stride)]
+    return chunker, token_spans
+
+
+def model_chunkers(scorers, max_tokens=510, stride=0, tokenizer="model"):
+    """
+    Token chunk function per scorer.
+
+    Args:
+        scorers (dict): Column prefix -> scorer
+        max_tokens, stride: See token_chunker
+        tokenizer (str, optional): 'model' counts with the tokenizer of each
+            TransformersScorer (other scorers, e.g. stubs, count words and
+            punctuation); a model id or None applies to all scorers
+
+    Returns:
+        dict: Column prefix -> (chunker, token_spans)
+    """
+    chunkers = {}
+    for prefix, scorer in scorers.items():
+        if tokenizer != "model":
+            chunkers[prefix] = token_chunker(max_tokens, stride, tokenizer)
+        elif isinstance(scorer, TransformersScorer):
+            token_spans = hf_token_spans(scorer.name, scorer.revision)
+
+            def chunker(text, token_spans=token_spans):
+                return [chunk["text"] for chunk in chunk_by_tokens(text, token_spans, max_tokens, stride)]
+            chunkers[prefix] = (chunker, token_spans)
+        else:
+            chunkers[prefix] = token_chunker(max_tokens, stride)
+    return chunkers
+
+
+def chunking_report(documents, chunker, token_spans=regex_token_spans):
+    """
+    Chunks and tokens per document for a chunk function.
+
+    Returns:
+        pd.DataFrame: Date, Tokens, Chunks, Chunk_Tokens (tokens sent to the
+        model, counting overlap) and Overhead (duplicated share)
+    """
+    import pandas as pd
+
+    rows = []
+    for key, text in documents.items():
+        chunks = chunker(text)
+        n_tokens = len(token_spans(text))
+        chunk_tokens = sum(len(token_spans(chunk)) for chunk in chunks)
+        rows.append({"Date": key, "Tokens": n_tokens, "Chunks": len(chunks),
+                     "Chunk_Tokens": chunk_tokens,
+                     "Overhead": round(chunk_tokens / n_tokens - 1, 4) if n_tokens else 0.0})
+    return pd.DataFrame(rows)
+
+
+class TransformersScorer:
+    """
+    Sentiment score of a Hugging Face sequence classification model.
+
+    Only the model config is read on construction (to resolve the revision
+    and the label order); tokenizer and weights are loaded on the first
+    call that actually has texts to score.
+
+    Args:
+        model_name (str): Model id, e.g. 'ProsusAI/finbert'
+        revision (str, optional): Model revision (branch, tag or commit)
+        batch_size (int): Texts per forward pass
+        max_length (int): Tokens per text, longer texts are truncated
+        device (str): Torch device
+    """
+
+    def __init__(self, model_name, revision=None, batch_size=32, max_length=512, device="cpu"):
+        from transformers import AutoConfig
+
+        self.name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.device = device
+        model_config = AutoConfig.from_pretrained(model_name, revision=revision)
+        self.revision = revision or getattr(model_config, "_commit_hash", None) or "main"
+        self.tokenizer = None
+        self.model = None
+
+        labels = {label.lower(): int(i) for i, label in model_config.id2label.items()}
+        self._positive = labels.get("positive")
+        self._negative = labels.get("negative")
+
+    def _load(self):
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.name, revision=self.revision)
+        self.model = (AutoModelForSequenceClassification
+                      .from_pretrained(self.name, revision=self.revision)
+                      .to(self.device).eval())
+
+    def score(self, texts):
+        """P(positive) - P(negative) per text"""
+        import numpy as np
+        import torch
+
+        scores = np.zeros(len(texts))
+        if not texts:
+            return scores
+        if self.model is None:
+            self._load()
+
+        # Tokenize everything once, then pad per batch of similar length
+        encoded = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)
+        # Only texts that hit the limit can have been cut; count them without truncation
+        at_limit = [text for text, ids in zip(texts, encoded["input_ids"]) if len(ids) >= self.max_length]
+        truncated = sum(len(ids) > self.max_length
+                        for ids in self.tokenizer(at_limit, verbose=False)["input_ids"]) if at_limit else 0
+        if truncated:
+            print(f"Warning: {truncated} of {len(texts)} texts exceed {self.max_length} tokens "
+                  f"and are cut off by {self.name}")
+        order = np.argsort([len(ids) for ids in encoded["input_ids"]], kind="stable")
+
+        with torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                idx = order[start:start + self.batch_size]
+                batch = self.tokenizer.pad({key: [encoded[key][i] for i in idx] for key in encoded},
+                                           return_tensors="pt")
+                logits = self.model(**{key: value.to(self.device) for key, value in batch.items()}).logits
+                probs = torch.softmax(logits, dim=-1).cpu().numpy()
+                positive = probs[:, self._positive] if self._positive is not None else 0.0
+                negative = probs[:, self._negative] if self._negative is not None else 0.0
+                scores[idx] = positive - negative
+        return scores
+
+
+class StubScorer:
+    """
+    Scorer without model weights.
+
+    Args:
+        fn (callable, optional): Score of a single text, defaults to 0.0
+        name (str): Name used in place of a model id
+    """
+
+    def __init__(self, fn=None, name="stub"):
+        self.fn = fn or (lambda text: 0.0)
+        self.name = name
+        self.revision = "stub"
+
+    def score(self, texts):
+        import numpy as np
+
+        return np.array([self.fn(text) for text in texts], dtype=float)
+
+
+def load_scorers(models=None, batch_size=32, stub=False):
+    """
+    Scorers per column prefix.
+
+    Args:
+        models (dict, optional): Column prefix -> model id, defaults to MODELS
+        batch_size (int): Texts per forward pass
+        stub (bool): Use StubScorer instead of downloading the models
+
+    Returns:
+        dict: Column prefix -> scorer
+    """
+    models = models or MODELS
+    if stub:
+        return {prefix: StubScorer(name=model_name) for prefix, model_name in models.items()}
+    return {prefix: TransformersScorer(model_name, batch_size=batch_size)
+            for prefix, model_name in models.items()}
+
+
+def segment_documents(documents, chunker=split_chunks):
+    """
+    Sentences and chunks of every document.
+
+    Args:
+        documents (dict): Document -> text
+        chunker (callable or dict): Chunk function, or column prefix -> chunk
+            function when every model gets its own chunks (model_chunkers)
+
+    Returns:
+        dict: Document -> {'sentences': [...], 'chunks': [...]}, with
+        'chunks' a dict column prefix -> [...] for a dict of chunkers
+    """
+    def chunks(text):
+        if isinstance(chunker, dict):
+            return {prefix: chunk_fn(text) for prefix, chunk_fn in chunker.items()}
+        return chunker(text)
+
+    return {key: {"sentences": split_sentences(text), "chunks": chunks(text)}
+            for key, text in documents.items()}
+
+
+def segment_chunks(parts, prefix):
+    """Chunks of one document scored by the model of `prefix`"""
+    chunks = parts["chunks"]
+    return chunks[prefix] if isinstance(chunks, dict) else chunks
+
+
+def score_segments(segments, scorers, show_progress=True):
+    """
+    Score all segments with every scorer in one batched pass per scorer.
+
+    Args:
+        segments (dict): Document -> {'sentences': [...], 'chunks': [...]}
+            (see segment_documents)
+        scorers (dict): Column prefix -> scorer
+
+    Returns:
+        dict: Column prefix -> {text: score}
+    """
+    scores = {}
+    for prefix, scorer in scorers.items():
+        texts = list(dict.fromkeys(text for parts in segments.values()
+                                   for text in parts["sentences"] + segment_chunks(parts, prefix)))
+        if show_progress:
+            print(f"Scoring {len(texts)} texts with {scorer.name}")
+        scores[prefix] = dict(zip(texts, scorer.score(texts)))
+    return scores
+
+
+def aggregate_scores(segments, scores):
+    """
+    One row per document with the mean scores and segment counts.
+
+    Args:
+        segments (dict): Document -> {'sentences': [...], 'chunks': [...]}
+        scores (dict): Column prefix -> {text: score}
+
+    Returns:
+        list: Rows with Date, <prefix>_Sentences, <prefix>_Chunks,
+        Sentence_Count and Chunk_Count (the largest count if every model
+        has its own chunks)
+    """
+    import numpy as np
+
+    rows = []
+    for key, parts in segments.items():
+        row = {"Date": key}
+        for prefix, text_scores in scores.items():
+            for column, texts in (("Sentences", parts["sentences"]), ("Chunks", segment_chunks(parts, prefix))):
+                values = [text_scores[text] for text in texts]
+                row[f"{prefix}_{column}"] = round(float(np.mean(values)), 3) if values else 0
+        row["Sentence_Count"] = len(parts["sentences"])
+        chunks = parts["chunks"]
+        row["Chunk_Count"] = max(map(len, chunks.values())) if isinstance(chunks, dict) else len(chunks)
+        rows.append(row)
+    return rows
+
+
+def parse_folder_date(date_str):
+    """Date of a folder like 17_April_2025, datetime.max if it is no date"""
+    try:
+        day, month, year = date_str.split('_')
+        return datetime.strptime(f"{day} {month} {year}", "%d %B %Y")
+    except ValueError:
+        return datetime.max
+
+
+def sentiment_table(rows, prefixes=tuple(MODELS)):
+    """
+    Chronological table with consistency columns and an 'Average' last row,
+    laid out like ecb_sentiment_analysis.xlsx.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
+    df = (df.assign(Parsed_Date=df['Date'].apply(parse_folder_date))
+          .sort_values('Parsed_Date', kind='stable')
+          .drop(columns=['Parsed_Date'])
+          .reset_index(drop=True))
+    for prefix in prefixes:
+        df[f'{prefix}_Difference'] = abs(df[f'{prefix}_Sentences'] - df[f'{prefix}_Chunks'])
+
+    average_row = df.select_dtypes(include=['number']).mean()
+    average_row['Date'] = 'Average'
+    return pd.concat([df, average_row.to_frame().T], ignore_index=True).infer_objects()
+
+
+def read_documents(input_folder, file_name="0_FULL.txt"):
+    """Full text of every date folder that contains `file_name`"""
+    documents = {}
+    for folder in sorted(os.listdir(input_folder)):
+        path = os.path.join(input_folder, folder, file_name)
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as f:
+                documents[folder] = f.read()
+    return documents
@@ -0,0 +1,158 @@
+"""
+Persistent cache of sentiment scores.
+
+Scores are stored in SQLite keyed by (model, revision, SHA-256 of the
+text). Historical statements never change, so a rerun after a new meeting
+only scores the texts of the new statement; all aggregates are recomputed
+from the cached rows. Every hit refreshes a last-used timestamp, which
+`evict` uses to drop the least recently used rows.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+# SQLite's default limit of host parameters per statement
+_MAX_PARAMS = 900
+
+
+def text_hash(text):
+    """SHA-256 of a text span"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    SQLite store of scores per (model, revision, text hash).
+
+    Args:
+        path (str): Database file, created if missing
+        max_entries (int, optional): Rows kept by `evict()` when called
+            without arguments
+    """
+
+    def __init__(self, path, max_entries=None):
+        self.path = path
+        self.max_entries = max_entries
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " model TEXT NOT NULL, revision TEXT NOT NULL, text_hash TEXT NOT NULL,"
+            " score REAL NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, revision, text_hash)) WITHOUT ROWID")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self._conn.commit()
+
+    def get_many(self, model, revision, hashes):
+        """
+        Cached scores of the given text hashes.
+
+        Returns:
+            dict: text hash -> score for the hashes found
+        """
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        now = time.time()
+        with self._conn:
+            for start in range(0, len(hashes), _MAX_PARAMS):
+                part = hashes[start:start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, score FROM scores WHERE model = ? AND revision = ?"
+                    f" AND text_hash IN ({placeholders})", [model, revision] + part).fetchall()
+                found.update(rows)
+                self._conn.execute(
+                    f"UPDATE scores SET last_used = ? WHERE model = ? AND revision = ?"
+                    f" AND text_hash IN ({placeholders})", [now, model, revision] + part)
+        return found
+
+    def put_many(self, model, revision, scores):
+        """Store scores given as {text hash: score}"""
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                [(model, revision, h, float(score), now) for h, score in scores.items()])
+
+    def evict(self, max_entries=None, older_than=None, model=None, keep_revision=None):
+        """
+        Remove cached rows.
+
+        Args:
+            max_entries (int, optional): Keep only the most recently used
+                rows; defaults to the limit given at construction
+            older_than (float, optional): Drop rows unused for this many seconds
+            model (str, optional): Together with `keep_revision`, drop all other
+                revisions of this model (e.g. after a model update)
+            keep_revision (str, optional): Revision of `model` to keep
+
+        Returns:
+            int: Number of removed rows
+        """
+        max_entries = max_entries if max_entries is not None else self.max_entries
+        removed = 0
+        with self._conn:
+            if model is not None and keep_revision is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM scores WHERE model = ? AND revision != ?",
+                    (model, keep_revision)).rowcount
+            if older_than is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM scores WHERE last_used < ?", (time.time() - older_than,)).rowcount
+            if max_entries is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM scores WHERE (model, revision, text_hash) IN"
+                    " (SELECT model, revision, text_hash FROM scores"
+                    "  ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (max_entries,)).rowcount
+        return removed
+
+    def stats(self):
+        """Row count per (model, revision)"""
+        rows = self._conn.execute(
+            "SELECT model, revision, COUNT(*) FROM scores GROUP BY model, revision").fetchall()
+        return {(model, revision): count for model, revision, count in rows}
+
+    def close(self):
+        self._conn.close()
+
+
+class CachedScorer:
+    """
+    Wrap a scorer so that only texts missing from the cache are scored.
+
+    Args:
+        scorer: Object with `score(texts)`, `name` and `revision`
+        cache (SentimentCache): Score cache
+    """
+
+    def __init__(self, scorer, cache):
+        self.scorer = scorer
+        self.cache = cache
+        self.name = scorer.name
+        self.revision = scorer.revision
+        self.hits = 0
+        self.misses = 0
+
+    def score(self, texts):
+        hashes = [text_hash(text) for text in texts]
+        cached = self.cache.get_many(self.name, self.revision, hashes)
+
+        missing = {}
+        for text, h in zip(texts, hashes):
+            if h not in cached and h not in missing:
+                missing[h] = text
+        if missing:
+            new_scores = self.scorer.score(list(missing.values()))
+            fresh = dict(zip(missing, new_scores))
+            self.cache.put_many(self.name, self.revision, fresh)
+            cached.update(fresh)
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return np.array([cached[h] for h in hashes], dtype=float)
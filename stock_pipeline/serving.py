@@ -0,0 +1,376 @@
+"""
+Event-day predictions from the saved model bundles.
+
+The train stage saves one joblib bundle per variant and target (scaler,
+BayesianRidge, feature columns). Both steps are affine, so the Predictor
+loads the bundles once and folds them into a single weight matrix and
+offset for all targets:
+
+    ((x - mean) / scale) @ coef + intercept  =  x @ W + b
+
+A request then costs one small matrix product. The features of an event
+(Close_t-4..t-2 relative to Close_t-1, index one-hots, interest rate and
+sentiment) are assembled from a MarketState that keeps the last closes
+per index and the current interest rate in memory. A caller only sends
+the index, the rate change and the sentiment scores of the statement.
+For a past event (a 'date' with a row in the feature store of the build
+stage) the stored features are used, so only index and date are needed.
+
+`serve` exposes the predictor over a local HTTP endpoint:
+
+    POST /predict  {"events": [{"index": "DAX", "interest_rate_change": 0.0,
+                                "sentiment": {"FinBERT_Sentences": 0.2}}]}
+    GET  /health   loaded models and latency percentiles
+
+Every response reports the server-side latency of the request.
+"""
+import json
+import numbers
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from stock_pipeline.datasets import PRICE_COLUMNS, REFERENCE_COLUMN, SENTIMENT_COLUMNS, TARGET_COLUMNS
+from stock_pipeline.instruments import instrument_codes
+from stock_pipeline.windows import lag_columns
+
+
+def _affine(bundle):
+    """Weights and offset of scaler + linear model, or None if the model is not linear"""
+    model, scaler = bundle['model'], bundle.get('scaler')
+    if not hasattr(model, 'coef_'):
+        return None
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    intercept = float(np.ravel(model.intercept_)[0])
+    if scaler is None:
+        return coef, intercept
+    mean = scaler.mean_ if getattr(scaler, 'with_mean', True) and scaler.mean_ is not None else 0.0
+    scale = scaler.scale_ if getattr(scaler, 'with_std', True) and scaler.scale_ is not None else 1.0
+    weights = coef / scale
+    return weights, intercept - float(np.sum(mean * weights))
+
+
+class Predictor:
+    """
+    Predictions of all targets of one dataset variant.
+
+    Attributes:
+        variant (str): Model name used by the train stage (e.g. 'fin_sen')
+        feature_columns (list): Features in model order
+        targets (list): Predicted targets
+    """
+
+    def __init__(self, bundles, variant=None):
+        self.targets = list(bundles)
+        first = bundles[self.targets[0]]
+        self.variant = variant or first.get('variant')
+        self.feature_columns = list(first['feature_columns'])
+        for target, bundle in bundles.items():
+            if list(bundle['feature_columns']) != self.feature_columns:
+                raise ValueError(f"Bundle of {target} has different feature columns")
+        self.bundles = bundles
+
+        affine = [_affine(bundle) for bundle in bundles.values()]
+        if all(part is not None for part in affine):
+            self.weights = np.column_stack([weights for weights, _ in affine])
+            self.offset = np.array([offset for _, offset in affine])
+        else:
+            self.weights = self.offset = None
+
+    @classmethod
+    def load(cls, model_folder, variant, targets=TARGET_COLUMNS):
+        """Load the bundles of a variant written by the train stage"""
+        from joblib import load
+
+        from stock_pipeline.stages.train import model_path
+
+        bundles = {}
+        for target in targets:
+            path = model_path(model_folder, variant, target)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No model for {variant}/{target} at {path}. Run the train stage first")
+            bundles[target] = load(path)
+        return cls(bundles, variant)
+
+    def predict(self, X):
+        """
+        Predictions for a batch of feature rows.
+
+        Args:
+            X (np.ndarray): Shape (rows, features) in `feature_columns` order
+
+        Returns:
+            np.ndarray: Shape (rows, targets), percentage changes relative
+            to Close_t-1
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if self.weights is not None:
+            return X @ self.weights + self.offset
+        return np.column_stack([bundle['model'].predict(bundle['scaler'].transform(X))
+                                for bundle in self.bundles.values()])
+
+
+class MarketState:
+    """
+    Last closes per index and the current interest rate, kept in memory.
+
+    Attributes:
+        closes (dict): Index name -> (dates, closes) arrays sorted by date
+        interest_rate (float): Rate in force before the next decision
+        indices (list): Index names, the first one is the reference category
+        store (FeatureStore, optional): Features of past events
+    """
+
+    def __init__(self, closes, interest_rate, indices=None, store=None):
+        self.closes = closes
+        self.interest_rate = interest_rate
+        self.indices = list(indices or closes)
+        self.store = store
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_tables(cls, df_stock, rates, store=None):
+        """
+        State from the one-hot stock table and the raw ECB rate series.
+
+        Args:
+            df_stock (pd.DataFrame): Date-indexed table with 'Close' and
+                'Index_<name>' columns or a categorical 'Index' column
+                (onehot stage)
+            rates (pd.Series): Deposit facility rate by date of change
+                (rates.load_rate_series); its latest value is the rate in
+                force. The rates stage table is not used: its rows are press
+                release days and lag the rate decided at the last meeting
+            store (FeatureStore, optional): Features of past events
+        """
+        codes, names = instrument_codes(df_stock)
+        closes = {}
+        for code, name in enumerate(names):
+            rows = df_stock.loc[codes == code].sort_index()
+            closes[name] = (rows.index.to_numpy(), rows['Close'].to_numpy(dtype=np.float64))
+        interest_rate = float(rates.dropna().sort_index().iloc[-1])
+        return cls(closes, interest_rate, names, store)
+
+    def update_close(self, index, date, close):
+        """Append (or replace) the close of `index` on `date`"""
+        date = np.datetime64(pd.Timestamp(date).normalize(), 'ns')
+        with self._lock:
+            dates, values = self.closes[index]
+            keep = dates != date
+            dates, values = np.append(dates[keep], date), np.append(values[keep], float(close))
+            order = np.argsort(dates, kind='stable')
+            self.closes[index] = (dates[order], values[order])
+
+    def stored_event(self, index, date):
+        """Feature store row of a past event as a dict, None if it is not stored"""
+        if self.store is None or date is None:
+            return None
+        try:
+            return self.store.lookup(date, index)
+        except KeyError:
+            return None
+
+    def last_closes(self, index, n, date=None):
+        """The last `n` closes of `index`, strictly before `date` if given (oldest first)"""
+        if index not in self.closes:
+            raise KeyError(f"Unknown index '{index}'. Known: {self.indices}")
+        dates, values = self.closes[index]
+        stop = len(dates) if date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(date), 'ns'))
+        if stop < n:
+            raise ValueError(f"Not enough closes of {index} before {date}")
+        return values[stop - n:stop]
+
+
+def event_features(event, state, feature_columns):
+    """
+    Feature row of one event in `feature_columns` order.
+
+    Args:
+        event (dict): 'index' and 'interest_rate_change', optional 'date'
+            (closes strictly before it are used), 'interest_rate_old'
+            (defaults to the state's rate), 'sentiment' (column -> score)
+            and 'closes' (Close_t-4 ... Close_t-1 instead of the state).
+            Events stored in the state's feature store default to their
+            stored features, so 'interest_rate_change' may be omitted
+        state (MarketState): Cached closes and interest rate
+        feature_columns (list): Feature order of the predictor
+
+    Returns:
+        tuple: (feature row as np.ndarray, reference close Close_t-1)
+    """
+    n_closes = len(PRICE_COLUMNS) + 1
+    closes = event.get('closes')
+    stored = state.stored_event(event['index'], event.get('date')) if closes is None else None
+    if stored is not None:
+        # Precomputed percentage features of a past event
+        reference = stored[REFERENCE_COLUMN]
+        values = {col: stored[col] for col in PRICE_COLUMNS}
+        values.update({col: stored[col] for col in SENTIMENT_COLUMNS if col in stored})
+        rate_old, rate_change = stored['Interest Rate_Old'], stored['Interest Rate_Change']
+    else:
+        if closes is None:
+            closes = state.last_closes(event['index'], n_closes, event.get('date'))
+        closes = np.asarray(closes, dtype=np.float64)
+        if closes.shape != (n_closes,):
+            raise ValueError(f"'closes' needs {n_closes} values ({', '.join(PRICE_COLUMNS + [REFERENCE_COLUMN])})")
+        reference = closes[-1]
+        values = dict(zip(lag_columns(n_closes)[:-1], (closes[:-1] - reference) / reference * 100))
+        rate_old, rate_change = state.interest_rate, None
+
+    for name in state.indices:
+        values[f'Index_{name}'] = 1.0 if name == event['index'] else 0.0
+    values['Interest Rate_Old'] = float(event.get('interest_rate_old', rate_old))
+    values['Interest Rate_Change'] = float(event['interest_rate_change'] if rate_change is None
+                                           else event.get('interest_rate_change', rate_change))
+    values.update({col: float(score) for col, score in (event.get('sentiment') or {}).items()
+                   if col in SENTIMENT_COLUMNS})
+
+    missing = [col for col in feature_columns if col not in values]
+    if missing:
+        raise ValueError(f"Event is missing features {missing}")
+    return np.array([values[col] for col in feature_columns]), reference
+
+
+def validate_events(events, state):
+    """
+    Check a batch of events before any feature is assembled.
+
+    Args:
+        events (list): Events as accepted by `event_features`
+        state (MarketState): Known indices and stored events
+
+    Raises:
+        ValueError: Naming the first event that is not a dict, has an
+            unknown index, or has no numeric 'interest_rate_change' while
+            its 'date' is not a stored event
+    """
+    if not isinstance(events, list) or not events:
+        raise ValueError("'events' must be a non-empty list of events")
+    for i, event in enumerate(events):
+        if not isinstance(event, dict):
+            raise ValueError(f"Event {i} must be an object, got {type(event).__name__}")
+        index = event.get('index')
+        if index not in state.indices:
+            raise ValueError(f"Event {i} has unknown index {index!r}. Known: {state.indices}")
+        change = event.get('interest_rate_change')
+        if change is None:
+            stored = None if event.get('closes') is not None else state.stored_event(index, event.get('date'))
+            if stored is None:
+                raise ValueError(f"Event {i} needs 'interest_rate_change' unless its 'date' is a stored event")
+        elif isinstance(change, bool) or not isinstance(change, numbers.Real):
+            raise ValueError(f"Event {i} has non-numeric 'interest_rate_change' {change!r}")
+
+
+def predict_events(predictor, state, events):
+    """
+    Predictions for a batch of events.
+
+    Returns:
+        list: One dict per event with the index, 'reference_close' and per
+        target the percentage change and the implied close
+
+    Raises:
+        ValueError: If the batch fails `validate_events`
+    """
+    validate_events(events, state)
+    rows = [event_features(event, state, predictor.feature_columns) for event in events]
+    X = np.array([row for row, _ in rows])
+    pct = predictor.predict(X)
+    results = []
+    for event, (_, reference), values in zip(events, rows, pct):
+        results.append({
+            'index': event['index'],
+            'reference_close': reference,
+            'change_pct': dict(zip(predictor.targets, values.tolist())),
+            'close': dict(zip(predictor.targets, (reference * (1 + values / 100)).tolist()))
+        })
+    return results
+
+
+class LatencyStats:
+    """Latencies of the most recent requests"""
+
+    def __init__(self, size=10000):
+        self._values = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, seconds):
+        with self._lock:
+            self._values.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            values = np.array(self._values)
+        if not len(values):
+            return {'requests': self.count}
+        p50, p90, p99 = np.percentile(values, [50, 90, 99]) * 1000
+        return {'requests': self.count, 'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99,
+                'max_ms': values.max() * 1000}
+
+
+def make_handler(predictor, state, latency):
+    """Request handler class bound to a predictor and market state"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, payload, started):
+            elapsed = time.perf_counter() - started
+            latency.add(elapsed)
+            payload['latency_ms'] = elapsed * 1000
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('X-Latency-Ms', f"{elapsed * 1000:.3f}")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            started = time.perf_counter()
+            if self.path != '/health':
+                return self._send(404, {'error': f"Unknown path {self.path}"}, started)
+            self._send(200, {'variant': predictor.variant, 'targets': predictor.targets,
+                             'features': predictor.feature_columns, 'indices': state.indices,
+                             'interest_rate': state.interest_rate, 'latency': latency.summary()}, started)
+
+        def do_POST(self):
+            started = time.perf_counter()
+            if self.path != '/predict':
+                return self._send(404, {'error': f"Unknown path {self.path}"}, started)
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                events = request.get('events') if isinstance(request, dict) else request
+                self._send(200, {'predictions': predict_events(predictor, state, events)}, started)
+            except (KeyError, ValueError, TypeError) as e:
+                self._send(400, {'error': str(e.args[0]) if e.args else repr(e)}, started)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(predictor, state, host="127.0.0.1", port=8000):
+    """
+    Serve predictions over HTTP until interrupted.
+
+    Returns:
+        ThreadingHTTPServer: The server (after shutdown)
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(predictor, state, LatencyStats()))
+    print(f"Serving {predictor.variant} ({', '.join(predictor.targets)}) on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return server
@@ -0,0 +1,241 @@
+"""
+Bootstrap confidence intervals and permutation tests for the dataset variants.
+
+One train/test split with 15 test rows cannot show whether the sentiment
+features help. Two resampling tests over all ECB meetings can:
+
+    bootstrap    meetings are drawn with replacement, every variant is
+                 refitted on the drawn meetings and scored on the meetings
+                 not drawn (out of bag). All variants share the draws, so
+                 the MSE difference to the reference variant is paired.
+    permutation  the sentiment columns are shuffled between meetings and
+                 the meeting-fold cross-validated MSE of every variant is
+                 compared with the unshuffled one. A small p-value means
+                 the sentiment carries information beyond chance.
+
+No refit reads the rows: the training statistics of a resample are the
+per-meeting sufficient statistics weighted by how often each meeting was
+drawn (backtest.DateStats), those of a fold are the totals minus the
+held-out meetings, and the scaler comes from the same statistics.
+Resamples run in blocks on worker processes until `time_budget` seconds
+have passed; a block stops early at the deadline, so a tight budget gives
+fewer resamples instead of a longer run.
+"""
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from stock_pipeline.backtest import DateStats, _fit_predict
+from stock_pipeline.datasets import BASE_COLUMNS, VARIANTS
+from stock_pipeline.search import kfold_indices, parallel_map
+from stock_pipeline.training import DEFAULT_MODELS, FeatureMatrix
+
+
+def scores(y, pred):
+    """MSE and R² (0 for a constant target, like modeling.r2) per target"""
+    residual = np.sum((y - pred) ** 2, axis=0)
+    total = np.sum((y - y.mean(axis=0)) ** 2, axis=0)
+    r2 = np.where(total > 0, 1 - residual / np.where(total > 0, total, 1.0), 0.0)
+    return residual / len(y), r2
+
+
+def extra_columns(matrix, variant):
+    """Positions of the columns a variant adds to the base features"""
+    base = set(matrix.variant_index(BASE_COLUMNS).tolist())
+    return np.array([i for i in matrix.variant_index(variant) if i not in base], dtype=np.intp)
+
+
+def cv_scores(matrix, index, model, params, folds, date_stats=None):
+    """
+    Cross-validated MSE and R² per target over contiguous meeting folds.
+
+    Args:
+        matrix (FeatureMatrix): Features and targets
+        index (np.ndarray): Feature positions of the variant
+        model (str): 'BayesianRidge', 'Ridge' or 'LinearRegression'
+        params (dict): Parameters, shared or per target
+        folds (int): Number of meeting folds
+        date_stats (DateStats, optional): Precomputed statistics of `matrix`
+
+    Returns:
+        tuple: (mse, r2), each of shape (targets,), pooled over all rows
+    """
+    date_stats = date_stats or DateStats(matrix.X, matrix.Y, matrix.dates)
+    total = date_stats.total()
+    pred = np.empty_like(matrix.Y)
+    for fold in kfold_indices(len(date_stats.dates), folds):
+        start, stop = fold[0], fold[-1] + 1
+        rows = (date_stats.codes >= start) & (date_stats.codes < stop)
+        pred[rows] = _fit_predict(total - date_stats.window(start, stop), index, model, params,
+                                  matrix.targets, matrix.X[rows])
+    return scores(matrix.Y, pred)
+
+
+def _bootstrap_block(matrix, indices, model, params, rng, n, deadline):
+    """Out-of-bag MSE and R² of `n` resamples, each of shape (done, variants, targets)"""
+    date_stats = DateStats(matrix.X, matrix.Y, matrix.dates)
+    n_dates = len(date_stats.dates)
+    mse, r2 = [], []
+    for _ in range(n):
+        if time.time() > deadline:
+            break
+        counts = np.bincount(rng.integers(0, n_dates, n_dates), minlength=n_dates)
+        oob = counts[date_stats.codes] == 0
+        if not oob.any():
+            continue
+        stats = date_stats.weighted(counts)
+        results = [scores(matrix.Y[oob], _fit_predict(stats, index, model, params, matrix.targets, matrix.X[oob]))
+                   for index in indices]
+        mse.append([result[0] for result in results])
+        r2.append([result[1] for result in results])
+    shape = (len(mse), len(indices), len(matrix.targets))
+    return np.reshape(mse, shape), np.reshape(r2, shape)
+
+
+def _permutation_block(matrix, indices, permuted, model, params, folds, rng, n, deadline):
+    """Cross-validated MSE of `n` permutations, shape (done, variants, targets)"""
+    codes = DateStats(matrix.X, matrix.Y, matrix.dates).codes
+    n_dates = codes.max() + 1
+    # Sentiment is one value per meeting: shuffle the meetings, taken from their first row
+    first_row = np.unique(codes, return_index=True)[1]
+    mse = []
+    for _ in range(n):
+        if time.time() > deadline:
+            break
+        rows = first_row[rng.permutation(n_dates)][codes]
+        X = matrix.X.copy()
+        X[:, permuted] = matrix.X[np.ix_(rows, permuted)]
+        shuffled = FeatureMatrix(X, matrix.Y, matrix.dates, matrix.columns, matrix.targets)
+        date_stats = DateStats(X, matrix.Y, matrix.dates)
+        mse.append([cv_scores(shuffled, index, model, params, folds, date_stats)[0] for index in indices])
+    return np.reshape(mse, (len(mse), len(indices), len(matrix.targets)))
+
+
+def _resample_task(args):
+    kind, matrix, indices, permuted, model, params, folds, seed, n, deadline = args
+    if time.time() > deadline:
+        # Blocks queued behind the deadline return at once
+        empty = np.empty((0, len(indices), len(matrix.targets)))
+        return kind, (empty, empty) if kind == 'bootstrap' else empty
+    rng = np.random.default_rng(seed)
+    if kind == 'bootstrap':
+        return kind, _bootstrap_block(matrix, indices, model, params, rng, n, deadline)
+    return kind, _permutation_block(matrix, indices, permuted, model, params, folds, rng, n, deadline)
+
+
+def _interval(values, confidence):
+    """Mean and percentile interval along the first axis (NaN without values)"""
+    if not len(values):
+        nan = np.full(values.shape[1:], np.nan)
+        return nan, nan, nan
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(values, [tail, 100 - tail], axis=0)
+    return values.mean(axis=0), low, high
+
+
+def significance(matrix, variants=None, reference='dataset_base', model='BayesianRidge', params=None,
+                 n_resamples=2000, n_permutations=1000, folds=5, confidence=0.95, time_budget=None,
+                 block_size=50, random_state=33, workers=None):
+    """
+    Bootstrap intervals and permutation p-values of every variant and target.
+
+    Args:
+        matrix (FeatureMatrix): Features and targets of all meetings
+        variants (list, optional): Variant names, defaults to all; the
+            reference is added if missing
+        reference (str): Variant the bootstrap MSE differences refer to
+        model (str): 'BayesianRidge', 'Ridge' or 'LinearRegression'
+        params (dict, optional): Parameters, shared or per target; defaults
+            to training.DEFAULT_MODELS[model]
+        n_resamples (int): Bootstrap resamples of the meetings
+        n_permutations (int): Shuffles of the sentiment columns
+        folds (int): Meeting folds of the permutation statistic
+        confidence (float): Level of the percentile intervals
+        time_budget (float, optional): Seconds for all resamples, None = no limit
+        block_size (int): Resamples per task; every block has its own
+            random stream, so results do not depend on `workers`
+        random_state (int): Seed of all blocks
+        workers (int, optional): Processes, defaults to the CPU count
+
+    Returns:
+        pd.DataFrame: One row per variant and target with the cross-validated
+        MSE/R², bootstrap mean and interval of the out-of-bag MSE/R² and of
+        the MSE difference to the reference (Delta_P: two-sided bootstrap
+        p-value), the permutation p-value (Perm_P) and the number of
+        resamples and permutations that fit into the budget
+    """
+    variants = list(VARIANTS) if variants is None else list(variants)
+    if reference not in variants:
+        variants.insert(0, reference)
+    params = DEFAULT_MODELS[model] if params is None else params
+    workers = workers or os.cpu_count() or 1
+    indices = [matrix.variant_index(variant) for variant in variants]
+    extras = [extra_columns(matrix, variant) for variant in variants]
+    permuted = np.unique(np.concatenate(extras)) if extras else np.empty(0, dtype=np.intp)
+
+    observed = [cv_scores(matrix, index, model, params, folds) for index in indices]
+
+    # Alternate the blocks of both tests so a tight budget leaves some of each
+    bootstrap_sizes = [min(block_size, n_resamples - start) for start in range(0, n_resamples, block_size)]
+    permutation_sizes = ([min(block_size, n_permutations - start) for start in range(0, n_permutations, block_size)]
+                         if len(permuted) else [])
+    seeds = iter(np.random.SeedSequence(random_state).spawn(len(bootstrap_sizes) + len(permutation_sizes)))
+    ordered = []
+    for i in range(max(len(bootstrap_sizes), len(permutation_sizes))):
+        ordered += [('bootstrap', n) for n in bootstrap_sizes[i:i + 1]]
+        ordered += [('permutation', n) for n in permutation_sizes[i:i + 1]]
+    deadline = time.time() + time_budget if time_budget else math.inf
+    tasks = [(kind, matrix, indices, permuted, model, params, folds, next(seeds), n, deadline)
+             for kind, n in ordered]
+
+    shape = (0, len(variants), len(matrix.targets))
+    boot_mse, boot_r2, null_mse = [np.empty(shape)], [np.empty(shape)], [np.empty(shape)]
+    for kind, result in parallel_map(_resample_task, tasks, min(workers, max(len(tasks), 1))):
+        if kind == 'bootstrap':
+            boot_mse.append(result[0])
+            boot_r2.append(result[1])
+        else:
+            null_mse.append(result)
+    boot_mse, boot_r2, null_mse = (np.concatenate(values) for values in (boot_mse, boot_r2, null_mse))
+
+    ref = variants.index(reference)
+    delta = boot_mse - boot_mse[:, [ref]]
+    mse_mean, mse_low, mse_high = _interval(boot_mse, confidence)
+    r2_mean, r2_low, r2_high = _interval(boot_r2, confidence)
+    delta_mean, delta_low, delta_high = _interval(delta, confidence)
+
+    results = []
+    for v, variant in enumerate(variants):
+        for t, target in enumerate(matrix.targets):
+            cv_mse = observed[v][0][t]
+            if v != ref and len(delta):
+                delta_p = min(1.0, 2 * min(np.mean(delta[:, v, t] <= 0), np.mean(delta[:, v, t] >= 0)))
+            else:
+                delta_p = np.nan
+            tested = len(extras[v]) > 0 and len(null_mse) > 0
+            results.append({
+                'Variant': variant,
+                'Target': target,
+                'Model': model,
+                'CV_MSE': cv_mse,
+                'CV_R2': observed[v][1][t],
+                'Boot_MSE': mse_mean[v, t],
+                'Boot_MSE_Low': mse_low[v, t],
+                'Boot_MSE_High': mse_high[v, t],
+                'Boot_R2': r2_mean[v, t],
+                'Boot_R2_Low': r2_low[v, t],
+                'Boot_R2_High': r2_high[v, t],
+                'Reference': reference,
+                'Delta_MSE': delta_mean[v, t],
+                'Delta_MSE_Low': delta_low[v, t],
+                'Delta_MSE_High': delta_high[v, t],
+                'Delta_P': delta_p,
+                'Perm_MSE': null_mse[:, v, t].mean() if tested else np.nan,
+                'Perm_P': (1 + np.sum(null_mse[:, v, t] <= cv_mse)) / (1 + len(null_mse)) if tested else np.nan,
+                'Resamples': len(boot_mse),
+                'Permutations': len(null_mse) if len(extras[v]) else 0
+            })
+    return pd.DataFrame(results)
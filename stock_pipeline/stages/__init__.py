@@ -0,0 +1,37 @@
+"""
+Pipeline stages as importable functions.
+
+Every stage module has a DEFAULT_CONFIG dict and a `run(config, root)`
+function. Importing a stage has no side effects; the numbered scripts and
+the command line interface only call `run`.
+"""
+
+# Command name -> stage module, imported on demand
+STAGES = {
+    "download": "stock_pipeline.stages.download",
+    "extract": "stock_pipeline.stages.extract",
+    "rates": "stock_pipeline.stages.rates",
+    "onehot": "stock_pipeline.stages.onehot",
+    "sentiment": "stock_pipeline.stages.sentiment",
+    "build": "stock_pipeline.stages.build",
+    "intraday": "stock_pipeline.stages.intraday",
+    "tune": "stock_pipeline.stages.tune",
+    "train": "stock_pipeline.stages.train",
+    "compare": "stock_pipeline.stages.compare",
+    "backtest": "stock_pipeline.stages.backtest",
+    "significance": "stock_pipeline.stages.significance",
+    "serve": "stock_pipeline.stages.serve",
+    "bench": "stock_pipeline.stages.bench",
+}
+
+# Width of the stage column in reports
+NAME_WIDTH = max(len(name) for name in STAGES)
+
+
+def load_stage(name):
+    """Import the module of a stage by its command name"""
+    import importlib
+
+    if name not in STAGES:
+        raise KeyError(f"Unknown stage '{name}'. Choose one of {list(STAGES)}")
+    return importlib.import_module(STAGES[name])
@@ -0,0 +1,86 @@
+"""
+Stage 5c: walk-forward backtests over the ECB meetings.
+
+Scores every variant and model with expanding and sliding training windows
+(see stock_pipeline.backtest) and, for comparison, the balanced random
+split of the training notebook over many seeds. Reads the feature store
+of the build stage by default.
+"""
+import os
+
+from stock_pipeline import storage
+from stock_pipeline.config import merge_config, resolve_path
+from stock_pipeline.datasets import BASE_COLUMNS, SENTIMENT_COLUMNS, VARIANTS
+
+DEFAULT_CONFIG = {
+    "input_folder": "03_Dataset Creation/Datasets",
+    "table": "dataset",                             # complete dataset with all sentiment columns
+    "feature_store": "feature_store",               # store of the build stage, None = read `table`
+    "variants": list(VARIANTS),                     # variants to evaluate
+    "models": None,                                 # model -> params (per target or shared), None = training.DEFAULT_MODELS
+    "windows": ["expanding", 8, 12],                # 'expanding' or sliding window length in meetings
+    "min_train": 8,                                 # meetings before the first prediction
+    "n_seeds": 100,                                 # random splits (seeds 0..n-1) to compare with, 0 = none
+    "test_size": 15,                                # test rows of a random split
+    "workers": None,                                # processes, None = CPU count
+    "output_folder": "05_Model Training",
+    "table_name": "backtest_results",
+    "storage_format": "parquet",                    # 'parquet', 'feather' or 'excel'
+    "excel_export": False                           # Also write an .xlsx copy
+}
+
+
+def inputs(config, root=None):
+    """Feature store or complete dataset (path without extension)"""
+    return [os.path.join(resolve_path(root, config['input_folder']), config['feature_store'] or config['table'])]
+
+
+def outputs(config, root=None):
+    """Backtest table (path without extension)"""
+    return [os.path.join(resolve_path(root, config['output_folder']), config['table_name'])]
+
+
+def run(config=None, root=None):
+    """
+    Run the walk-forward backtests and random split comparison.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        pd.DataFrame: One row per scheme, window, seed, variant, model and
+        target (see backtest.backtest)
+    """
+    from stock_pipeline.backtest import backtest, backtest_configs
+    from stock_pipeline.feature_store import FeatureStore
+    from stock_pipeline.training import DEFAULT_MODELS, FeatureMatrix
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    input_folder = resolve_path(root, config['input_folder'])
+    if config['feature_store']:
+        frame = FeatureStore.load(input_folder, config['feature_store'], fmt=config['storage_format'])
+        matrix = frame.matrix(BASE_COLUMNS + SENTIMENT_COLUMNS)
+    else:
+        frame = storage.read_table(input_folder, config['table'], fmt=config['storage_format'],
+                                   index_col='Date', date_columns=['Date'])
+        matrix = FeatureMatrix.from_frame(frame)
+
+    configs = backtest_configs(config['variants'], config['models'] or DEFAULT_MODELS, config['windows'])
+    print(f"Backtesting {len(configs)} configurations over {matrix.dates.normalize().nunique()} meetings"
+          f" and {config['n_seeds']} random splits")
+    df_results = backtest(matrix, configs, config['min_train'], seeds=range(config['n_seeds']),
+                          frame=frame, test_size=config['test_size'], workers=config['workers'])
+    output_path = storage.write_table(df_results, resolve_path(root, config['output_folder']),
+                                      config['table_name'], fmt=config['storage_format'],
+                                      excel_export=config['excel_export'])
+
+    summary = (df_results.groupby(['Target', 'Model', 'Window'])
+               .agg(MSE=('MSE', 'mean'), MSE_Std=('MSE', 'std'), Baseline_MSE=('Baseline_MSE', 'mean'))
+               .reset_index())
+    print("\n" + "=" * 80)
+    print("BACKTEST SUMMARY (mean over variants and seeds):")
+    print("=" * 80)
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\n✅ File saved: {output_path}")
+    return df_results
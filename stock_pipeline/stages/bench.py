@@ -0,0 +1,64 @@
+"""
+Benchmark the pipeline stages on synthetic data at 10x, 100x and 1000x scale,
+and the startup time of every entry point ('startup' in `benchmarks`).
+
+Results are appended to a JSON lines file and compared with the previous
+run (see stock_pipeline.benchmark).
+"""
+from stock_pipeline.config import merge_config, resolve_path
+
+DEFAULT_CONFIG = {
+    "benchmarks": None,                             # names in benchmark.BENCHMARKS and 'startup', None = all
+    "scales": [10, 100, 1000],                      # multiples of the sample data
+    "repeat": 3,                                    # timed runs per benchmark and scale
+    "max_seconds": 120,                             # skip scales estimated to take longer per run
+    "startup_repeat": 10,                           # fresh interpreters per entry point
+    "startup_limit_ms": 200,                        # startup time flagged as too slow
+    "results_file": "benchmarks/results.jsonl",
+    "regression_threshold": 1.25                    # wall time ratio flagged against the previous run
+}
+
+
+def run(config=None, root=None):
+    """
+    Run the benchmarks, store the results and report regressions.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        list: The new result records
+    """
+    from datetime import datetime
+
+    from stock_pipeline.benchmark import append_results, compare_runs, load_results, run_startup, run_suite
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    results_file = resolve_path(root, config['results_file'])
+    names = config['benchmarks']
+    run_id = datetime.now().strftime('%Y%m%dT%H%M%S')
+    records = []
+    suite = None if names is None else [name for name in names if name != 'startup']
+    if suite is None or suite:
+        records += run_suite(suite, config['scales'], config['repeat'], config['max_seconds'], run_id=run_id)
+    if names is None or 'startup' in names:
+        print()
+        records += run_startup(repeat=config['startup_repeat'], limit_ms=config['startup_limit_ms'],
+                               run_id=run_id)
+        slow = [record['benchmark'] for record in records if record.get('over_limit')]
+        if slow:
+            print(f"⚠️ {len(slow)} entry point(s) start slower than {config['startup_limit_ms']} ms: "
+                  f"{', '.join(slow)}")
+    append_results(records, results_file)
+    print(f"\n✅ Results appended to: {results_file}")
+
+    comparison = compare_runs(load_results(results_file), threshold=config['regression_threshold'])
+    if not comparison.empty:
+        print(f"\nCompared with run {comparison['baseline_id'].iloc[0]}:")
+        print(comparison[['benchmark', 'scale', 'wall_s_baseline', 'wall_s', 'ratio', 'regression']]
+              .to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        regressions = comparison[comparison['regression']]
+        if len(regressions):
+            print(f"⚠️ {len(regressions)} regression(s) above {config['regression_threshold']}x")
+    return records
@@ -0,0 +1,288 @@
+"""
+Stage 3: build the event window dataset and its variants.
+
+With alignment 'exact' only press release days that are trading days become
+events. With 'asof' a press release day on a non-trading day is priced on
+the next trading day (within event_tolerance), and the interest rate and
+sentiment of the latest press release at or before each event are joined
+in one sorted pass (see stock_pipeline.alignment). Moved and dropped days
+are reported in both modes.
+
+The events are also written as a feature store (stock_pipeline.feature_store)
+that compare, backtest and serve read instead of recomputing the features.
+
+With `partition` ('year' or 'instrument') the stock table is read and the
+outputs are written one partition at a time (see stock_pipeline.partitioned),
+so memory stays bounded for large universes. This needs a columnar
+storage_format. Instrument partitions are merged into date order one year
+of events at a time, so both modes give the same tables. Partitioned
+builds write no .xlsx copies unless excel_export is set, and tables beyond
+the Excel row limit never get one.
+"""
+import os
+
+from stock_pipeline import metrics, storage
+from stock_pipeline.config import merge_config, resolve_path
+from stock_pipeline.datasets import BASE_COLUMNS, SENTIMENT_COLUMNS, VARIANTS
+
+DEFAULT_CONFIG = {
+    "input_folder_interest": "02_Preprocessing/Interest_Rate_Preprocessed",
+    "interest_table": "interest_rate_2022_2025",
+    "input_folder_stock": "02_Preprocessing/Stock_Preprocessed",
+    "stock_table": "stock_data_combined_onehot",
+    "input_folder_sentiment": "02_Preprocessing/KAGGLE_Sentiment-Analysis",
+    "sentiment_file": "ecb_sentiment_analysis.xlsx",
+    "output_folder": "03_Dataset Creation/Datasets",
+    "table_name": "DS_14_t_3days_complete",
+    "store_name": "feature_store",                  # precomputed features by (date, index)
+    "storage_format": "parquet",                    # 'parquet', 'feather' or 'excel'
+    "excel_export": None,                           # .xlsx copies for the Kaggle notebooks, None = unless partitioned
+    "remove_dates": ['2024-12-12', '2022-06-09'],  # Outliers to remove
+    "n_lags": 14,                                   # Close_t-14 ... Close_t-1
+    "n_leads": 3,                                   # Close_t+1 ... Close_t+3
+    "alignment": "exact",                           # 'exact' or 'asof' (next trading day, as-of joins)
+    "event_tolerance": "4D",                        # asof: largest gap between press release and event day
+    "partition": None                               # None (in memory), 'year' or 'instrument' (out-of-core)
+}
+
+
+def load_sentiment(path):
+    """Date-indexed sentiment scores of the sentiment notebook export"""
+    import pandas as pd
+
+    df_sentiment = pd.read_excel(path).iloc[:-1]
+    df_sentiment['Date'] = pd.to_datetime(df_sentiment['Date'], format='%d_%B_%Y')
+    return df_sentiment.set_index('Date')
+
+
+def inputs(config, root=None):
+    """Interest rate and stock tables (paths without extension) and the sentiment export"""
+    return [os.path.join(resolve_path(root, config['input_folder_interest']), config['interest_table']),
+            os.path.join(resolve_path(root, config['input_folder_stock']), config['stock_table']),
+            os.path.join(resolve_path(root, config['input_folder_sentiment']), config['sentiment_file'])]
+
+
+def outputs(config, root=None):
+    """Complete dataset and all variants (paths without extension)"""
+    output_folder = resolve_path(root, config['output_folder'])
+    return [os.path.join(output_folder, name)
+            for name in [config['table_name'], config['store_name']] + list(VARIANTS)]
+
+
+def prepare_stock(df_stock):
+    """One-hot instrument columns as float (in place), returns the table"""
+    from stock_pipeline.instruments import ONEHOT_PREFIX
+
+    onehot_cols = [col for col in df_stock.columns if col.startswith(ONEHOT_PREFIX)]
+    df_stock[onehot_cols] = df_stock[onehot_cols].astype(float)
+    return df_stock
+
+
+def event_days(release_days, sessions, config):
+    """
+    Trading day of every press release day, reporting moved and dropped days.
+
+    Args:
+        release_days (pd.DatetimeIndex): Press release days
+        sessions (pd.DatetimeIndex): Trading days of the stock table
+        config (dict): Build config (alignment, event_tolerance)
+
+    Returns:
+        pd.DatetimeIndex: Distinct event days
+    """
+    from stock_pipeline.alignment import ALIGNMENTS, TradingCalendar, match_report
+
+    if config['alignment'] == 'asof':
+        days = TradingCalendar(sessions).roll(release_days, 'forward', config['event_tolerance'])
+    elif config['alignment'] == 'exact':
+        days = release_days.where(release_days.isin(sessions))
+    else:
+        raise ValueError(f"Unknown alignment '{config['alignment']}'. Choose one of {list(ALIGNMENTS)}")
+    report = match_report(release_days, days)
+    for day, session in report['moved']:
+        print(f"Press release day {day:%Y-%m-%d} is priced on {session:%Y-%m-%d}")
+    if report['dropped']:
+        print(f"⚠️ {len(report['dropped'])} press release days without trading day dropped: "
+              f"{', '.join(day.strftime('%Y-%m-%d') for day in report['dropped'])}")
+    return days.dropna().unique()
+
+
+def add_event_columns(df_neu, common_dates, df_interest, df_sentiment, config):
+    """
+    Variant one-hot columns (categorical stock tables), interest rate and
+    sentiment of the event windows.
+
+    Returns:
+        pd.DataFrame: The completed event table
+    """
+    from stock_pipeline.alignment import AsofSource, align
+    from stock_pipeline.instruments import INSTRUMENT_COLUMN, ONEHOT_PREFIX, OneHotView
+
+    if INSTRUMENT_COLUMN in df_neu.columns:
+        # Categorical stock table: only the one-hot columns the variants use, on the event rows
+        used = [col for col in BASE_COLUMNS if col.startswith(ONEHOT_PREFIX)]
+        view = OneHotView.from_frame(df_neu)
+        position = df_neu.columns.get_loc(INSTRUMENT_COLUMN)
+        for offset, col in enumerate(used):
+            df_neu.insert(position + 1 + offset, col, view.toarray([col])[:, 0])
+
+    if config['alignment'] == 'asof':
+        tolerance = config['event_tolerance']
+        return align(df_neu, [
+            AsofSource(df_interest, ['Interest Rate_Old', 'Interest Rate_Change'], tolerance),
+            AsofSource(df_sentiment, SENTIMENT_COLUMNS, tolerance)])
+    df_neu['Interest Rate_Old'] = df_interest.loc[common_dates, 'Interest Rate_Old']
+    df_neu['Interest Rate_Change'] = df_interest.loc[common_dates, 'Interest Rate_Change']
+    for col in SENTIMENT_COLUMNS:
+        df_neu[col] = df_neu.index.map(df_sentiment[col])
+    return df_neu
+
+
+def run_partitioned(config, root, df_interest, df_sentiment):
+    """
+    Build partition by partition, appending every partition to the outputs.
+
+    Only two partitions (year mode) or one (instrument mode) plus the
+    lag/lead halo are held in memory.
+
+    Returns:
+        dict: Output name -> path of the written table
+    """
+    import pandas as pd
+
+    from stock_pipeline.datasets import build_variants
+    from stock_pipeline.feature_store import FeatureStore
+    from stock_pipeline.partitioned import (PARTITIONS, partitioned_event_windows, sort_by_date,
+                                            stock_partitions, table_instruments)
+
+    by = config['partition']
+    fmt = config['storage_format']
+    if by not in PARTITIONS:
+        raise ValueError(f"Unknown partitioning '{by}'. Choose one of {list(PARTITIONS)}")
+    if fmt == 'excel':
+        print("⚠️ Excel stock tables are read completely; use a columnar storage_format for out-of-core builds")
+
+    output_folder = resolve_path(root, config['output_folder'])
+    stock_folder = resolve_path(root, config['input_folder_stock'])
+    sessions = pd.DatetimeIndex(storage.column_values(stock_folder, config['stock_table'], 'Date', fmt))
+    common_dates = event_days(df_interest.index, sessions, config)
+    instruments = table_instruments(stock_folder, config['stock_table'], fmt)
+
+    partitions = ((label, prepare_stock(df_part))
+                  for label, df_part in stock_partitions(stock_folder, config['stock_table'], by, fmt))
+    events = partitioned_event_windows(partitions, common_dates, instruments,
+                                       n_lags=config['n_lags'], n_leads=config['n_leads'],
+                                       halo=by == 'year')
+
+    # Instrument partitions arrive by instrument, then date: write them aside and merge by date below
+    names = [config['table_name']] + list(VARIANTS)
+    parts = {name: f"{name}.unsorted" if by == 'instrument' else name
+             for name in names + [config['store_name']]}
+    writers = {name: storage.TableWriter(output_folder, parts[name], fmt, index=name in names)
+               for name in parts}
+    events_total = 0
+    for label, df_part in events:
+        if df_part.empty:
+            continue
+        with metrics.item('partition', str(label)):
+            df_part = add_event_columns(df_part, common_dates, df_interest, df_sentiment, config)
+            writers[config['table_name']].write(df_part)
+            for name, df in build_variants(df_part, config['remove_dates']).items():
+                writers[name].write(df)
+            store = FeatureStore.from_events(df_part, config['remove_dates'])
+            writers[config['store_name']].write(store.to_frame())
+        events_total += len(df_part)
+        print(f"Partition {label}: {len(df_part)} events")
+
+    paths = {name: writer.close() for name, writer in writers.items()}
+    if by == 'instrument' and events_total:
+        # Stable, so each date keeps the instrument order like the in-memory build
+        for name, part in parts.items():
+            paths[name] = sort_by_date(output_folder, part, name, fmt)
+            os.remove(storage.table_path(output_folder, part, fmt))
+    if config['excel_export'] and events_total:
+        for name in names:
+            storage.export_excel(output_folder, name, fmt)
+    print(f"\ndf_neu dimensions: {events_total} rows in {len(paths)} tables")
+    peak = metrics.max_rss_bytes()
+    if peak is not None:
+        print(f"Peak memory: {peak / 2 ** 20:.0f} MiB")
+    for path in paths.values():
+        print(f"✅ File saved: {path}")
+    return paths
+
+
+def run(config=None, root=None):
+    """
+    Build the complete dataset and export all variants.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        dict: Variant name -> DataFrame, plus the complete table under
+        config['table_name']; with `partition` output name -> path instead
+    """
+    from stock_pipeline.datasets import build_variants
+    from stock_pipeline.feature_store import FeatureStore
+    from stock_pipeline.instruments import instrument_codes
+    from stock_pipeline.windows import build_event_windows
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    if config['excel_export'] is None:
+        config['excel_export'] = not config['partition']
+    output_folder = resolve_path(root, config['output_folder'])
+
+    # Load and prepare data
+    df_interest = storage.read_table(resolve_path(root, config['input_folder_interest']),
+                                     config['interest_table'], fmt=config['storage_format'],
+                                     index_col='Date', date_columns=['Date'])
+    df_sentiment = load_sentiment(
+        f"{resolve_path(root, config['input_folder_sentiment'])}/{config['sentiment_file']}")
+    if config['partition']:
+        return run_partitioned(config, root, df_interest, df_sentiment)
+
+    df_stock = prepare_stock(storage.read_table(resolve_path(root, config['input_folder_stock']),
+                                                config['stock_table'], fmt=config['storage_format'],
+                                                index_col='Date', date_columns=['Date']))
+    group_codes, _ = instrument_codes(df_stock)
+
+    # Trading day of every press release day
+    common_dates = event_days(df_interest.index, df_stock.index, config)
+
+    # Create base dataset with historical and future prices per index
+    df_neu = build_event_windows(df_stock, common_dates,
+                                 n_lags=config['n_lags'], n_leads=config['n_leads'],
+                                 group_codes=group_codes)
+
+    # Add interest rate and sentiment data
+    df_neu = add_event_columns(df_neu, common_dates, df_interest, df_sentiment, config)
+
+    # Save complete dataset
+    storage.write_table(df_neu, output_folder, config['table_name'], fmt=config['storage_format'],
+                        index=True, excel_export=config['excel_export'])
+
+    print("df_neu (final dataset):")
+    print(df_neu)
+    print(f"\ndf_neu dimensions: {df_neu.shape[0]} rows × {df_neu.shape[1]} columns")
+
+    # Create and export the dataset variants
+    datasets = build_variants(df_neu, config['remove_dates'])
+
+    print("\nExporting dataset variants...")
+    for name, df in datasets.items():
+        with metrics.item('variant', name):
+            storage.write_table(df, output_folder, name, fmt=config['storage_format'],
+                                index=True, excel_export=config['excel_export'])
+
+    store = FeatureStore.from_events(df_neu, config['remove_dates'])
+    store.save(output_folder, config['store_name'], fmt=config['storage_format'])
+    print(f"Feature store: {len(store)} events × {len(store.columns)} columns")
+
+    print("All datasets exported successfully!")
+    for name, df in datasets.items():
+        print(f"{name} Shape: {df.shape}")
+
+    datasets[config['table_name']] = df_neu
+    return datasets
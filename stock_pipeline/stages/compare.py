@@ -0,0 +1,90 @@
+"""
+Stage 5b: compare every dataset variant, target and model in one run.
+
+Loads the complete dataset once (from the feature store of the build
+stage by default) and evaluates all variants as column views of the same
+standardized feature matrix (see stock_pipeline.training) on the
+train/test split of the training stage.
+"""
+import os
+
+from stock_pipeline import storage
+from stock_pipeline.config import merge_config, resolve_path
+from stock_pipeline.datasets import BASE_COLUMNS, SENTIMENT_COLUMNS, VARIANTS
+
+DEFAULT_CONFIG = {
+    "input_folder": "03_Dataset Creation/Datasets",
+    "table": "dataset",                             # complete dataset with all sentiment columns
+    "feature_store": "feature_store",               # store of the build stage, None = read `table`
+    "variants": list(VARIANTS),                     # variants to evaluate
+    "models": None,                                 # model -> params (per target or shared), None = training.DEFAULT_MODELS
+    "test_size": 15,                                # test rows (three indices per date)
+    "random_state": 33,
+    "fixed_test_dates": None,                       # e.g. ['2024-01-25', ...] instead of a random split
+    "output_folder": "05_Model Training",
+    "table_name": "variant_comparison",
+    "storage_format": "parquet",                    # 'parquet', 'feather' or 'excel'
+    "excel_export": False                           # Also write an .xlsx copy
+}
+
+
+def inputs(config, root=None):
+    """Feature store or complete dataset (path without extension)"""
+    return [os.path.join(resolve_path(root, config['input_folder']), config['feature_store'] or config['table'])]
+
+
+def outputs(config, root=None):
+    """Comparison table (path without extension)"""
+    return [os.path.join(resolve_path(root, config['output_folder']), config['table_name'])]
+
+
+def run(config=None, root=None):
+    """
+    Evaluate all variant/target/model combinations on a shared feature matrix.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        pd.DataFrame: One row per variant, target and model (see
+        training.train_variants)
+    """
+    import pandas as pd
+
+    from stock_pipeline.feature_store import FeatureStore
+    from stock_pipeline.modeling import choose_test_dates, rate_change_groups
+    from stock_pipeline.training import FeatureMatrix, train_variants
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    input_folder = resolve_path(root, config['input_folder'])
+    if config['feature_store']:
+        store = FeatureStore.load(input_folder, config['feature_store'], fmt=config['storage_format'])
+        matrix = store.matrix(BASE_COLUMNS + SENTIMENT_COLUMNS)
+        groups = store.rate_change_groups()
+    else:
+        df = storage.read_table(input_folder, config['table'], fmt=config['storage_format'],
+                                index_col='Date', date_columns=['Date'])
+        matrix = FeatureMatrix.from_frame(df)
+        groups = rate_change_groups(df.index, df['Interest Rate_Change'])
+
+    if config['fixed_test_dates']:
+        test_dates = list(pd.to_datetime(config['fixed_test_dates']))
+    else:
+        test_dates = choose_test_dates(groups, config['test_size'], config['random_state'])
+    print(f"Test dates: {', '.join(d.strftime('%Y-%m-%d') for d in sorted(test_dates))}")
+
+    df_results = (train_variants(matrix, test_dates, config['variants'], config['models'])
+                  .sort_values(by=['Target', 'Model', 'Test_MSE'])
+                  .reset_index(drop=True))
+    output_path = storage.write_table(df_results, resolve_path(root, config['output_folder']),
+                                      config['table_name'], fmt=config['storage_format'],
+                                      excel_export=config['excel_export'])
+
+    print("\n" + "=" * 80)
+    print("VARIANT COMPARISON:")
+    print("=" * 80)
+    print(df_results[['Target', 'Model', 'Variant', 'Train_MSE', 'Test_MSE', 'Train_R2', 'Test_R2']]
+          .to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\n✅ File saved: {output_path}")
+    return df_results
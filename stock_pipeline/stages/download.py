@@ -0,0 +1,477 @@
+"""
+Stage 1: download historical index data from Yahoo Finance.
+
+The optional Excel copy is written with xlsxwriter in constant-memory mode
+when it is installed (excel_engine 'auto'): rows are streamed to disk
+sheet by sheet, dates are native date cells and the column widths come
+from vectorized string lengths, so workbooks with hundreds of symbols stay
+practical. excel_engine 'openpyxl' streams the same layout with openpyxl's
+write-only mode.
+"""
+import os
+from datetime import datetime
+
+from stock_pipeline import metrics, storage
+from stock_pipeline.concurrency import PermanentError, run_bounded
+from stock_pipeline.config import merge_config, resolve_path
+from stock_pipeline.storage import EXCEL_DATE_FORMAT
+
+DEFAULT_CONFIG = {
+    "symbols": ["^GDAXI", "^MDAXI", "^SDAXI"],      # List of ticker symbols
+    "symbol_names": {                              # Display names
+        "^GDAXI": "DAX",
+        "^MDAXI": "MDAX",
+        "^SDAXI": "SDAX"
+    },
+    "start_date": "2022-06-01",                    # Start date (YYYY-MM-DD)
+    "end_date": "2025-06-15",                      # End date (YYYY-MM-DD), None = today
+    "interval": "1d",                              # Interval: '1d', '1wk', '1mo'
+    "output_dir": "01_Raw Data/yFinance API",      # Output directory
+    "excel_filename": "stock_data.xlsx",           # Excel file name
+    "table_name": "stock_data",                    # Name of the stored table
+    "storage_format": "parquet",                   # 'parquet', 'feather' or 'excel'
+    "excel_export": False,                         # Also write the Excel file
+    "excel_engine": "auto",                        # 'auto' (xlsxwriter if installed), 'xlsxwriter' or 'openpyxl'
+    "cache_dir": "01_Raw Data/yFinance API/cache", # Local bar cache (None disables it)
+    "max_workers": 8,                              # Parallel downloads (1 = sequential)
+    "timeout": 30,                                 # Seconds per request
+    "retries": 3,                                  # Retries per symbol after a failure
+    "backoff": 1.0                                 # First retry pause in seconds, doubled each retry
+}
+
+EXCEL_ENGINES = ("auto", "xlsxwriter", "openpyxl")
+NUMBER_FORMATS = {
+    "Open": "#,##0.00",
+    "High": "#,##0.00",
+    "Low": "#,##0.00",
+    "Close": "#,##0.00",
+    "Volume": "#,##0",
+}
+
+
+def resolve_excel_engine(engine="auto"):
+    """Engine name of an excel_engine setting; 'auto' prefers xlsxwriter"""
+    import importlib.util
+
+    if engine not in EXCEL_ENGINES:
+        raise ValueError(f"Unknown Excel engine '{engine}'. Choose one of {list(EXCEL_ENGINES)}")
+    if engine == "auto":
+        return "xlsxwriter" if importlib.util.find_spec("xlsxwriter") else "openpyxl"
+    if importlib.util.find_spec(engine) is None:
+        raise ValueError(f"{engine} is not installed (pip install {engine})")
+    return engine
+
+
+def excel_column_widths(df):
+    """
+    Column widths of a sheet: longest text of the column or its header + 2.
+
+    The text lengths are computed on whole columns (numpy string arrays)
+    instead of one Python call per cell. The first width is the date index.
+    """
+    import numpy as np
+
+    widths = [len(EXCEL_DATE_FORMAT) + 2]
+    for col in df.columns:
+        lengths = np.char.str_len(df[col].to_numpy().astype(str))
+        widths.append(max(int(lengths.max(initial=0)), len(str(col))) + 2)
+    return widths
+
+
+class StockDataDownloader:
+    """
+    A class to download historical stock and ETF data from Yahoo Finance.
+    
+    This class provides functionality to:
+    - Download historical data for multiple stocks/ETFs
+    - Specify custom date ranges
+    - Save data in columnar (Parquet/Feather) or Excel formats
+    - Handle different time intervals (daily, weekly, monthly)
+    - Cache bars locally and only fetch the missing tail on reruns
+    - Download many symbols concurrently with retries
+    """
+    
+    def __init__(self, output_dir, excel_filename, symbol_names=None, cache_dir=None, provider=None,
+                 excel_engine="auto"):
+        """
+        Initialize the StockDataDownloader.
+        
+        Args:
+            output_dir (str): Directory where downloaded files will be saved
+            excel_filename (str): Name of the Excel file
+            symbol_names (dict): Optional symbol name mapping
+            cache_dir (str, optional): Directory of the local bar cache. No caching if None
+            provider (optional): Data source with `history()` and `currency()` methods.
+                Defaults to Yahoo Finance; pass a fake provider to run offline
+            excel_engine (str): 'auto', 'xlsxwriter' or 'openpyxl' (see save_to_excel)
+        """
+        from stock_pipeline.market_data import BarCache, YFinanceProvider
+        
+        self.output_dir = output_dir
+        self.excel_filename = excel_filename
+        self.symbol_names = symbol_names or {}
+        self.provider = provider or YFinanceProvider()
+        self.cache = BarCache(cache_dir) if cache_dir else None
+        self.excel_engine = excel_engine
+    
+    def get_display_name(self, symbol):
+        """Get display name for symbol, fallback to original symbol if not found"""
+        return self.symbol_names.get(symbol, symbol)
+    
+    def download_data(self, symbols, start_date, end_date=None, interval='1d'):
+        """
+        Download historical data for the given symbols.
+        
+        With a cache configured only bars after each symbol's last cached
+        bar are requested; the currency is looked up once per symbol.
+        
+        Args:
+            symbols (list): List of stock/ETF symbols (e.g., ['AAPL', '^GDAXI', '^IXIC'])
+            start_date (str): Start date in 'YYYY-MM-DD' format
+            end_date (str, optional): End date in 'YYYY-MM-DD' format. Defaults to today
+            interval (str): Data interval ('1d' for daily, '1wk' for weekly, '1mo' for monthly)
+            
+        Returns:
+            dict: Dictionary containing DataFrames for each symbol and their currency
+        """
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+            
+        data = {}
+        for symbol in symbols:
+            try:
+                data[symbol] = self.download_symbol(symbol, start_date, end_date, interval)
+                display_name = self.get_display_name(symbol)
+                print(f"Successfully downloaded data for {display_name} ({data[symbol]['currency']})")
+            except PermanentError as e:
+                print(str(e))
+            except Exception as e:
+                print(f"Error downloading {symbol}: {str(e)}")
+        
+        return data
+    
+    def download_symbol(self, symbol, start_date, end_date, interval='1d', timeout=None):
+        """
+        Download (or update from cache) the data of a single symbol.
+        
+        Args:
+            symbol (str): Stock/ETF symbol
+            start_date (str): Start date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+            interval (str): Data interval
+            timeout (float, optional): Per-request timeout in seconds
+            
+        Returns:
+            dict: {'df': DataFrame, 'currency': str}
+            
+        Raises:
+            PermanentError: If the provider returns no data for the symbol
+        """
+        import pandas as pd
+        
+        from stock_pipeline.market_data import currency_with_cache, fetch_with_cache
+        
+        with metrics.item('symbol', symbol):
+            df = fetch_with_cache(self.provider, self.cache, symbol, start_date, end_date, interval, timeout)
+            if df.empty:
+                raise PermanentError(f"No data found for {symbol}")
+            df = df.copy()
+            currency = currency_with_cache(self.provider, self.cache, symbol, timeout)
+            price_columns = ['Open', 'High', 'Low', 'Close']
+            for col in price_columns:
+                if col in df.columns:
+                    df[col] = pd.to_numeric(df[col], errors='coerce').round(2)
+            metrics.count(rows_in=len(df))
+            return {'df': df, 'currency': currency}
+    
+    def download_concurrent(self, symbols, start_date, end_date=None, interval='1d',
+                            max_workers=8, timeout=30, retries=3, backoff=1.0):
+        """
+        Download many symbols in parallel on a bounded thread pool.
+        
+        Each symbol is retried with exponential backoff; symbols that still
+        fail do not stop the others and are listed in the result.
+        
+        Args:
+            symbols (list): List of stock/ETF symbols
+            start_date (str): Start date in 'YYYY-MM-DD' format
+            end_date (str, optional): End date in 'YYYY-MM-DD' format. Defaults to today
+            interval (str): Data interval
+            max_workers (int): Maximum number of downloads in flight
+            timeout (float): Per-request timeout in seconds
+            retries (int): Retries per symbol after the first attempt
+            backoff (float): Pause before the first retry, doubled every retry
+            
+        Returns:
+            BatchResult: `results` has the same layout as download_data(),
+            `failures` maps each failed symbol to a TaskFailure
+        """
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        
+        def report(symbol, item, failure):
+            display_name = self.get_display_name(symbol)
+            if failure is None:
+                print(f"Successfully downloaded data for {display_name} ({item['currency']})")
+            else:
+                print(f"Failed {display_name} after {failure.attempts} attempt(s): {failure.error}")
+        
+        return run_bounded(
+            lambda symbol: self.download_symbol(symbol, start_date, end_date, interval, timeout),
+            symbols, max_workers=max_workers, retries=retries, backoff=backoff, on_done=report
+        )
+    
+    def download_event_windows(self, symbols, windows, interval='1m', fields=('Close',),
+                               max_workers=8, timeout=30, retries=3, backoff=1.0,
+                               timezone='Europe/Berlin'):
+        """
+        Download intraday bars for the given time windows only.
+        
+        Every window is one request. The bars are clipped to their window
+        and converted to float32 right away, so no full day of minute bars
+        is kept in memory.
+        
+        Args:
+            symbols (list): Stock/ETF symbols
+            windows (list): Sorted (start, end) timestamps, see
+                intraday.event_windows
+            interval (str): Intraday interval, e.g. '1m' or '5m'
+            fields (tuple): Price columns to keep
+            max_workers, timeout, retries, backoff: See download_concurrent
+            timezone (str): Exchange timezone of the windows; timezone-aware
+                bars are converted to it before clipping
+            
+        Returns:
+            tuple: (MinuteBars of the downloaded symbols, BatchResult)
+        """
+        import pandas as pd
+        
+        from stock_pipeline.intraday import MinuteBars
+        
+        kwargs = {'timeout': timeout} if timeout is not None else {}
+        
+        def fetch(symbol):
+            with metrics.item('symbol', symbol):
+                parts = []
+                for start, end in windows:
+                    df = self.provider.history(symbol, start, end + pd.Timedelta(minutes=1), interval, **kwargs)
+                    if not df.empty:
+                        parts.append(MinuteBars.from_frames({symbol: df}, fields, [(start, end)], timezone))
+                bars = MinuteBars.combine(parts)
+                if not len(bars):
+                    raise PermanentError(f"No intraday data found for {symbol}")
+                metrics.count(rows_in=len(bars))
+                return bars
+        
+        def report(symbol, bars, failure):
+            display_name = self.get_display_name(symbol)
+            if failure is None:
+                print(f"Downloaded {len(bars)} {interval} bars for {display_name}")
+            else:
+                print(f"Failed {display_name} after {failure.attempts} attempt(s): {failure.error}")
+        
+        result = run_bounded(fetch, symbols, max_workers=max_workers, retries=retries,
+                             backoff=backoff, on_done=report)
+        return MinuteBars.combine(list(result.results.values()), fields), result
+    
+    def save(self, data, table_name, storage_format='parquet', excel_export=False):
+        """
+        Save the downloaded data with the shared storage layer.
+        
+        Each symbol becomes one sheet, named like the Excel sheets
+        (e.g. 'DAX_EUR'), with a typed 'Date' column.
+        
+        Args:
+            data (dict): Dictionary containing DataFrames for each symbol
+            table_name (str): Name of the stored table (without extension)
+            storage_format (str): 'parquet', 'feather' or 'excel'
+            excel_export (bool): Additionally write the formatted Excel file
+        """
+        if not data:
+            print("No data to save")
+            return
+        
+        if storage_format == 'excel' or excel_export:
+            self.save_to_excel(data)
+        if storage_format == 'excel':
+            return
+        
+        sheets = {}
+        for symbol, item in data.items():
+            sheet_name = f"{self.get_display_name(symbol)}_{item['currency']}"
+            sheets[sheet_name] = item['df'].rename_axis('Date')
+        path = storage.write_sheets(sheets, self.output_dir, table_name,
+                                    fmt=storage_format, index=True)
+        print(f"Created {path}")
+    
+    def save_to_excel(self, data):
+        """
+        Save the downloaded data to an Excel file with multiple sheets.
+        
+        One sheet per symbol (e.g. 'DAX_EUR') with the dates as native date
+        cells (DD.MM.YYYY), number formats for prices and volume and column
+        widths fitted to the content.
+        
+        Args:
+            data (dict): Dictionary containing DataFrames for each symbol
+        """
+        if not data:
+            print("No data to save")
+            return
+            
+        os.makedirs(self.output_dir, exist_ok=True)
+        filename = os.path.join(self.output_dir, self.excel_filename)
+        sheets = {}
+        for symbol, item in data.items():
+            df = item['df']
+            if df.index.tz is not None:
+                df = df.tz_localize(None)
+            sheets[f"{self.get_display_name(symbol)}_{item['currency']}"] = df
+        
+        if resolve_excel_engine(self.excel_engine) == "xlsxwriter":
+            self._write_xlsxwriter(sheets, filename)
+        else:
+            self._write_openpyxl(sheets, filename)
+        print(f"Created {self.excel_filename}")
+    
+    def _write_xlsxwriter(self, sheets, filename):
+        """Stream the sheets row by row (constant memory: one row per sheet is buffered)"""
+        import pandas as pd
+        import xlsxwriter
+        
+        workbook = xlsxwriter.Workbook(filename, {'constant_memory': True,
+                                                  'default_date_format': EXCEL_DATE_FORMAT})
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        number_formats = {fmt: workbook.add_format({'num_format': fmt}) for fmt in set(NUMBER_FORMATS.values())}
+        try:
+            for sheet_name, df in sheets.items():
+                worksheet = workbook.add_worksheet(sheet_name)
+                for idx, width in enumerate(excel_column_widths(df)):
+                    col = df.columns[idx - 1] if idx else None
+                    worksheet.set_column(idx, idx, width, number_formats.get(NUMBER_FORMATS.get(col)))
+                worksheet.write_row(0, 0, [df.index.name or 'Date'] + [str(col) for col in df.columns],
+                                    header_format)
+                
+                # Empty cells for missing values, like pandas.to_excel
+                values = df.to_numpy(dtype=object)
+                values[pd.isna(values)] = None
+                for row, (date, cells) in enumerate(zip(df.index.to_pydatetime(), values.tolist()), start=1):
+                    worksheet.write_datetime(row, 0, date)
+                    worksheet.write_row(row, 1, cells)
+        finally:
+            workbook.close()
+    
+    def _write_openpyxl(self, sheets, filename):
+        """
+        Stream the sheets with openpyxl's write-only mode.
+        
+        Every formatted column gets one named style and one cell object
+        that is refilled for every row, so no cell is formatted afterwards.
+        """
+        import pandas as pd
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+        from openpyxl.utils import get_column_letter
+        
+        workbook = Workbook(write_only=True)
+        thin = Side(style='thin')
+        workbook.add_named_style(NamedStyle(name='Header', font=Font(bold=True),
+                                            border=Border(left=thin, right=thin, top=thin, bottom=thin),
+                                            alignment=Alignment(horizontal='center', vertical='top')))
+        for fmt in {EXCEL_DATE_FORMAT, *NUMBER_FORMATS.values()}:
+            workbook.add_named_style(NamedStyle(name=fmt, number_format=fmt))
+        
+        for sheet_name, df in sheets.items():
+            worksheet = workbook.create_sheet(sheet_name)
+            for idx, width in enumerate(excel_column_widths(df)):
+                worksheet.column_dimensions[get_column_letter(idx + 1)].width = width
+            
+            header = []
+            for name in [df.index.name or 'Date'] + [str(col) for col in df.columns]:
+                cell = WriteOnlyCell(worksheet, name)
+                cell.style = 'Header'
+                header.append(cell)
+            worksheet.append(header)
+            
+            formats = [EXCEL_DATE_FORMAT] + [NUMBER_FORMATS.get(col) for col in df.columns]
+            styled = {}
+            for idx, fmt in enumerate(formats):
+                if fmt:
+                    styled[idx] = WriteOnlyCell(worksheet)
+                    styled[idx].style = fmt
+            
+            values = df.to_numpy(dtype=object)
+            values[pd.isna(values)] = None
+            for date, cells in zip(df.index.to_pydatetime(), values.tolist()):
+                row = [date] + cells
+                for idx, cell in styled.items():
+                    cell.value = row[idx]
+                    row[idx] = cell
+                worksheet.append(row)
+        workbook.save(filename)
+
+
+def inputs(config, root=None):
+    """Local files the stage reads: none, the data comes from the provider"""
+    return []
+
+
+def outputs(config, root=None):
+    """Tables the stage writes (paths without extension)"""
+    return [os.path.join(resolve_path(root, config["output_dir"]), config["table_name"])]
+
+
+def fingerprint_config(config):
+    """Config as it takes effect: an open end date means today"""
+    if config["end_date"] is None:
+        config = dict(config, end_date=datetime.now().strftime('%Y-%m-%d'))
+    return config
+
+
+def run(config=None, root=None, provider=None):
+    """
+    Download all configured symbols and store them.
+    
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+        provider (optional): Data source replacing Yahoo Finance
+        
+    Returns:
+        BatchResult: Downloaded data and per-symbol failures
+    """
+    config = merge_config(DEFAULT_CONFIG, config)
+    if config["storage_format"] == "excel" or config["excel_export"]:
+        # Fail before downloading if the Excel engine is not available
+        resolve_excel_engine(config["excel_engine"])
+    downloader = StockDataDownloader(
+        output_dir=resolve_path(root, config["output_dir"]),
+        excel_filename=config["excel_filename"],
+        symbol_names=config["symbol_names"],
+        cache_dir=resolve_path(root, config["cache_dir"]),
+        provider=provider,
+        excel_engine=config["excel_engine"]
+    )
+    
+    result = downloader.download_concurrent(
+        symbols=config["symbols"],
+        start_date=config["start_date"],
+        end_date=config["end_date"],
+        interval=config["interval"],
+        max_workers=config["max_workers"],
+        timeout=config["timeout"],
+        retries=config["retries"],
+        backoff=config["backoff"]
+    )
+    print(f"Downloaded {len(result.results)} of {len(config['symbols'])} symbols in {result.elapsed:.1f}s")
+    for failure in result.failures.values():
+        print(f"   • {failure.item}: {type(failure.error).__name__}: {failure.error}")
+    
+    downloader.save(
+        result.results,
+        table_name=config["table_name"],
+        storage_format=config["storage_format"],
+        excel_export=config["excel_export"]
+    )
+    return result
@@ -0,0 +1,163 @@
+"""
+Stage 2: extract the text sections of the press conference PDFs and list
+the press release days.
+
+Every central bank has a profile of section headers and date patterns
+(stock_pipeline.central_banks). With central_bank 'auto' the PDFs of all
+pdf_folders are parsed for every profile in one pass and filed under the
+bank they match, e.g. for a folder of mixed ECB, Fed and BoE statements.
+"""
+import glob
+import os
+from datetime import datetime
+
+from stock_pipeline import storage
+from stock_pipeline.config import merge_config, resolve_path
+from stock_pipeline.text_extraction import extract_batch, section_parser
+
+DEFAULT_CONFIG = {
+    # Input folder with the PDFs per central bank
+    "pdf_folders": {
+        "ECB": "01_Raw Data/ECB PDF Downloads"
+    },
+    "central_bank": "ECB",                             # entry of pdf_folders to process, or 'auto' (all, detected per PDF)
+    "profiles": {},                                    # extra profiles {name: {"headers": [...], "date_patterns": [...]}}
+    "date_format": "text",                             # 'text' (17_April_2025) or 'number' (17_04_2025)
+    # Output folder where the extracted text files are written
+    "text_output": "02_Preprocessing/TEXT",
+    # Press release days table settings
+    "input_folder": "02_Preprocessing/TEXT/ECB",       # folder with ECB sub-folders
+    "output_folder": "02_Preprocessing",               # folder where the table will be saved
+    "table_name": "ECB Press Release Days",            # output table (without extension)
+    "storage_format": "parquet",                       # 'parquet', 'feather' or 'excel'
+    "excel_export": False,                             # also write an .xlsx copy
+    # Batch settings
+    "workers": None,                                   # worker processes (None = all CPUs, 1 = serial)
+    "force": False                                     # re-extract PDFs even if unchanged
+}
+
+DATE_FORMATS = ("text", "number")
+AUTO = "auto"
+
+
+def press_release_folders(target_path):
+    """
+    Press release days of the extracted text folders, without pandas.
+
+    Args:
+        target_path (str): Folder with one sub-folder per press release day
+
+    Returns:
+        list: (folder_name, datetime) pairs sorted by date
+    """
+    # all sub-folders inside the ECB directory
+    folders = sorted(
+        d for d in os.listdir(target_path)
+        if os.path.isdir(os.path.join(target_path, d))
+    )
+
+    # extract dates from folder names of form 17_April_2025 (date_format 'text') or 17_04_2025 ('number')
+    def parse_folder(name: str):
+        day, month, year = name.split('_')
+        month_format = "%m" if month.isdigit() else "%B"
+        return name, datetime.strptime(f"{day} {month} {year}", f"%d {month_format} %Y")
+
+    return sorted((parse_folder(f) for f in folders), key=lambda folder: folder[1])
+
+
+def list_and_process_folders(config, root=None):
+    """
+    Generate the press release days table after PDF processing is complete
+
+    Args:
+        config (dict): Stage configuration
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        pd.DataFrame: folder_name and date of every press release day
+    """
+    import pandas as pd
+
+    data = press_release_folders(resolve_path(root, config["input_folder"]))
+
+    df = (pd.DataFrame(data, columns=["folder_name", "date"])
+            .sort_values("date")
+            .reset_index(drop=True))
+
+    # save table (folder_name and typed date column)
+    output_path = resolve_path(root, config["output_folder"])
+    storage.write_table(df[["folder_name", "date"]], output_path, config["table_name"],
+                        fmt=config["storage_format"], excel_export=config["excel_export"])
+    return df
+
+
+def _pdf_folders(config):
+    if config["central_bank"] == AUTO:
+        return list(dict.fromkeys(config["pdf_folders"].values()))
+    return [config["pdf_folders"][config["central_bank"]]]
+
+
+def inputs(config, root=None):
+    """PDF folder of the configured central bank (all folders with 'auto')"""
+    return [resolve_path(root, folder) for folder in _pdf_folders(config)]
+
+
+def outputs(config, root=None):
+    """Text folder and press release days table (path without extension)"""
+    text_output = resolve_path(root, config["text_output"])
+    if config["central_bank"] != AUTO:
+        text_output = os.path.join(text_output, config["central_bank"])
+    return [text_output, os.path.join(resolve_path(root, config["output_folder"]), config["table_name"])]
+
+
+def run(config=None, root=None):
+    """
+    Extract all PDFs of one central bank (or of all with 'auto') and write
+    the press release days table.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        dict: Summary of extract_batch ('processed', 'skipped', 'failed')
+    """
+    config = merge_config(DEFAULT_CONFIG, config)
+    central_bank = config["central_bank"]
+    date_format = config["date_format"]
+    if date_format not in DATE_FORMATS:
+        raise ValueError(f"Unknown date format '{date_format}'. Choose one of {list(DATE_FORMATS)}")
+
+    pdf_folders = inputs(config, root)
+    text_output = resolve_path(root, config["text_output"])
+    pdf_files = [pdf_file for pdf_folder in pdf_folders
+                 for pdf_file in glob.glob(os.path.join(pdf_folder, "*.pdf"))]
+
+    if not pdf_files:
+        raise FileNotFoundError(f"No PDF files found in folder: {', '.join(pdf_folders)}")
+
+    if central_bank == AUTO:
+        central_bank = None
+    if config["profiles"]:
+        from stock_pipeline.central_banks import SectionParser, get_profiles
+
+        names = None if central_bank is None else [central_bank]
+        parser = SectionParser(get_profiles(names, extra=config["profiles"]))
+    else:
+        parser = section_parser(None if central_bank is None else (central_bank,))
+    summary = extract_batch(pdf_files, central_bank, date_format, text_output,
+                            workers=config["workers"], force=config["force"], parser=parser)
+
+    print(f"Date Format: {'Month as text' if date_format == 'text' else 'Month as number'}")
+    print(f"Successfully processed: {len(summary['processed'])} PDFs")
+    print(f"Skipped (unchanged): {len(summary['skipped'])} PDFs")
+    print(f"Failed: {len(summary['failed'])} PDFs")
+    for pdf_file, error in summary['failed']:
+        print(f"   • {os.path.basename(pdf_file)}: {error}")
+    print(f"Total: {len(pdf_files)} PDFs")
+    print(f"All files saved to: {os.path.join(text_output, central_bank or '', '')}")
+
+    print(f"\nGenerating press release days table...")
+    list_and_process_folders(config, root)
+    print(f"Table created: {config['table_name']} ({config['storage_format']})")
+    return summary
@@ -0,0 +1,127 @@
+"""
+Stage 3b: minute-offset event windows around the ECB announcements.
+
+Fetches (or loads from a local minute file) intraday bars only for short
+windows around the rate decision and the press conference of every press
+release day, stores them compactly (int64 timestamps, float32 prices) and
+builds one row per event and index with the closes at minute offsets
+(Close_m-60 ... Close_m+120), see stock_pipeline.intraday.
+
+Bars already stored for a symbol and day are reused, so reruns only fetch
+new press release days. Note that Yahoo Finance serves 1m bars for the
+last 30 days only (longer for 2m-60m); use `bars_file` for history.
+"""
+import os
+
+from stock_pipeline import storage
+from stock_pipeline.config import merge_config, resolve_path
+
+DEFAULT_CONFIG = {
+    "input_folder_date": "02_Preprocessing",
+    "date_table": "ECB Press Release Days",
+    "symbols": ["^GDAXI", "^MDAXI", "^SDAXI"],
+    "symbol_names": {"^GDAXI": "DAX", "^MDAXI": "MDAX", "^SDAXI": "SDAX"},
+    "event_times": {"Decision": "14:15", "Press_Conference": "14:45"},  # local exchange time
+    "timezone": "Europe/Berlin",                   # exchange timezone timezone-aware bars are converted to
+    "minutes_before": 60,                          # bars fetched before the first event of a day
+    "minutes_after": 120,                          # bars fetched after the last event of a day
+    "offsets": [-60, -30, -15, -5, -1, 0, 1, 5, 15, 30, 60, 120],   # minute offsets of the features
+    "tolerance": "5min",                           # oldest bar accepted for an offset
+    "interval": "1m",                              # '1m', '2m', '5m', ...
+    "bars_file": None,                             # local .parquet/.csv (Timestamp, Symbol, Close) instead of downloading
+    "max_workers": 4,                              # Parallel downloads
+    "timeout": 30,                                 # Seconds per request
+    "retries": 3,                                  # Retries per symbol after a failure
+    "backoff": 1.0,                                # First retry pause in seconds
+    "output_folder": "03_Dataset Creation/Intraday",
+    "bars_table": "minute_bars",                   # compact bars of all windows
+    "table_name": "intraday_events",               # minute-offset features per event and index
+    "storage_format": "parquet",                   # 'parquet', 'feather' or 'excel'
+    "excel_export": False                          # Also write an .xlsx copy of the features
+}
+
+
+def inputs(config, root=None):
+    """Press release days table (and the local minute file if given)"""
+    paths = [os.path.join(resolve_path(root, config['input_folder_date']), config['date_table'])]
+    if config['bars_file']:
+        paths.append(resolve_path(root, config['bars_file']))
+    return paths
+
+
+def outputs(config, root=None):
+    """Minute bars and event feature tables (paths without extension)"""
+    output_folder = resolve_path(root, config['output_folder'])
+    return [os.path.join(output_folder, config['bars_table']),
+            os.path.join(output_folder, config['table_name'])]
+
+
+def _stored_bars(output_folder, config):
+    from stock_pipeline.intraday import MinuteBars
+
+    try:
+        return MinuteBars.from_frame(storage.read_table(output_folder, config['bars_table'],
+                                                        fmt=config['storage_format']))
+    except FileNotFoundError:
+        return None
+
+
+def run(config=None, root=None, provider=None):
+    """
+    Fetch the minute bars around every announcement and build the features.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+        provider (optional): Data source replacing Yahoo Finance
+
+    Returns:
+        pd.DataFrame: One row per event and index with Date, Event,
+        Timestamp, Index and the Close_m<offset> columns (float32)
+    """
+    from stock_pipeline.intraday import (MinuteBars, build_intraday_events, event_timestamps,
+                                         event_windows, load_minute_bars)
+    from stock_pipeline.stages.download import StockDataDownloader
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    output_folder = resolve_path(root, config['output_folder'])
+    df_date = storage.read_table(resolve_path(root, config['input_folder_date']), config['date_table'],
+                                 fmt=config['storage_format'], date_columns=['date'])
+    events = event_timestamps(df_date['date'], config['event_times'])
+    windows = event_windows(events['Timestamp'], config['minutes_before'], config['minutes_after'])
+    print(f"{len(events)} events on {events['Date'].nunique()} days, {len(windows)} windows")
+
+    if config['bars_file']:
+        bars = load_minute_bars(resolve_path(root, config['bars_file']), windows, config['symbols'],
+                                timezone=config['timezone'])
+    else:
+        # Only windows on days some symbol has no stored bars for
+        bars = _stored_bars(output_folder, config) or MinuteBars.combine([])
+        known = {symbol: set(bars.days(symbol)) if symbol in bars.symbols else set()
+                 for symbol in config['symbols']}
+        missing = [window for window in windows
+                   if any(window[0].normalize() not in days for days in known.values())]
+        symbols = [symbol for symbol, days in known.items()
+                   if any(window[0].normalize() not in days for window in missing)]
+        if missing:
+            downloader = StockDataDownloader(output_folder, None, config['symbol_names'], provider=provider)
+            fetched, _ = downloader.download_event_windows(
+                symbols, missing, config['interval'], max_workers=config['max_workers'],
+                timeout=config['timeout'], retries=config['retries'], backoff=config['backoff'],
+                timezone=config['timezone'])
+            bars = bars.concat(fetched)
+
+    storage.write_table(bars.to_frame(), output_folder, config['bars_table'], fmt=config['storage_format'])
+    df_events = build_intraday_events(bars, events, config['offsets'], config['symbol_names'],
+                                      tolerance=config['tolerance'])
+    output_path = storage.write_table(df_events, output_folder, config['table_name'],
+                                      fmt=config['storage_format'], excel_export=config['excel_export'])
+
+    feature_columns = [col for col in df_events.columns if col.startswith('Close_m')]
+    coverage = df_events[feature_columns].notna().mean()
+    print(f"Minute bars: {len(bars)} rows, {bars.nbytes / 2 ** 20:.1f} MiB")
+    print(f"Events: {df_events.shape[0]} rows × {df_events.shape[1]} columns")
+    print("Coverage per offset: " + ", ".join(f"{col[len('Close_m'):]}: {share:.0%}"
+                                              for col, share in coverage.items()))
+    print(f"\n✅ File saved: {output_path}")
+    return df_events
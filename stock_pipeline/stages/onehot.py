@@ -0,0 +1,105 @@
+"""
+Stage 2: combine the index sheets and one-hot encode the index name.
+
+The sheets are read one at a time. With encoding 'categorical' the index
+is stored as a single categorical 'Index' column instead of one dense
+Index_<name> column per index, for universes with many instruments (see
+stock_pipeline.instruments).
+"""
+import os
+
+from stock_pipeline import storage
+from stock_pipeline.config import merge_config, resolve_path
+
+DEFAULT_CONFIG = {
+    "input_folder": "01_Raw Data/yFinance API",
+    "input_table": "stock_data",
+    "columns_to_keep": ['Date', 'Open', 'Close'],
+    "sheet_names": ['DAX_EUR', 'MDAX_EUR', 'SDAX_EUR'],
+    "output_folder": "02_Preprocessing/Stock_Preprocessed",
+    "table_name": "stock_data_combined_onehot",
+    "encoding": "dense",                   # 'dense' (Index_<name> columns) or 'categorical'
+    "storage_format": "parquet",           # 'parquet', 'feather' or 'excel'
+    "excel_export": False                  # Also write an .xlsx copy
+}
+
+
+def inputs(config, root=None):
+    """Downloaded index table (path without extension)"""
+    return [os.path.join(resolve_path(root, config["input_folder"]), config["input_table"])]
+
+
+def outputs(config, root=None):
+    """One-hot encoded table (path without extension)"""
+    return [os.path.join(resolve_path(root, config["output_folder"]), config["table_name"])]
+
+
+def run(config=None, root=None):
+    """
+    Combine all sheets into one table with an Index_<name> column per index
+    (or one categorical 'Index' column).
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        pd.DataFrame: The one-hot encoded table
+    """
+    import numpy as np
+    import pandas as pd
+
+    from stock_pipeline.instruments import ENCODINGS, INSTRUMENT_COLUMN, OneHotView
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    if config["encoding"] not in ENCODINGS:
+        raise ValueError(f"Unknown encoding '{config['encoding']}'. Choose one of {list(ENCODINGS)}")
+    input_folder = resolve_path(root, config["input_folder"])
+    output_folder = resolve_path(root, config["output_folder"])
+
+    # Sorted categories give the column order of pd.get_dummies
+    names = [sheet.replace('_EUR', '') for sheet in config["sheet_names"]]
+    categories = sorted(set(names))
+    code_of = {name: code for code, name in enumerate(categories)}
+    code_dtype = np.min_scalar_type(len(categories))
+    dtype = pd.CategoricalDtype(categories)      # shared by all sheets instead of one copy each
+
+    # Stream the sheets; each keeps only its columns and a code per row
+    combined_data = []
+    sheets = storage.iter_sheets(input_folder, config["input_table"], config["sheet_names"],
+                                 fmt=config["storage_format"], columns=config["columns_to_keep"],
+                                 date_columns=['Date'])
+    for (sheet, df_sheet), name in zip(sheets, names):
+        df_sheet = df_sheet[config["columns_to_keep"]].copy()
+        codes = np.full(len(df_sheet), code_of[name], dtype=code_dtype)
+        df_sheet[INSTRUMENT_COLUMN] = pd.Categorical.from_codes(codes, dtype=dtype)
+        combined_data.append(df_sheet)
+
+    df_onehot = pd.concat(combined_data, ignore_index=True)
+    del combined_data
+    if config["encoding"] == "dense":
+        view = OneHotView.from_frame(df_onehot)
+        df_onehot = pd.concat([df_onehot.drop(columns=INSTRUMENT_COLUMN),
+                               view.to_frame(df_onehot.index, sparse=False)], axis=1)
+
+    # Save table
+    output_path = storage.write_table(df_onehot, output_folder, config["table_name"],
+                                      fmt=config["storage_format"], excel_export=config["excel_export"])
+
+    # Display results
+    print(f"Dimensions: {df_onehot.shape[0]} rows × {df_onehot.shape[1]} columns")
+    print(f"Columns kept: {', '.join(config['columns_to_keep'])}")
+    if config["encoding"] == "dense":
+        print(f"One-Hot Encoded Columns: {[col for col in df_onehot.columns if 'Index_' in col]}")
+    else:
+        print(f"Categorical column '{INSTRUMENT_COLUMN}' with {len(categories)} indices: "
+              f"{', '.join(categories[:10])}{' ...' if len(categories) > 10 else ''}")
+    print(f"Sheets combined: {len(config['sheet_names'])} ({', '.join([name.replace('_EUR', '') for name in config['sheet_names']])})")
+    print(df_onehot.head(-10))
+
+    print("\nColumn data types:")
+    for col in df_onehot.columns:
+        print(f"   • {col}: {df_onehot[col].dtype}")
+
+    print(f"\n✅ File saved: {output_path}")
+    return df_onehot
@@ -0,0 +1,147 @@
+"""
+Stage 2: parse the ECB deposit facility rate files and align them with the
+press release days.
+
+With alignment 'asof' every press release day takes the rate in force on
+that day (the latest entry at or before it) instead of requiring an entry
+on exactly that date (see stock_pipeline.alignment).
+"""
+import os
+import warnings
+from datetime import datetime
+
+from stock_pipeline import storage
+from stock_pipeline.config import merge_config, resolve_path
+
+DEFAULT_CONFIG = {
+    "input_folder": "01_Raw Data/ECB Download",
+    "change_file": "2022_2025_change.xlsx",
+    "rate_file": "2022_2025_rate.xlsx",
+    "input_folder_date": "02_Preprocessing",
+    "date_table": "ECB Press Release Days",
+    "output_folder": "02_Preprocessing/Interest_Rate_Preprocessed",
+    "table_name": "interest_rate_2022_2025",
+    "alignment": "exact",                  # 'exact' date match or 'asof' (latest rate at or before the day)
+    "rate_tolerance": None,                # asof: oldest rate entry to accept, e.g. '31D', None = any
+    "storage_format": "parquet",           # 'parquet', 'feather' or 'excel'
+    "excel_export": False                  # Also write an .xlsx copy
+}
+
+RATE_COLUMNS = {
+    "Deposit facility - date of changes (raw data) - Level (FM.D.U2.EUR.4F.KR.DFR.LEV)": "Interest Rate",
+    "Deposit facility - date of changes (raw data) - Level (FM.D.U2.EUR.4F.KR.DFR.LEV) - Modified value (Period-to-period change)": "Interest Rate_Change"
+}
+
+START_AFTER = datetime(2022, 5, 31)
+
+
+def load_ecb_file(path):
+    """Load an ECB data portal download, skipping its metadata header rows"""
+    import pandas as pd
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
+        df = pd.read_excel(path).iloc[13:].reset_index(drop=True)
+    df.columns = df.iloc[0]
+    df = df.drop(df.index[0]).reset_index(drop=True)
+
+    df = df.rename(columns=RATE_COLUMNS)
+
+    df['DATE'] = pd.to_datetime(df['DATE'])
+    return df[df['DATE'] > START_AFTER].reset_index(drop=True)
+
+
+def load_rate_series(path):
+    """Deposit facility rate of an ECB rate download, indexed by the date of change"""
+    import pandas as pd
+
+    df = load_ecb_file(path)
+    rates = pd.Series(pd.to_numeric(df['Interest Rate'], errors='coerce').to_numpy(),
+                      index=pd.DatetimeIndex(df['DATE'], name='Date'), name='Interest Rate')
+    return rates.dropna().sort_index()
+
+
+def inputs(config, root=None):
+    """ECB downloads and the press release days table (path without extension)"""
+    input_folder = resolve_path(root, config['input_folder'])
+    return [os.path.join(input_folder, config['rate_file']),
+            os.path.join(input_folder, config['change_file']),
+            os.path.join(resolve_path(root, config['input_folder_date']), config['date_table'])]
+
+
+def outputs(config, root=None):
+    """Interest rate table (path without extension)"""
+    return [os.path.join(resolve_path(root, config['output_folder']), config['table_name'])]
+
+
+def run(config=None, root=None):
+    """
+    Build the interest rate table (old rate and change per press release day).
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        pd.DataFrame: The interest rate table
+    """
+    import pandas as pd
+
+    from stock_pipeline.alignment import ALIGNMENTS, asof_join
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    input_folder = resolve_path(root, config['input_folder'])
+
+    # Load and clean both ECB files
+    ecb_files = {file_key: load_ecb_file(f"{input_folder}/{config[file_key]}")
+                 for file_key in ['rate_file', 'change_file']}
+
+    # Merge and clean ECB data
+    df_combined = pd.merge(ecb_files['rate_file'],
+                          ecb_files['change_file'][['DATE', 'Interest Rate_Change']],
+                          on='DATE', how='left').drop('TIME PERIOD', axis=1)
+
+    # Convert to numeric and prepare for date merge
+    for col in ['Interest Rate', 'Interest Rate_Change']:
+        df_combined[col] = pd.to_numeric(df_combined[col], errors='coerce')
+
+    # Load dates and merge with press release dates
+    df_date = storage.read_table(resolve_path(root, config['input_folder_date']), config['date_table'],
+                                 fmt=config['storage_format'], date_columns=['date'])
+    df_date = df_date.drop(columns=['folder_name'], errors='ignore')
+    df_combined = df_combined.rename(columns={'DATE': 'date'})
+
+    # Final merge and processing
+    if config['alignment'] == 'asof':
+        columns = list(df_combined.columns) + [col for col in df_date.columns if col not in df_combined.columns]
+        df_final = asof_join(df_date, df_combined, columns=['Interest Rate', 'Interest Rate_Change'],
+                             tolerance=config['rate_tolerance'], on='date')[columns]
+        missing = df_final['Interest Rate'].isna()
+        if missing.any():
+            print(f"⚠️ No rate for {missing.sum()} press release days: "
+                  f"{', '.join(d.strftime('%Y-%m-%d') for d in df_final.loc[missing, 'date'])}")
+        df_final = df_final.loc[~missing]
+    elif config['alignment'] == 'exact':
+        df_final = pd.merge(df_combined, df_date, on='date', how='inner')
+    else:
+        raise ValueError(f"Unknown alignment '{config['alignment']}'. Choose one of {list(ALIGNMENTS)}")
+    df_final = df_final.sort_values('date').reset_index(drop=True)
+
+    df_final['Interest Rate_Change'] = df_final['Interest Rate'].diff().fillna(0)
+    df_final = df_final.rename(columns={'Interest Rate': 'Interest Rate_Old', 'date': 'Date'})
+
+    # Save and display
+    output_path = storage.write_table(df_final, resolve_path(root, config['output_folder']),
+                                      config['table_name'], fmt=config['storage_format'],
+                                      excel_export=config['excel_export'])
+
+    print(f"Dimensions: {df_final.shape[0]} rows × {df_final.shape[1]} columns")
+
+    print(df_final.head(5))
+
+    print("\nColumn data types:")
+    for col in df_final.columns:
+        print(f"   • {col}: {df_final[col].dtype}")
+
+    print(f"\n File saved: {output_path}")
+    return df_final
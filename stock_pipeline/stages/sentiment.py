@@ -0,0 +1,122 @@
+"""
+Stage 2.1: score the extracted press conference texts with FinBERT and
+financial RoBERTa and write ecb_sentiment_analysis.xlsx.
+
+Stub runs (all scores 0.0) write stub_filename instead, so they never
+replace the workbook the build stage reads.
+"""
+import os
+
+from stock_pipeline.config import merge_config, resolve_path
+from stock_pipeline.sentiment import (MODELS, aggregate_scores, chunking_report, load_scorers,
+                                      model_chunkers, read_documents, score_segments,
+                                      segment_chunks, segment_documents, sentiment_table,
+                                      split_chunks)
+
+DEFAULT_CONFIG = {
+    "input_folder": "02_Preprocessing/TEXT/ECB",                    # date folders with 0_FULL.txt
+    "output_folder": "02_Preprocessing/KAGGLE_Sentiment-Analysis",
+    "excel_filename": "ecb_sentiment_analysis.xlsx",                # read by the build stage
+    "models": MODELS,                                               # column prefix -> model id
+    "batch_size": 32,                                               # texts per forward pass
+    "chunking": "chars",                                            # 'chars' (notebook: 512 chars every 400) or 'tokens'
+    "chunk_tokens": 510,                                            # token budget per chunk ('tokens' only)
+    "chunk_stride": 0,                                              # tokens shared by consecutive chunks ('tokens' only)
+    "chunk_tokenizer": "model",                                     # 'model' = each scored model's tokenizer, a model id, or None = words and punctuation
+    "stub": False,                                                  # score 0.0 without model weights
+    "stub_filename": "ecb_sentiment_analysis_stub.xlsx",            # workbook of stub runs, never read by build
+    "local": True,                                                  # False keeps the workbook exported from Kaggle
+    "cache_file": "02_Preprocessing/KAGGLE_Sentiment-Analysis/sentiment_cache.sqlite",  # None disables the cache
+    "cache_max_entries": 500000                                     # least recently used scores beyond this are evicted
+}
+
+
+def inputs(config, root=None):
+    """Folder with the extracted texts"""
+    return [resolve_path(root, config["input_folder"])]
+
+
+def output_filename(config):
+    """Workbook a run writes: stub scores never replace the workbook the build stage reads"""
+    return config["stub_filename"] if config["stub"] else config["excel_filename"]
+
+
+def outputs(config, root=None):
+    """Sentiment workbook"""
+    return [os.path.join(resolve_path(root, config["output_folder"]), output_filename(config))]
+
+
+def run(config=None, root=None, scorers=None):
+    """
+    Score all statements and write the sentiment workbook.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+        scorers (dict, optional): Column prefix -> scorer, replacing the
+            configured models (e.g. stub scorers in tests)
+
+    Returns:
+        pd.DataFrame: The sentiment table including the 'Average' row
+    """
+    import pandas as pd
+
+    from stock_pipeline.sentiment_cache import CachedScorer, SentimentCache
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    output_folder = resolve_path(root, config["output_folder"])
+    output_path = os.path.join(output_folder, output_filename(config))
+    if not config["local"] and scorers is None:
+        print(f"Using the Kaggle export {output_path}")
+        return pd.read_excel(output_path)
+    if config["stub"] and config["stub_filename"] == config["excel_filename"]:
+        raise ValueError("stub_filename must differ from excel_filename, the build stage reads that workbook")
+
+    documents = read_documents(resolve_path(root, config["input_folder"]))
+    if not documents:
+        raise FileNotFoundError(f"No 0_FULL.txt files in {config['input_folder']}")
+
+    if scorers is None:
+        scorers = load_scorers(config["models"], batch_size=config["batch_size"], stub=config["stub"])
+
+    if config["chunking"] == "tokens":
+        # Every model gets chunks that fit its own tokenizer
+        chunkers = model_chunkers(scorers, config["chunk_tokens"], config["chunk_stride"],
+                                  config["chunk_tokenizer"])
+        for prefix, (chunker, token_spans) in chunkers.items():
+            report = chunking_report(documents, chunker, token_spans)
+            print(f"{prefix}:")
+            print(report.to_string(index=False))
+            print(f"Tokens: {report['Tokens'].sum()}, sent to the model: {report['Chunk_Tokens'].sum()} "
+                  f"({report['Chunk_Tokens'].sum() / report['Tokens'].sum() - 1:+.1%})")
+        chunker = {prefix: chunker for prefix, (chunker, _) in chunkers.items()}
+    elif config["chunking"] == "chars":
+        chunker = split_chunks
+    else:
+        raise ValueError(f"Unknown chunking '{config['chunking']}'. Choose 'chars' or 'tokens'")
+
+    segments = segment_documents(documents, chunker)
+    chunk_counts = {prefix: sum(len(segment_chunks(s, prefix)) for s in segments.values()) for prefix in scorers}
+    print(f"Documents: {len(documents)}, "
+          f"sentences: {sum(len(s['sentences']) for s in segments.values())}, "
+          f"chunks: {', '.join(f'{count} ({prefix})' for prefix, count in chunk_counts.items())}")
+
+    cache = None
+    if config["cache_file"]:
+        cache = SentimentCache(resolve_path(root, config["cache_file"]), config["cache_max_entries"])
+        scorers = {prefix: CachedScorer(scorer, cache) for prefix, scorer in scorers.items()}
+
+    scores = score_segments(segments, scorers)
+    if cache is not None:
+        for scorer in scorers.values():
+            print(f"{scorer.name}: {scorer.hits} cached, {scorer.misses} scored")
+        cache.evict()
+        cache.close()
+    df = sentiment_table(aggregate_scores(segments, scores), prefixes=tuple(scorers))
+
+    os.makedirs(output_folder, exist_ok=True)
+    df.to_excel(output_path, index=False)
+
+    print(df.to_string(index=False))
+    print(f"\n✅ Main data saved: {output_path}")
+    return df
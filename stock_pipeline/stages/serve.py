@@ -0,0 +1,68 @@
+"""
+Serve event-day predictions of the trained models over local HTTP.
+
+Loads the model bundles of one variant, the latest closes, the rate in
+force (latest value of the raw ECB rate download) and the feature store of past events once, then answers POST /predict
+requests (see stock_pipeline.serving).
+"""
+import os
+
+from stock_pipeline import storage
+from stock_pipeline.config import merge_config, resolve_path
+
+DEFAULT_CONFIG = {
+    "model_folder": "05_Model Training/Models",
+    "variant": "fin_sen",                           # model name of the train stage
+    "input_folder_stock": "02_Preprocessing/Stock_Preprocessed",
+    "stock_table": "stock_data_combined_onehot",
+    "input_folder_rates": "01_Raw Data/ECB Download",
+    "rate_file": "2022_2025_rate.xlsx",             # raw ECB rate series, its latest value is the rate in force
+    "input_folder_store": "03_Dataset Creation/Datasets",
+    "feature_store": "feature_store",               # features of past events, None = closes only
+    "host": "127.0.0.1",
+    "port": 8000,                                   # 0 picks a free port
+    "storage_format": "parquet"                     # 'parquet', 'feather' or 'excel'
+}
+
+
+def load(config=None, root=None):
+    """
+    Predictor and market state of a config, without starting the server.
+
+    Returns:
+        tuple: (serving.Predictor, serving.MarketState)
+    """
+    from stock_pipeline.feature_store import FeatureStore
+    from stock_pipeline.serving import MarketState, Predictor
+    from stock_pipeline.stages.rates import load_rate_series
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    predictor = Predictor.load(resolve_path(root, config['model_folder']), config['variant'])
+    df_stock = storage.read_table(resolve_path(root, config['input_folder_stock']), config['stock_table'],
+                                  fmt=config['storage_format'], index_col='Date', date_columns=['Date'])
+    rates = load_rate_series(os.path.join(resolve_path(root, config['input_folder_rates']), config['rate_file']))
+    store = None
+    if config['feature_store']:
+        try:
+            store = FeatureStore.load(resolve_path(root, config['input_folder_store']), config['feature_store'],
+                                      fmt=config['storage_format'])
+        except FileNotFoundError:
+            print(f"⚠️ No feature store '{config['feature_store']}', past events use the closes only")
+    return predictor, MarketState.from_tables(df_stock, rates, store)
+
+
+def run(config=None, root=None):
+    """
+    Load the models once and serve predictions until interrupted.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+    """
+    from stock_pipeline.serving import serve
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    predictor, state = load(config, root)
+    print(f"Features: {', '.join(predictor.feature_columns)}")
+    print(f"Interest rate: {state.interest_rate}, indices: {', '.join(state.indices)}")
+    serve(predictor, state, config['host'], config['port'])
@@ -0,0 +1,99 @@
+"""
+Stage 5d: bootstrap and permutation tests of the dataset variants.
+
+Tests whether the sentiment variants predict better than the base variant
+beyond chance, over all ECB meetings instead of one split: bootstrap
+intervals of the out-of-bag MSE/R² and of the paired MSE difference to the
+reference variant, and permutation p-values of the sentiment columns (see
+stock_pipeline.significance). Reads the feature store of the build stage
+by default.
+"""
+import os
+
+from stock_pipeline import storage
+from stock_pipeline.config import merge_config, resolve_path
+from stock_pipeline.datasets import BASE_COLUMNS, SENTIMENT_COLUMNS, VARIANTS
+
+DEFAULT_CONFIG = {
+    "input_folder": "03_Dataset Creation/Datasets",
+    "table": "dataset",                             # complete dataset with all sentiment columns
+    "feature_store": "feature_store",               # store of the build stage, None = read `table`
+    "variants": list(VARIANTS),                     # variants to test
+    "reference": "dataset_base",                    # variant the MSE differences refer to
+    "model": "BayesianRidge",                       # 'BayesianRidge', 'Ridge' or 'LinearRegression'
+    "params": None,                                 # shared or per target, None = training.DEFAULT_MODELS[model]
+    "n_resamples": 2000,                            # bootstrap resamples of the meetings
+    "n_permutations": 1000,                         # shuffles of the sentiment columns
+    "folds": 5,                                     # meeting folds of the permutation statistic
+    "confidence": 0.95,                             # level of the intervals
+    "time_budget": 120,                             # seconds for all resamples, None = no limit
+    "block_size": 50,                               # resamples per worker task
+    "random_state": 33,
+    "workers": None,                                # processes, None = CPU count
+    "output_folder": "05_Model Training",
+    "table_name": "variant_significance",
+    "storage_format": "parquet",                    # 'parquet', 'feather' or 'excel'
+    "excel_export": False                           # Also write an .xlsx copy
+}
+
+
+def inputs(config, root=None):
+    """Feature store or complete dataset (path without extension)"""
+    return [os.path.join(resolve_path(root, config['input_folder']), config['feature_store'] or config['table'])]
+
+
+def outputs(config, root=None):
+    """Significance table (path without extension)"""
+    return [os.path.join(resolve_path(root, config['output_folder']), config['table_name'])]
+
+
+def run(config=None, root=None):
+    """
+    Run the bootstrap and permutation tests for every variant and target.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        pd.DataFrame: One row per variant and target (see
+        significance.significance)
+    """
+    import time
+
+    from stock_pipeline.feature_store import FeatureStore
+    from stock_pipeline.significance import significance
+    from stock_pipeline.training import FeatureMatrix
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    input_folder = resolve_path(root, config['input_folder'])
+    if config['feature_store']:
+        store = FeatureStore.load(input_folder, config['feature_store'], fmt=config['storage_format'])
+        matrix = store.matrix(BASE_COLUMNS + SENTIMENT_COLUMNS)
+    else:
+        matrix = FeatureMatrix.from_table(input_folder, config['table'], fmt=config['storage_format'])
+
+    print(f"Testing {len(config['variants'])} variants over {matrix.dates.normalize().nunique()} meetings: "
+          f"{config['n_resamples']} resamples, {config['n_permutations']} permutations"
+          + (f", at most {config['time_budget']}s" if config['time_budget'] else ""))
+    start = time.perf_counter()
+    df_results = significance(matrix, config['variants'], config['reference'], config['model'], config['params'],
+                              n_resamples=config['n_resamples'], n_permutations=config['n_permutations'],
+                              folds=config['folds'], confidence=config['confidence'],
+                              time_budget=config['time_budget'], block_size=config['block_size'],
+                              random_state=config['random_state'], workers=config['workers'])
+    elapsed = time.perf_counter() - start
+    output_path = storage.write_table(df_results, resolve_path(root, config['output_folder']),
+                                      config['table_name'], fmt=config['storage_format'],
+                                      excel_export=config['excel_export'])
+
+    print("\n" + "=" * 80)
+    print(f"VARIANT SIGNIFICANCE ({df_results['Resamples'].max()} resamples, "
+          f"{df_results['Permutations'].max()} permutations in {elapsed:.1f}s):")
+    print("=" * 80)
+    print(df_results[['Target', 'Variant', 'CV_MSE', 'Boot_MSE_Low', 'Boot_MSE_High',
+                      'Delta_MSE', 'Delta_MSE_Low', 'Delta_MSE_High', 'Delta_P', 'Perm_P']]
+          .sort_values(['Target', 'Variant'])
+          .to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\n✅ File saved: {output_path}")
+    return df_results
@@ -0,0 +1,141 @@
+"""
+Stage 5: train the Bayesian Ridge models per dataset variant and target.
+
+Mirrors the summary cell of the training notebook: the test dates are
+chosen once on the base dataset, every variant gets its own StandardScaler
+and each target its tuned parameters.
+"""
+import os
+
+from stock_pipeline import metrics, storage
+from stock_pipeline.config import merge_config, resolve_path
+from stock_pipeline.datasets import TARGET_COLUMNS
+
+DEFAULT_CONFIG = {
+    "input_folder": "03_Dataset Creation/Datasets",
+    "variants": {                                   # model name -> dataset table
+        "base": "dataset_base",
+        "fin_sen": "dataset_finbert_sentences"
+    },
+    "split_table": "dataset_base",                  # dataset the test dates are drawn from
+    "test_size": 15,                                # test rows (three indices per date)
+    "random_state": 33,
+    "fixed_test_dates": None,                       # e.g. ['2024-01-25', ...] instead of a random split
+    "output_folder": "05_Model Training",
+    "model_folder": "05_Model Training/Models",
+    "table_name": "training_results",
+    "storage_format": "parquet",                    # 'parquet', 'feather' or 'excel'
+    "excel_export": False                           # Also write an .xlsx copy
+}
+
+
+def model_path(model_folder, variant, target):
+    """File of the saved model bundle of a variant and target"""
+    return os.path.join(model_folder, f"{variant}_{target}.joblib")
+
+
+def inputs(config, root=None):
+    """Dataset variants used for training and the split (paths without extension)"""
+    input_folder = resolve_path(root, config['input_folder'])
+    tables = dict.fromkeys([config['split_table']] + list(config['variants'].values()))
+    return [os.path.join(input_folder, table) for table in tables]
+
+
+def outputs(config, root=None):
+    """Model folder and results table (path without extension)"""
+    return [resolve_path(root, config['model_folder']),
+            os.path.join(resolve_path(root, config['output_folder']), config['table_name'])]
+
+
+def run(config=None, root=None):
+    """
+    Fit, evaluate and save one model per variant and target.
+
+    Every model is saved as a joblib bundle with the keys 'scaler',
+    'model', 'feature_columns', 'target', 'variant' and 'params'.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        pd.DataFrame: One row per variant and target with train/test MSE and
+        R² of the model and of the mean baseline
+    """
+    import numpy as np
+    import pandas as pd
+    from joblib import dump
+    from sklearn.preprocessing import StandardScaler
+
+    from stock_pipeline.modeling import TARGET_PARAMS, balanced_test_dates, bayesian_ridge, mse, r2, split_by_dates
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    input_folder = resolve_path(root, config['input_folder'])
+    model_folder = resolve_path(root, config['model_folder'])
+    os.makedirs(model_folder, exist_ok=True)
+
+    def load(name):
+        df = storage.read_table(input_folder, name, fmt=config['storage_format'],
+                                index_col='Date', date_columns=['Date'])
+        onehot_cols = [col for col in df.columns if col.startswith('Index_')]
+        df[onehot_cols] = df[onehot_cols].astype(np.float64)
+        return df
+
+    # Test dates are drawn once so all variants share the same split
+    if config['fixed_test_dates']:
+        test_dates = list(pd.to_datetime(config['fixed_test_dates']))
+    else:
+        test_dates = balanced_test_dates(load(config['split_table']), config['test_size'],
+                                         config['random_state'])
+    print(f"Test dates: {', '.join(d.strftime('%Y-%m-%d') for d in sorted(test_dates))}")
+
+    results = []
+    for variant, table in config['variants'].items():
+        with metrics.item('variant', variant):
+            train_data, test_data = split_by_dates(load(table), test_dates)
+            feature_columns = [col for col in train_data.columns if col not in TARGET_COLUMNS]
+
+            scaler = StandardScaler()
+            X_train = scaler.fit_transform(train_data[feature_columns].values)
+            X_test = scaler.transform(test_data[feature_columns].values)
+
+            for target in TARGET_COLUMNS:
+                y_tr, y_te = train_data[target].values, test_data[target].values
+                params = TARGET_PARAMS[target]
+                model = bayesian_ridge(params).fit(X_train, y_tr)
+                train_pred, test_pred = model.predict(X_train), model.predict(X_test)
+                y_mean = np.mean(y_tr)
+
+                results.append({
+                    'Target': target,
+                    'Model': variant,
+                    'Train_MSE': mse(y_tr, train_pred),
+                    'Test_MSE': mse(y_te, test_pred),
+                    'Train_R2': r2(y_tr, train_pred),
+                    'Test_R2': r2(y_te, test_pred),
+                    'Baseline_Train_MSE': mse(y_tr, y_mean),
+                    'Baseline_Test_MSE': mse(y_te, y_mean),
+                    'Baseline_Test_R2': r2(y_te, y_mean),
+                    'Train_Rows': len(y_tr),
+                    'Test_Rows': len(y_te)
+                })
+
+                dump({'scaler': scaler, 'model': model, 'feature_columns': feature_columns,
+                      'target': target, 'variant': variant, 'params': params},
+                     model_path(model_folder, variant, target))
+
+    df_results = (pd.DataFrame(results)
+                  .sort_values(by=['Target', 'Train_MSE'])
+                  .reset_index(drop=True))
+    output_path = storage.write_table(df_results, resolve_path(root, config['output_folder']),
+                                      config['table_name'], fmt=config['storage_format'],
+                                      excel_export=config['excel_export'])
+
+    print("\n" + "=" * 80)
+    print("RESULTS SUMMARY:")
+    print("=" * 80)
+    print(df_results[['Target', 'Model', 'Train_MSE', 'Test_MSE', 'Train_R2', 'Test_R2']]
+          .to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\nModels saved to: {model_folder}")
+    print(f"✅ File saved: {output_path}")
+    return df_results
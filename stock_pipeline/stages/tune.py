@@ -0,0 +1,119 @@
+"""
+Stage 4: hyperparameter search for the linear models of every dataset variant.
+
+Mirrors the grid search of the hyperparameter notebook (KFold(9) without
+shuffling on the StandardScaler-transformed training split), but evaluates
+the whole grid for all variants and targets with the vectorized search in
+stock_pipeline.search instead of one GridSearchCV per target.
+"""
+import os
+
+from stock_pipeline import storage
+from stock_pipeline.config import merge_config, resolve_path
+from stock_pipeline.datasets import TARGET_COLUMNS, VARIANTS
+
+DEFAULT_CONFIG = {
+    "input_folder": "03_Dataset Creation/Datasets",
+    "variants": list(VARIANTS),                     # dataset tables to tune on
+    "split_table": "dataset_base",                  # dataset the test dates are drawn from
+    "test_size": 15,                                # test rows (three indices per date)
+    "random_state": 33,
+    "fixed_test_dates": None,                       # e.g. ['2024-01-25', ...] instead of a random split
+    "model": "BayesianRidge",                       # 'BayesianRidge', 'Ridge' or 'LinearRegression'
+    "param_grid": {                                 # parameter -> values (grid of the notebook)
+        "n_iter": [1],
+        "tol": [1e-07, 1e-06],
+        "alpha_1": [1e-06, 1e-05],
+        "alpha_2": [1e-06, 1e-05],
+        "lambda_1": [1e-06, 1e-05],
+        "lambda_2": [1e-06, 1e-05],
+        "alpha_init": [1.0, 0.1, 0.01],
+        "lambda_init": [None, 0.1, 0.01],
+        "fit_intercept": [False]
+    },
+    "n_splits": 9,                                  # KFold splits of the training rows
+    "workers": None,                                # processes for the variants, None = CPU count
+    "output_folder": "04_Hyperparameter Tuning",
+    "table_name": "tuning_results",
+    "storage_format": "parquet",                    # 'parquet', 'feather' or 'excel'
+    "excel_export": False                           # Also write an .xlsx copy
+}
+
+
+def inputs(config, root=None):
+    """Dataset variants searched and the split table (paths without extension)"""
+    input_folder = resolve_path(root, config['input_folder'])
+    tables = dict.fromkeys([config['split_table']] + list(config['variants']))
+    return [os.path.join(input_folder, table) for table in tables]
+
+
+def outputs(config, root=None):
+    """Results table (path without extension)"""
+    return [os.path.join(resolve_path(root, config['output_folder']), config['table_name'])]
+
+
+def run(config=None, root=None):
+    """
+    Cross-validate every grid candidate on every variant and target.
+
+    Args:
+        config (dict, optional): Entries overriding DEFAULT_CONFIG
+        root (str, optional): Project root the config paths are relative to
+
+    Returns:
+        pd.DataFrame: One row per variant, target and candidate with the
+        parameters, CV_MSE, CV_MSE_Std and Rank (see search.search)
+    """
+    import numpy as np
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+
+    from stock_pipeline.modeling import balanced_test_dates, split_by_dates
+    from stock_pipeline.search import MODELS, best_params, search
+
+    config = merge_config(DEFAULT_CONFIG, config)
+    if config['model'] not in MODELS:
+        raise ValueError(f"Unknown model '{config['model']}'. Choose one of {list(MODELS)}")
+    input_folder = resolve_path(root, config['input_folder'])
+
+    def load(name):
+        df = storage.read_table(input_folder, name, fmt=config['storage_format'],
+                                index_col='Date', date_columns=['Date'])
+        onehot_cols = [col for col in df.columns if col.startswith('Index_')]
+        df[onehot_cols] = df[onehot_cols].astype(np.float64)
+        return df
+
+    if config['fixed_test_dates']:
+        test_dates = list(pd.to_datetime(config['fixed_test_dates']))
+    else:
+        test_dates = balanced_test_dates(load(config['split_table']), config['test_size'],
+                                         config['random_state'])
+
+    variants = {}
+    for table in config['variants']:
+        train_data, _ = split_by_dates(load(table), test_dates)
+        feature_columns = [col for col in train_data.columns if col not in TARGET_COLUMNS]
+        X_train = StandardScaler().fit_transform(train_data[feature_columns].values)
+        variants[table] = (X_train, train_data[TARGET_COLUMNS].values.astype(np.float64))
+
+    n_candidates = int(np.prod([len(values) for values in config['param_grid'].values()]))
+    print(f"Searching {n_candidates} {config['model']} candidates x {len(variants)} variants "
+          f"x {len(TARGET_COLUMNS)} targets with {config['n_splits']}-fold CV")
+    df_results = search(variants, TARGET_COLUMNS, config['model'], config['param_grid'],
+                        n_splits=config['n_splits'], workers=config['workers'])
+
+    output_path = storage.write_table(df_results, resolve_path(root, config['output_folder']),
+                                      config['table_name'], fmt=config['storage_format'],
+                                      excel_export=config['excel_export'])
+
+    param_columns = [col for col in df_results.columns
+                     if col not in ('Variant', 'Target', 'Model', 'Candidate', 'CV_MSE', 'CV_MSE_Std', 'Rank')]
+    best = best_params(df_results)
+    print("\n" + "=" * 80)
+    print("BEST PARAMETERS:")
+    print("=" * 80)
+    for _, row in best.iterrows():
+        params = {col: row[col] for col in param_columns}
+        print(f"{row['Variant']:<28} {row['Target']:<10} CV_MSE {row['CV_MSE']:.4f}  {params}")
+    print(f"\n✅ File saved: {output_path}")
+    return df_results
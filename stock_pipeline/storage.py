@@ -0,0 +1,444 @@
+"""
+Table storage shared by all pipeline stages.
+
+Stages hand tables to each other through a columnar format (Parquet by
+default, Feather optional) which keeps dtypes - in particular datetime
+columns - intact and is read back through memory-mapped Arrow buffers.
+Excel stays available as a format of its own and as an optional export
+next to the columnar file, e.g. for the Kaggle notebooks.
+
+Tables are addressed by folder and name without extension. Multi-sheet
+workbooks map to a folder with one file per sheet.
+
+pandas and pyarrow are imported by the functions that read or write rows,
+so path helpers like find_table stay cheap to import (pipeline status).
+"""
+import os
+
+from stock_pipeline import metrics
+
+FORMATS = {
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "excel": ".xlsx",
+}
+
+# Order in which read_table falls back when the requested format is missing
+FALLBACK_ORDER = ["parquet", "feather", "excel"]
+
+EXCEL_DATE_FORMAT = "DD.MM.YYYY"
+
+# Rows of an Excel sheet, including the header row
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def _check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown storage format '{fmt}'. Choose one of {list(FORMATS)}")
+
+
+def table_path(folder, name, fmt):
+    """Path of table `name` in `folder` for the given format"""
+    _check_format(fmt)
+    return os.path.join(folder, f"{name}{FORMATS[fmt]}")
+
+
+def _write_columnar(df, path, fmt):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path)
+
+
+def _read_columnar(path, fmt, columns=None):
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def _write_excel(sheets, path):
+    import pandas as pd
+
+    with pd.ExcelWriter(path, engine="openpyxl", date_format=EXCEL_DATE_FORMAT,
+                        datetime_format=EXCEL_DATE_FORMAT) as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def fits_excel(rows, name):
+    """True if a table of `rows` rows fits one sheet, otherwise print why the copy is skipped"""
+    if rows + 1 <= EXCEL_MAX_ROWS:
+        return True
+    print(f"⚠️ {name} has {rows:,} rows, more than an Excel sheet holds; skipping its .xlsx copy")
+    return False
+
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    return os.path.getsize(path)
+
+
+def _prepare(df, index):
+    return df.reset_index() if index else df
+
+
+def _finish(df, index_col, date_columns, date_format):
+    import pandas as pd
+
+    for col in date_columns or []:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format=date_format)
+    if index_col is not None and index_col in df.columns:
+        df = df.set_index(index_col)
+    return df
+
+
+def write_table(df, folder, name, fmt="parquet", index=False, excel_export=False):
+    """
+    Write a single table.
+
+    Args:
+        df (pd.DataFrame): Table to write
+        folder (str): Target folder, created if missing
+        name (str): Table name without extension
+        fmt (str): 'parquet', 'feather' or 'excel'
+        index (bool): Store the index as a regular column
+        excel_export (bool): Additionally write an .xlsx copy (skipped for
+            tables beyond the Excel row limit)
+
+    Returns:
+        str: Path of the file written in `fmt`
+    """
+    _check_format(fmt)
+    os.makedirs(folder, exist_ok=True)
+    df = _prepare(df, index)
+
+    path = table_path(folder, name, fmt)
+    if fmt == "excel":
+        _write_excel({"Sheet1": df}, path)
+    else:
+        _write_columnar(df, path, fmt)
+        if excel_export and fits_excel(len(df), name):
+            _write_excel({"Sheet1": df}, table_path(folder, name, "excel"))
+    metrics.count(rows_out=len(df), bytes_out=_size(path))
+    return path
+
+
+def find_table(folder, name, fmt="parquet"):
+    """
+    Locate a stored table, preferring `fmt` and falling back to the others.
+
+    Returns:
+        tuple: (path, format) of the first existing file
+
+    Raises:
+        FileNotFoundError: If the table exists in no known format
+    """
+    _check_format(fmt)
+    for candidate in [fmt] + [f for f in FALLBACK_ORDER if f != fmt]:
+        path = table_path(folder, name, candidate)
+        if os.path.exists(path):
+            return path, candidate
+    raise FileNotFoundError(f"No table '{name}' in {folder} (tried {list(FORMATS.values())})")
+
+
+def read_table(folder, name, fmt="parquet", index_col=None, columns=None,
+               date_columns=None, date_format="%d.%m.%Y"):
+    """
+    Read a single table written by write_table (or a legacy .xlsx).
+
+    Args:
+        folder (str): Folder containing the table
+        name (str): Table name without extension
+        fmt (str): Preferred format; others are tried if the file is missing
+        index_col (str, optional): Column to use as index
+        columns (list, optional): Only load these columns
+        date_columns (list, optional): Columns to parse as dates if they are
+            still strings (legacy Excel files store '%d.%m.%Y' text)
+        date_format (str): Format of such legacy date strings
+
+    Returns:
+        pd.DataFrame: The loaded table
+    """
+    import pandas as pd
+
+    path, found = find_table(folder, name, fmt)
+    if found == "excel":
+        df = pd.read_excel(path, usecols=columns)
+    else:
+        df = _read_columnar(path, found, columns)
+    metrics.count(rows_in=len(df), bytes_in=_size(path))
+    return _finish(df, index_col, date_columns, date_format)
+
+
+def write_sheets(sheets, folder, name, fmt="parquet", index=False, excel_export=False):
+    """
+    Write several named tables that belong together (an Excel workbook).
+
+    For columnar formats the sheets go to `folder/name/<sheet>.<ext>`.
+
+    Args:
+        sheets (dict): Sheet name -> DataFrame
+        folder (str): Target folder
+        name (str): Workbook name without extension
+        fmt (str): 'parquet', 'feather' or 'excel'
+        index (bool): Store each index as a regular column
+        excel_export (bool): Additionally write a multi-sheet .xlsx copy
+
+    Returns:
+        str: Path of the workbook file or sheet folder
+    """
+    _check_format(fmt)
+    os.makedirs(folder, exist_ok=True)
+    sheets = {sheet: _prepare(df, index) for sheet, df in sheets.items()}
+
+    if fmt == "excel" or excel_export:
+        _write_excel(sheets, table_path(folder, name, "excel"))
+    if fmt == "excel":
+        path = table_path(folder, name, "excel")
+        metrics.count(rows_out=sum(len(df) for df in sheets.values()), bytes_out=_size(path))
+        return path
+
+    sheet_folder = os.path.join(folder, name)
+    os.makedirs(sheet_folder, exist_ok=True)
+    for sheet, df in sheets.items():
+        _write_columnar(df, table_path(sheet_folder, sheet, fmt), fmt)
+    metrics.count(rows_out=sum(len(df) for df in sheets.values()), bytes_out=_size(sheet_folder))
+    return sheet_folder
+
+
+def iter_sheets(folder, name, sheet_names, fmt="parquet", index_col=None,
+                columns=None, date_columns=None, date_format="%d.%m.%Y"):
+    """
+    Read sheets written by write_sheets one at a time.
+
+    Only one sheet is held in memory at a time, so callers can process
+    workbooks with many (or large) sheets sheet by sheet.
+
+    Args:
+        folder, name, sheet_names, fmt, index_col, columns, date_columns,
+        date_format: See read_sheets
+
+    Yields:
+        tuple: (sheet name, DataFrame) in `sheet_names` order
+    """
+    _check_format(fmt)
+    sheet_folder = os.path.join(folder, name)
+    if fmt != "excel" and os.path.isdir(sheet_folder):
+        for sheet in sheet_names:
+            yield sheet, read_table(sheet_folder, sheet, fmt, index_col, columns,
+                                    date_columns, date_format)
+        return
+
+    path = table_path(folder, name, "excel")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No workbook '{name}' in {folder}")
+    import pandas as pd
+
+    metrics.count(bytes_in=_size(path))
+    with pd.ExcelFile(path) as workbook:
+        for sheet in sheet_names:
+            df = workbook.parse(sheet, usecols=columns)
+            metrics.count(rows_in=len(df))
+            yield sheet, _finish(df, index_col, date_columns, date_format)
+
+
+def read_sheets(folder, name, sheet_names, fmt="parquet", index_col=None,
+                columns=None, date_columns=None, date_format="%d.%m.%Y"):
+    """
+    Read sheets written by write_sheets, falling back to a legacy workbook.
+
+    Args:
+        folder (str): Folder containing the workbook or sheet folder
+        name (str): Workbook name without extension
+        sheet_names (list): Sheets to load
+        fmt (str): Preferred format
+        index_col, columns, date_columns, date_format: See read_table
+
+    Returns:
+        dict: Sheet name -> DataFrame
+    """
+    return dict(iter_sheets(folder, name, sheet_names, fmt, index_col, columns,
+                            date_columns, date_format))
+
+
+def _dataset(path, fmt):
+    import pyarrow.dataset as ds
+
+    return ds.dataset(path, format="parquet" if fmt == "parquet" else "ipc")
+
+
+def _filter_expression(where):
+    import pandas as pd
+    import pyarrow.compute as pc
+
+    operators = {"==": "__eq__", "!=": "__ne__", "<": "__lt__", "<=": "__le__", ">": "__gt__", ">=": "__ge__"}
+    expression = None
+    for column, op, value in where:
+        if isinstance(value, pd.Timestamp):
+            value = value.to_pydatetime()
+        term = getattr(pc.field(column), operators[op])(value)
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def table_columns(folder, name, fmt="parquet"):
+    """Column names of a stored table without loading its rows"""
+    path, found = find_table(folder, name, fmt)
+    if found == "excel":
+        import pandas as pd
+
+        return list(pd.read_excel(path, nrows=0).columns)
+    return list(_dataset(path, found).schema.names)
+
+
+def scan_table(folder, name, fmt="parquet", where=None, index_col=None, columns=None,
+               date_columns=None, date_format="%d.%m.%Y"):
+    """
+    Read only the rows of a stored table matching all conditions.
+
+    Columnar tables are filtered while reading (row groups outside the
+    conditions are skipped), so only the matching rows are materialized.
+    Excel files are read completely and filtered afterwards.
+
+    Args:
+        where (list, optional): (column, operator, value) conditions, e.g.
+            [('Date', '>=', start), ('Date', '<', stop)]; operators
+            ==, !=, <, <=, >, >=
+        folder, name, fmt, index_col, columns, date_columns, date_format:
+            See read_table
+
+    Returns:
+        pd.DataFrame: The matching rows
+    """
+    path, found = find_table(folder, name, fmt)
+    if found == "excel":
+        import pandas as pd
+
+        df = _finish(pd.read_excel(path, usecols=columns), None, date_columns, date_format)
+        for column, op, value in where or []:
+            df = df[getattr(df[column], {"==": "eq", "!=": "ne", "<": "lt", "<=": "le",
+                                         ">": "gt", ">=": "ge"}[op])(value)]
+        metrics.count(rows_in=len(df), bytes_in=_size(path))
+        return _finish(df.reset_index(drop=True), index_col, None, date_format)
+
+    table = _dataset(path, found).to_table(columns=columns,
+                                            filter=_filter_expression(where) if where else None)
+    df = table.to_pandas()
+    metrics.count(rows_in=len(df), bytes_in=table.nbytes)
+    return _finish(df, index_col, date_columns, date_format)
+
+
+def export_excel(folder, name, fmt="parquet"):
+    """
+    Write an .xlsx copy of a stored table.
+
+    Returns:
+        str: Path of the copy, None if the table exceeds the Excel row limit
+    """
+    path, found = find_table(folder, name, fmt)
+    if found == "excel":
+        return path
+    if not fits_excel(_dataset(path, found).count_rows(), name):
+        return None
+    df = _read_columnar(path, found)
+    excel_path = table_path(folder, name, "excel")
+    _write_excel({"Sheet1": df}, excel_path)
+    metrics.count(rows_in=len(df), bytes_in=_size(path))
+    return excel_path
+
+
+def column_values(folder, name, column, fmt="parquet", batch_size=1 << 20):
+    """
+    Sorted distinct values of one column, read batch by batch.
+
+    Memory grows with the number of distinct values, not with the rows.
+    """
+    path, found = find_table(folder, name, fmt)
+    if found == "excel":
+        import pandas as pd
+
+        return sorted(pd.read_excel(path, usecols=[column])[column].dropna().unique())
+    import pyarrow.compute as pc
+
+    values = set()
+    for batch in _dataset(path, found).to_batches(columns=[column], batch_size=batch_size):
+        values.update(pc.unique(batch.column(0)).to_pylist())
+    values.discard(None)
+    return sorted(values)
+
+
+class TableWriter:
+    """
+    Write a table part by part, e.g. one partition of a build at a time.
+
+    Parquet parts become row groups of one file and Feather parts record
+    batches, so only the current part is held in memory. Excel has no
+    append mode; its parts are collected and written by `close`.
+
+    Args:
+        folder (str): Target folder, created if missing
+        name (str): Table name without extension
+        fmt (str): 'parquet', 'feather' or 'excel'
+        index (bool): Store the index of every part as a regular column
+    """
+
+    def __init__(self, folder, name, fmt="parquet", index=False):
+        _check_format(fmt)
+        os.makedirs(folder, exist_ok=True)
+        self.path = table_path(folder, name, fmt)
+        self.fmt = fmt
+        self.index = index
+        self.rows = 0
+        self._schema = None
+        self._writer = None
+        self._parts = []
+
+    def write(self, df):
+        """Append a part; its columns must match the first part"""
+        import pyarrow as pa
+
+        df = _prepare(df, self.index)
+        self.rows += len(df)
+        if self.fmt == "excel":
+            self._parts.append(df)
+            return
+        table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.fmt == "parquet":
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(self.path, self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        """Finish the file, returns its path"""
+        if self.fmt == "excel":
+            import pandas as pd
+
+            _write_excel({"Sheet1": pd.concat(self._parts) if self._parts else pd.DataFrame()}, self.path)
+            self._parts = []
+        elif self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self.path):
+            metrics.count(rows_out=self.rows, bytes_out=_size(self.path))
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,424 @@
+"""
+Text extraction from central bank press conference PDFs.
+
+Parsing runs in worker processes (`extract_pdf` is a pure function of the
+PDF file), while the parent process assigns date folders and writes the
+text files. A JSON manifest with the content hash of every processed PDF
+makes reruns skip unchanged files and reuse their folders.
+
+Headers, section files and date patterns come from the central bank
+profiles in stock_pipeline.central_banks; with `central_bank=None` every
+PDF is parsed for all profiles at once and filed under the one it matches.
+
+`chunk_by_tokens` splits the extracted text into model inputs along token
+boundaries, preferring sentence edges, so no chunk is truncated by the
+model and overlap between chunks is an explicit number of tokens.
+"""
+import bisect
+import functools
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from stock_pipeline import metrics
+
+HEADERS = [
+    "Financial and monetary conditions",
+    "Inflation",
+    "Economic activity",
+    "Risk assessment",
+    "Press conference",
+    "Conclusion"
+]
+
+SECTION_MAPPING = {
+    "Conclusion": "1_CONCLUSION",
+    "Inflation": "2_INFLATION",
+    "Economic activity": "3_ECONOMIC_ACTIVITY",
+    "Risk assessment": "4_RISK_ASSESSMENT",
+    "Press conference": "5_PRESS_CONFERENCE",
+    "Financial and monetary conditions": "6_FINANCIAL_MONETARY_CONDITIONS"
+}
+
+# Phrase that ends the Conclusion section
+CONCLUSION_END = "We are now ready to take your questions"
+
+MANIFEST_FILE = ".manifest.json"
+
+# Approximate tokens (words and punctuation) when no model tokenizer is given
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_START_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[\"'“(\[]?[A-Z0-9])")
+
+
+def convert_month_to_number(month_name):
+    """Convert month name to number with leading zero"""
+    month_mapping = {
+        'january': '01', 'jan': '01',
+        'february': '02', 'feb': '02',
+        'march': '03', 'mar': '03',
+        'april': '04', 'apr': '04',
+        'may': '05',
+        'june': '06', 'jun': '06',
+        'july': '07', 'jul': '07',
+        'august': '08', 'aug': '08',
+        'september': '09', 'sep': '09',
+        'october': '10', 'oct': '10',
+        'november': '11', 'nov': '11',
+        'december': '12', 'dec': '12'
+    }
+    return month_mapping.get(month_name.lower(), month_name)
+
+
+def extract_sections_precise(text, headers):
+    """
+    Extracts sections only when headers appear alone on a line
+    Special handling for Conclusion section which ends at "We are now ready to take your questions."
+    Sections are keyed by the header as given in `headers`
+    """
+    from stock_pipeline.central_banks import CentralBankProfile, SectionParser
+
+    profile = CentralBankProfile("sections", headers, end_markers={"Conclusion": CONCLUSION_END})
+    return SectionParser([profile]).sections(text)[0]
+
+
+@functools.lru_cache(maxsize=None)
+def section_parser(names=None):
+    """Compiled SectionParser of the registered profiles `names` (all if None), one per process"""
+    from stock_pipeline.central_banks import SectionParser, get_profiles
+
+    return SectionParser(get_profiles(None if names is None else list(names)))
+
+
+def regex_token_spans(text):
+    """Character spans of words and punctuation marks"""
+    return [m.span() for m in TOKEN_PATTERN.finditer(text)]
+
+
+def sentence_start_offsets(text):
+    """Character offsets where a new sentence starts"""
+    return [m.end() for m in SENTENCE_START_PATTERN.finditer(text)]
+
+
+def chunk_by_tokens(text, token_spans=regex_token_spans, max_tokens=510, stride=0,
+                    sentence_starts=sentence_start_offsets, min_length=50):
+    """
+    Split a text into chunks of at most `max_tokens` tokens.
+
+    A chunk ends at the last sentence start that fits; only a sentence
+    longer than `max_tokens` is cut at a token boundary. With `stride` > 0
+    consecutive chunks share up to that many tokens, and the overlap starts
+    at a sentence edge where one is available.
+
+    Args:
+        text (str): Document text
+        token_spans (callable): text -> list of (start, end) character spans
+            of the tokens, e.g. from a model tokenizer's offset mapping
+        max_tokens (int): Token budget per chunk (without special tokens)
+        stride (int): Tokens shared by consecutive chunks
+        sentence_starts (callable, optional): text -> character offsets of
+            sentence starts; None cuts at token boundaries only
+        min_length (int): Drop chunks with at most this many non-blank characters
+
+    Returns:
+        list: dicts with 'text', 'start', 'end' (character offsets) and 'tokens'
+    """
+    if stride >= max_tokens:
+        raise ValueError(f"stride ({stride}) must be smaller than max_tokens ({max_tokens})")
+
+    spans = token_spans(text)
+    n_tokens = len(spans)
+    token_starts = [start for start, _ in spans]
+
+    # Token indices at which a sentence begins
+    boundaries = []
+    if sentence_starts is not None:
+        boundaries = sorted({bisect.bisect_left(token_starts, offset)
+                             for offset in sentence_starts(text)} - {0, n_tokens})
+
+    def last_boundary(low, high):
+        """Largest boundary b with low < b <= high, None if there is none"""
+        i = bisect.bisect_right(boundaries, high) - 1
+        return boundaries[i] if i >= 0 and boundaries[i] > low else None
+
+    chunks = []
+    start = 0
+    while start < n_tokens:
+        end = min(start + max_tokens, n_tokens)
+        if end < n_tokens:
+            end = last_boundary(start, end) or end
+
+        chunk_text = text[spans[start][0]:spans[end - 1][1]]
+        if len(chunk_text.strip()) > min_length:
+            chunks.append({"text": chunk_text, "start": spans[start][0],
+                           "end": spans[end - 1][1], "tokens": end - start})
+        if end >= n_tokens:
+            break
+
+        next_start = end
+        if stride:
+            next_start = max(end - stride, start + 1)
+            snapped = last_boundary(next_start - 1, end - 1)
+            next_start = snapped if snapped is not None and snapped > start else next_start
+        start = next_start
+    return chunks
+
+
+def read_pdf_text(pdf_file):
+    """Text of all pages of a PDF, joined once instead of concatenated per page"""
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_file)
+    return "".join(page.extract_text() or "" for page in reader.pages)
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_pdf(pdf_file, date_format, central_bank="ECB", parser=None):
+    """
+    Parse one PDF without touching the output folders.
+
+    Args:
+        pdf_file (str): PDF path
+        date_format (str): 'text' or 'number'
+        central_bank (str, optional): Profile to parse with; None detects
+            the best matching profile of `parser`
+        parser (SectionParser, optional): Compiled profiles, defaults to
+            the registered profile `central_bank` (all if None)
+
+    Returns:
+        dict: 'pdf', 'text', 'central_bank', 'date' (folder name) and
+        'sections' (section file key -> content)
+
+    Raises:
+        ValueError: If no profile matches the PDF
+    """
+    text = read_pdf_text(pdf_file)
+    if parser is None:
+        parser = section_parser(None if central_bank is None else (central_bank,))
+    parsed = parser.parse(text)
+    if central_bank is None:
+        central_bank = parser.identify(parsed)
+        if central_bank is None:
+            raise ValueError(f"No central bank profile matches {os.path.basename(pdf_file)}")
+    return {
+        "pdf": pdf_file,
+        "text": text,
+        "central_bank": central_bank,
+        "date": parser.date_folder(central_bank, parsed, date_format, pdf_file),
+        "sections": parser.section_files(central_bank, parsed[central_bank]["sections"]),
+    }
+
+
+def _timed_extract(pdf_file, date_format, central_bank="ECB", parser=None):
+    """
+    extract_pdf measured in the worker process.
+
+    Returns:
+        tuple: (extraction or None, error details or None, wall seconds,
+        CPU seconds)
+    """
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        extraction, error = extract_pdf(pdf_file, date_format, central_bank, parser), None
+    except Exception as e:
+        extraction, error = None, metrics.error_details(e)
+    return extraction, error, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def write_extraction(extraction, date_folder):
+    """
+    Write 0_FULL.txt and the section files of an extraction.
+
+    Text files of an earlier extraction into the same folder that this one
+    does not write (e.g. a section the PDF no longer has) are removed.
+    """
+    os.makedirs(date_folder, exist_ok=True)
+    current = {"0_FULL.txt"} | {f"{section_key}.txt" for section_key in extraction["sections"]}
+    for entry in os.scandir(date_folder):
+        if entry.is_file() and entry.name.endswith(".txt") and entry.name not in current:
+            os.remove(entry.path)
+    with open(os.path.join(date_folder, "0_FULL.txt"), "w", encoding="utf-8") as f:
+        f.write(extraction["text"])
+    for section_key, section_content in extraction["sections"].items():
+        with open(os.path.join(date_folder, f"{section_key}.txt"), "w", encoding="utf-8") as f:
+            f.write(section_content)
+
+
+class ExtractionManifest:
+    """
+    Content hashes and output folders of already extracted PDFs.
+
+    Stored as JSON in the central bank's text folder and saved after every
+    finished PDF, so an interrupted batch resumes where it stopped.
+    """
+
+    def __init__(self, base_path):
+        self.path = os.path.join(base_path, MANIFEST_FILE)
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_current(self, pdf_name, sha256, date_format, base_path):
+        """True if the PDF was extracted with this content and date format"""
+        entry = self.entries.get(pdf_name)
+        return (entry is not None
+                and entry["sha256"] == sha256
+                and entry["date_format"] == date_format
+                and os.path.isdir(os.path.join(base_path, entry["folder"])))
+
+    def folder_owner(self, folder):
+        """Name of the PDF that owns a folder, None if unclaimed"""
+        for pdf_name, entry in self.entries.items():
+            if entry["folder"] == folder:
+                return pdf_name
+        return None
+
+    def record(self, pdf_name, sha256, date_format, folder):
+        self.entries[pdf_name] = {"sha256": sha256, "date_format": date_format, "folder": folder}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def _is_folder_of(folder, date_name):
+    """True if `folder` is `date_name` or one of its '...new' duplicates"""
+    return re.fullmatch(re.escape(date_name) + "(new)*", folder) is not None
+
+
+def _assign_folder(manifest, pdf_name, date_name, claimed):
+    """
+    Folder for a (re-)extracted PDF.
+
+    A changed PDF keeps its previous folder as long as the folder still
+    has the PDF's date name (a new date format gives a new name). A folder
+    that exists but is owned by no PDF (e.g. from a run before the manifest
+    existed) is reused instead of creating a '...new' duplicate; only a
+    folder owned by a different PDF gets a unique name.
+    """
+    entry = manifest.entries.get(pdf_name)
+    if entry is not None and entry["folder"] not in claimed and _is_folder_of(entry["folder"], date_name):
+        return entry["folder"]
+
+    def taken(folder):
+        owner = manifest.folder_owner(folder)
+        return folder in claimed or (owner is not None and owner != pdf_name)
+
+    folder = date_name
+    while taken(folder):
+        folder = f"{folder}new"
+    return folder
+
+
+def _move_folder(base_path, previous, folder):
+    """Move a PDF's previous output folder to its new name (its files are written again)"""
+    previous_path = os.path.join(base_path, previous)
+    if not os.path.isdir(previous_path):
+        return
+    folder_path = os.path.join(base_path, folder)
+    if os.path.exists(folder_path):
+        shutil.rmtree(previous_path)
+    else:
+        os.replace(previous_path, folder_path)
+
+
+def extract_batch(pdf_files, central_bank, date_format, text_output, workers=None, force=False,
+                  parser=None):
+    """
+    Extract many PDFs on a process pool, skipping unchanged ones.
+
+    Args:
+        pdf_files (list): PDF paths
+        central_bank (str): Sub-folder of `text_output` and profile (e.g.
+            'ECB'); None files every PDF under the profile it matches
+        date_format (str): 'text' or 'number'
+        text_output (str): Root folder for the extracted text
+        workers (int, optional): Worker processes, defaults to the CPU count.
+            1 runs everything in the current process
+        force (bool): Re-extract PDFs even if their hash is unchanged
+        parser (SectionParser, optional): Compiled profiles, defaults to the
+            registered ones (see extract_pdf)
+
+    Returns:
+        dict: Lists of PDF paths under 'processed', 'skipped' and 'failed'
+        (the latter as (path, error message) tuples)
+    """
+    if parser is None:
+        parser = section_parser(None if central_bank is None else (central_bank,))
+    banks = parser.names if central_bank is None else [central_bank]
+    base_paths = {bank: os.path.join(text_output, bank) for bank in banks}
+    manifests = {bank: ExtractionManifest(base_path) for bank, base_path in base_paths.items()}
+    summary = {"processed": [], "skipped": [], "failed": []}
+
+    hashes = {}
+    pending = []
+    for pdf_file in pdf_files:
+        pdf_name = os.path.basename(pdf_file)
+        hashes[pdf_file] = file_sha256(pdf_file)
+        if not force and any(manifests[bank].is_current(pdf_name, hashes[pdf_file], date_format, base_paths[bank])
+                             for bank in banks):
+            summary["skipped"].append(pdf_file)
+        else:
+            pending.append(pdf_file)
+
+    claimed = {bank: set() for bank in banks}
+
+    def finish(pdf_file, extraction):
+        pdf_name = os.path.basename(pdf_file)
+        bank = extraction["central_bank"]
+        manifest = manifests[bank]
+        previous = manifest.entries.get(pdf_name, {}).get("folder")
+        folder = _assign_folder(manifest, pdf_name, extraction["date"], claimed[bank])
+        if previous is not None and previous != folder and previous not in claimed[bank]:
+            # Renamed (e.g. another date_format): no folder keeps the old name
+            _move_folder(base_paths[bank], previous, folder)
+        claimed[bank].add(folder)
+        write_extraction(extraction, os.path.join(base_paths[bank], folder))
+        manifest.record(pdf_name, hashes[pdf_file], date_format, folder)
+        manifest.save()
+        summary["processed"].append(pdf_file)
+
+    def collect(pdf_file, result):
+        extraction, error, wall, cpu = result
+        if error is None:
+            try:
+                finish(pdf_file, extraction)
+            except Exception as e:
+                error = metrics.error_details(e)
+        if error is not None:
+            summary["failed"].append((pdf_file, f"{error['type']}: {error['message']}"))
+        metrics.record_item("pdf", os.path.basename(pdf_file), wall, cpu, error,
+                            bytes_in=os.path.getsize(pdf_file))
+
+    if workers == 1 or len(pending) <= 1:
+        for pdf_file in pending:
+            collect(pdf_file, _timed_extract(pdf_file, date_format, central_bank, parser))
+        return summary
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_timed_extract, pdf_file, date_format, central_bank, parser): pdf_file
+                   for pdf_file in sorted(pending)}
+        for future in as_completed(futures):
+            pdf_file = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself died (the extraction errors are in the result)
+                result = None, metrics.error_details(e), 0.0, None
+            collect(pdf_file, result)
+    return summary
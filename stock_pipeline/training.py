@@ -0,0 +1,166 @@
+"""
+Training on one shared feature matrix for all dataset variants.
+
+The dataset variants differ only in the sentiment columns they add to the
+base features, so the complete `dataset` table contains every variant.
+It is loaded, split and standardized once, and a variant is just an index
+array into its columns. StandardScaler works column by column, so scaling
+the full matrix once gives the same features as one scaler per variant.
+
+Models are fitted from the sufficient statistics of the training rows
+(see stock_pipeline.search). X'X is computed once and every variant selects
+its block of it. Predictions multiply the shared matrix with zero-padded
+coefficients, so no per-variant copy of the data is made.
+"""
+import numpy as np
+import pandas as pd
+
+from stock_pipeline import storage
+from stock_pipeline.datasets import TARGET_COLUMNS, VARIANTS, feature_columns
+from stock_pipeline.modeling import TARGET_PARAMS, mse, r2
+from stock_pipeline.search import SufficientStats, fit_grid
+
+# Model -> parameters, either shared by all targets or keyed by target
+DEFAULT_MODELS = {
+    "BayesianRidge": TARGET_PARAMS,
+    "Ridge": {},
+    "LinearRegression": {},
+}
+
+
+class FeatureMatrix:
+    """
+    Features and targets of all dataset variants in one array each.
+
+    Attributes:
+        X (np.ndarray): Features, shape (rows, features), float64
+        Y (np.ndarray): Targets, shape (rows, targets), float64
+        dates (pd.DatetimeIndex): Event date of every row
+        columns (list): Feature column names
+        targets (list): Target column names
+    """
+
+    def __init__(self, X, Y, dates, columns, targets):
+        self.X = X
+        self.Y = Y
+        self.dates = dates
+        self.columns = list(columns)
+        self.targets = list(targets)
+        self._position = {col: i for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, df, targets=TARGET_COLUMNS):
+        """Matrix of a date-indexed table; every non-target column is a feature"""
+        columns = [col for col in df.columns if col not in targets]
+        X = df[columns].to_numpy(dtype=np.float64)
+        Y = df[list(targets)].to_numpy(dtype=np.float64)
+        return cls(X, Y, pd.DatetimeIndex(df.index), columns, targets)
+
+    @classmethod
+    def from_table(cls, folder, name="dataset", fmt="parquet"):
+        """Load the complete dataset table written by the build stage"""
+        df = storage.read_table(folder, name, fmt=fmt, index_col='Date', date_columns=['Date'])
+        return cls.from_frame(df)
+
+    def variant_index(self, variant):
+        """
+        Column positions of a variant.
+
+        Args:
+            variant (str or list): Name in datasets.VARIANTS or a list of columns
+
+        Returns:
+            np.ndarray: Positions in `columns`, in the variant's column order
+        """
+        columns = feature_columns(variant) if isinstance(variant, str) else variant
+        missing = [col for col in columns if col not in self._position]
+        if missing:
+            raise KeyError(f"Columns {missing} are not in the feature matrix")
+        return np.array([self._position[col] for col in columns], dtype=np.intp)
+
+    def view(self, variant):
+        """Feature columns of a variant as a new array, e.g. for scikit-learn estimators"""
+        return self.X[:, self.variant_index(variant)]
+
+    def test_mask(self, test_dates):
+        """Boolean mask of the rows on `test_dates`"""
+        return np.asarray(self.dates.normalize().isin(test_dates))
+
+
+def standardize(X, train_mask):
+    """
+    Scale all columns with the mean and standard deviation of the training rows.
+
+    Same result as StandardScaler fitted on the training rows (constant
+    columns keep a scale of 1).
+    """
+    mean = X[train_mask].mean(axis=0)
+    scale = X[train_mask].std(axis=0)
+    scale[scale < 10 * np.finfo(np.float64).eps * np.maximum(np.abs(mean), 1.0)] = 1.0
+    return (X - mean) / scale
+
+
+def target_params(params, target):
+    """Parameters of `target` from a shared or per-target parameter dict"""
+    return params[target] if target in params else params
+
+
+def train_variants(matrix, test_dates, variants=None, models=None):
+    """
+    Fit and evaluate every variant/target/model combination.
+
+    Args:
+        matrix (FeatureMatrix): Shared features and targets
+        test_dates (list): Dates of the test rows
+        variants (list, optional): Variant names (see datasets.VARIANTS),
+            defaults to all of them
+        models (dict, optional): Model name -> parameters, either one dict
+            for all targets or one per target; defaults to DEFAULT_MODELS
+
+    Returns:
+        pd.DataFrame: One row per variant, target and model with train/test
+        MSE and R² of the model and of the mean baseline
+    """
+    variants = list(VARIANTS) if variants is None else list(variants)
+    models = DEFAULT_MODELS if models is None else models
+    test_mask = matrix.test_mask(test_dates)
+    train_mask = ~test_mask
+    if not test_mask.any() or not train_mask.any():
+        raise ValueError("The test dates must leave rows for both training and testing")
+
+    X = standardize(matrix.X, train_mask)
+    Y = matrix.Y
+    stats = SufficientStats.from_data(X[train_mask], Y[train_mask])
+    n_targets = len(matrix.targets)
+    diagonal = np.arange(n_targets)
+    y_mean = Y[train_mask].mean(axis=0)
+
+    results = []
+    for variant in variants:
+        index = matrix.variant_index(variant)
+        variant_stats = stats.select(index)
+        for model, params in models.items():
+            # One candidate per target; candidate j is only used for target j
+            candidates = [target_params(params, target) for target in matrix.targets]
+            coef, intercept = fit_grid(variant_stats, model, candidates)
+            full_coef = np.zeros((X.shape[1], n_targets))
+            full_coef[index] = coef[diagonal, :, diagonal].T
+            pred = X @ full_coef + intercept[diagonal, diagonal]
+
+            for t, target in enumerate(matrix.targets):
+                y_tr, y_te = Y[train_mask, t], Y[test_mask, t]
+                results.append({
+                    'Variant': variant,
+                    'Target': target,
+                    'Model': model,
+                    'Train_MSE': mse(y_tr, pred[train_mask, t]),
+                    'Test_MSE': mse(y_te, pred[test_mask, t]),
+                    'Train_R2': r2(y_tr, pred[train_mask, t]),
+                    'Test_R2': r2(y_te, pred[test_mask, t]),
+                    'Baseline_Train_MSE': mse(y_tr, y_mean[t]),
+                    'Baseline_Test_MSE': mse(y_te, y_mean[t]),
+                    'Baseline_Test_R2': r2(y_te, y_mean[t]),
+                    'Train_Rows': int(train_mask.sum()),
+                    'Test_Rows': int(test_mask.sum())
+                })
+    return pd.DataFrame(results)
@@ -0,0 +1,124 @@
+"""
+Vectorized lag/lead window extraction around event dates.
+
+The stock table holds one row per (instrument, trading day). For every event
+row we want the closes of the previous `n_lags` and the next `n_leads`
+trading days of the same instrument. Instead of searching the table once per
+event, the rows are sorted by instrument and date once and a strided view
+over the value column yields all windows in a single pass.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def lag_columns(n_lags, value_col='Close'):
+    """Column names for the lags, oldest first (e.g. Close_t-14 ... Close_t-1)"""
+    return [f'{value_col}_t-{k}' for k in range(n_lags, 0, -1)]
+
+
+def lead_columns(n_leads, value_col='Close'):
+    """Column names for the leads (e.g. Close_t+1 ... Close_t+3)"""
+    return [f'{value_col}_t+{k}' for k in range(1, n_leads + 1)]
+
+
+def instrument_codes(df, onehot_cols):
+    """
+    Derive an integer instrument code per row from one-hot columns.
+
+    Args:
+        df (pd.DataFrame): Table containing the one-hot columns
+        onehot_cols (list): One-hot column names (e.g. ['Index_DAX', ...])
+
+    Returns:
+        np.ndarray: Position of the column that equals 1 for each row
+    """
+    return df[onehot_cols].to_numpy(dtype=float).argmax(axis=1)
+
+
+def lag_lead_matrix(values, groups, positions, n_lags, n_leads):
+    """
+    Build the lag/lead matrix for selected rows of a grouped series.
+
+    `values` and `groups` must be sorted by group and then by time. Entries
+    that fall outside the row's own group (or outside the array) are NaN, so
+    windows never leak from one instrument into the next.
+
+    Args:
+        values (np.ndarray): 1-D value array (e.g. closes)
+        groups (np.ndarray): 1-D integer group code per value
+        positions (np.ndarray): Row positions to build windows for
+        n_lags (int): Number of rows before each position
+        n_leads (int): Number of rows after each position
+
+    Returns:
+        np.ndarray: Shape (len(positions), n_lags + 1 + n_leads), column
+        `n_lags` holds the value at the position itself
+    """
+    values = np.asarray(values, dtype=float)
+    groups = np.asarray(groups)
+    positions = np.asarray(positions, dtype=np.intp)
+    width = n_lags + 1 + n_leads
+
+    padded_values = np.concatenate([np.full(n_lags, np.nan), values, np.full(n_leads, np.nan)])
+    padded_groups = np.concatenate([np.full(n_lags, -1), groups, np.full(n_leads, -1)])
+
+    # Views only - the fancy index below copies just the selected windows
+    value_windows = sliding_window_view(padded_values, width)[positions]
+    group_windows = sliding_window_view(padded_groups, width)[positions]
+
+    same_group = group_windows == groups[positions][:, None]
+    return np.where(same_group, value_windows, np.nan)
+
+
+def build_event_windows(df_stock, event_dates, n_lags=14, n_leads=3,
+                        value_col='Close', group_codes=None, onehot_cols=None):
+    """
+    Extract the event rows of `df_stock` together with their lag/lead closes.
+
+    Args:
+        df_stock (pd.DataFrame): Date-indexed stock table, one row per
+            instrument and trading day
+        event_dates (iterable): Dates to build windows for
+        n_lags (int): Trading days before the event (Close_t-n ... Close_t-1)
+        n_leads (int): Trading days after the event (Close_t+1 ... Close_t+n)
+        value_col (str): Column the windows are built from
+        group_codes (np.ndarray, optional): Instrument code per row. Derived
+            from `onehot_cols` if not given
+        onehot_cols (list, optional): One-hot instrument columns. Defaults to
+            all columns starting with 'Index_'
+
+    Returns:
+        pd.DataFrame: Event rows sorted by date with the lag columns placed
+        first and the lead columns right after `value_col`
+    """
+    if group_codes is None:
+        if onehot_cols is None:
+            onehot_cols = [col for col in df_stock.columns if col.startswith('Index_')]
+        group_codes = instrument_codes(df_stock, onehot_cols)
+    group_codes = np.asarray(group_codes)
+
+    # Sort once by instrument, then date; remember where each row went
+    dates = df_stock.index.to_numpy()
+    order = np.lexsort((dates, group_codes))
+    sorted_values = df_stock[value_col].to_numpy(dtype=float)[order]
+    sorted_groups = group_codes[order]
+    sorted_position = np.empty_like(order)
+    sorted_position[order] = np.arange(len(order))
+
+    # Event rows ordered by date, original row order within a date
+    event_rows = np.flatnonzero(df_stock.index.isin(pd.DatetimeIndex(event_dates)))
+    event_rows = event_rows[np.argsort(dates[event_rows], kind='stable')]
+
+    windows = lag_lead_matrix(sorted_values, sorted_groups, sorted_position[event_rows],
+                              n_lags, n_leads)
+
+    df_events = df_stock.iloc[event_rows].copy()
+    lags = pd.DataFrame(windows[:, :n_lags], index=df_events.index,
+                        columns=lag_columns(n_lags, value_col))
+    leads = pd.DataFrame(windows[:, n_lags + 1:], index=df_events.index,
+                         columns=lead_columns(n_leads, value_col))
+
+    # Keep the original layout: lags, ..., value_col, leads, rest
+    split = df_events.columns.get_loc(value_col) + 1
+    return pd.concat([lags, df_events.iloc[:, :split], leads, df_events.iloc[:, split:]], axis=1)
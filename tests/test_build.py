@@ -0,0 +1,70 @@
+"""Partitioned builds against the in-memory build on the repository's inputs"""
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from stock_pipeline import storage
+from stock_pipeline.datasets import VARIANTS
+from stock_pipeline.stages import build
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def root(tmp_path_factory):
+    """Project root with the build inputs as parquet tables"""
+    root = tmp_path_factory.mktemp("project")
+    config = build.DEFAULT_CONFIG
+    for folder, name in ((config['input_folder_interest'], config['interest_table']),
+                         (config['input_folder_stock'], config['stock_table'])):
+        df = storage.read_table(os.path.join(REPO, folder), name, fmt="excel", date_columns=["Date"])
+        storage.write_table(df, str(root / folder), name)
+    sentiment_folder = root / config['input_folder_sentiment']
+    sentiment_folder.mkdir(parents=True)
+    shutil.copy(os.path.join(REPO, config['input_folder_sentiment'], config['sentiment_file']), sentiment_folder)
+    return str(root)
+
+
+def built_tables(root, output_folder, **config):
+    build.run({"output_folder": output_folder, **config}, root=root)
+    folder = os.path.join(root, output_folder)
+    names = [build.DEFAULT_CONFIG['table_name']] + list(VARIANTS)
+    tables = {name: storage.read_table(folder, name) for name in names}
+    tables['feature_store'] = storage.read_table(folder, build.DEFAULT_CONFIG['store_name'])
+    return tables
+
+
+@pytest.mark.parametrize("partition", ["year", "instrument"])
+def test_partitioned_build_matches_the_in_memory_build(root, partition):
+    expected = built_tables(root, "memory")
+    result = built_tables(root, partition, partition=partition)
+
+    assert set(result) == set(expected)
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(result[name], df, check_categorical=False, obj=name)
+
+    # No .xlsx copies and no intermediate tables unless asked for
+    assert sorted(os.listdir(os.path.join(root, partition))) == sorted(f"{name}.parquet" for name in expected)
+    assert os.path.isfile(os.path.join(root, "memory", f"{build.DEFAULT_CONFIG['table_name']}.xlsx"))
+
+
+def test_excel_copies_of_partitioned_builds(root):
+    build.run({"output_folder": "excel", "partition": "instrument", "excel_export": True}, root=root)
+
+    folder = os.path.join(root, "excel")
+    name = build.DEFAULT_CONFIG['table_name']
+    copy = pd.read_excel(os.path.join(folder, f"{name}.xlsx"))
+    assert len(copy) == len(storage.read_table(folder, name))
+
+
+def test_tables_beyond_the_excel_row_limit_get_no_copy(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(storage, "EXCEL_MAX_ROWS", 3)
+    df = pd.DataFrame({"a": range(5)})
+
+    storage.write_table(df, str(tmp_path), "large", excel_export=True)
+    assert storage.export_excel(str(tmp_path), "large") is None
+
+    assert not os.path.exists(tmp_path / "large.xlsx")
+    assert "skipping its .xlsx copy" in capsys.readouterr().out
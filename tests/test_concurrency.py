@@ -0,0 +1,81 @@
+"""run_bounded retries and failure reporting"""
+import threading
+
+from stock_pipeline.concurrency import PermanentError, call_with_retries, run_bounded
+
+
+class FlakyTask:
+    """Fails the first `failures[item]` calls of each item, then returns item * 10"""
+
+    def __init__(self, failures, permanent=()):
+        self.failures = dict(failures)
+        self.permanent = set(permanent)
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, item):
+        with self._lock:
+            self.calls[item] = self.calls.get(item, 0) + 1
+            calls = self.calls[item]
+        if item in self.permanent:
+            raise PermanentError(f"no data for {item}")
+        if calls <= self.failures.get(item, 0):
+            raise ConnectionError(f"attempt {calls} of {item} failed")
+        return item * 10
+
+
+def test_transient_failures_are_retried():
+    task = FlakyTask({1: 2, 3: 1})
+
+    batch = run_bounded(task, [1, 2, 3], max_workers=2, retries=3, backoff=0)
+
+    assert batch.ok
+    assert batch.results == {1: 10, 2: 20, 3: 30}
+    assert task.calls == {1: 3, 2: 1, 3: 2}
+
+
+def test_failures_are_reported_after_the_last_retry():
+    task = FlakyTask({1: 10}, permanent={2})
+
+    batch = run_bounded(task, [1, 2, 3], max_workers=3, retries=2, backoff=0)
+
+    assert not batch.ok
+    assert batch.results == {3: 30}
+    assert set(batch.failures) == {1, 2}
+
+    exhausted = batch.failures[1]
+    assert isinstance(exhausted.error, ConnectionError)
+    assert exhausted.attempts == 3
+    assert task.calls[1] == 3
+
+    # A PermanentError is not retried
+    assert batch.failures[2].attempts == 1
+    assert task.calls[2] == 1
+
+    summary = batch.summary()
+    assert (summary["succeeded"], summary["failed"]) == (1, 2)
+    assert {f["item"]: f["error_type"] for f in summary["failures"]} == {1: "ConnectionError",
+                                                                         2: "PermanentError"}
+
+
+def test_results_keep_the_input_order_and_report_progress():
+    done = []
+
+    batch = run_bounded(FlakyTask({}), [5, 4, 3, 2, 1], max_workers=4, backoff=0,
+                        on_done=lambda item, result, failure: done.append((item, result, failure)))
+
+    assert list(batch.results) == [5, 4, 3, 2, 1]
+    assert sorted(done) == [(item, item * 10, None) for item in [1, 2, 3, 4, 5]]
+
+
+def test_pauses_double_between_retries():
+    pauses = []
+
+    result, attempts = call_with_retries(FlakyTask({"x": 3}), "x", retries=3, backoff=1.0,
+                                         sleep=pauses.append)
+
+    assert (result, attempts) == ("x" * 10, 4)
+    assert len(pauses) == 3
+    # Jitter scales each pause into [delay / 2, delay]
+    for attempt, pause in enumerate(pauses, start=1):
+        assert 2 ** (attempt - 1) / 2 <= pause <= 2 ** (attempt - 1)
@@ -0,0 +1,67 @@
+"""Minute-offset features of timezone-aware bars"""
+import numpy as np
+import pandas as pd
+
+from stock_pipeline.intraday import (MinuteBars, build_intraday_events, event_timestamps,
+                                     event_windows, load_minute_bars)
+
+
+def berlin_minute_bars(day, start='12:00', end='18:00'):
+    """Minute bars like Yahoo Finance: Europe/Berlin timestamps, Close = minutes after midnight"""
+    index = pd.date_range(f'{day} {start}', f'{day} {end}', freq='min', tz='Europe/Berlin')
+    return pd.DataFrame({'Close': index.hour * 60 + index.minute}, index=index, dtype=float)
+
+
+def test_timezone_aware_bars_line_up_with_local_event_times():
+    # One winter (UTC+1) and one summer (UTC+2) meeting
+    days = ['2024-01-25', '2024-07-18']
+    events = event_timestamps(days)
+    windows = event_windows(events['Timestamp'], minutes_before=60, minutes_after=120)
+    frame = pd.concat([berlin_minute_bars(day) for day in days])
+
+    bars = MinuteBars.from_frames({'^GDAXI': frame}, windows=windows)
+    df = build_intraday_events(bars, events, offsets=[-60, -1, 0, 5, 120])
+
+    # Clipping keeps 13:15 to 16:45 local time of both days
+    local = pd.DatetimeIndex(bars.timestamps)
+    assert local.strftime('%H:%M').min() == '13:15'
+    assert local.strftime('%H:%M').max() == '16:45'
+    assert len(bars) == 2 * (3 * 60 + 31)
+
+    decision = df[df['Event'] == 'Decision']
+    np.testing.assert_array_equal(decision['Close_m+0'], [14 * 60 + 15] * 2)
+    np.testing.assert_array_equal(decision['Close_m-60'], [13 * 60 + 15] * 2)
+    conference = df[df['Event'] == 'Press_Conference']
+    np.testing.assert_array_equal(conference['Close_m+5'], [14 * 60 + 50] * 2)
+    np.testing.assert_array_equal(conference['Close_m+120'], [16 * 60 + 45] * 2)
+
+
+def test_naive_bars_are_taken_as_local_time():
+    frame = berlin_minute_bars('2024-01-25')
+    naive = frame.tz_localize(None)
+    events = event_timestamps(['2024-01-25'])
+
+    aware_bars = MinuteBars.from_frames({'^GDAXI': frame})
+    naive_bars = MinuteBars.from_frames({'^GDAXI': naive})
+
+    np.testing.assert_array_equal(aware_bars.timestamps, naive_bars.timestamps)
+    df = build_intraday_events(naive_bars, events, offsets=[0])
+    np.testing.assert_array_equal(df['Close_m+0'], [14 * 60 + 15, 14 * 60 + 45])
+
+
+def test_local_files_with_utc_times(tmp_path):
+    frame = berlin_minute_bars('2024-07-18')
+    df = pd.DataFrame({'Timestamp': frame.index.tz_convert('UTC'), 'Symbol': '^GDAXI',
+                       'Close': frame['Close'].to_numpy()})
+    events = event_timestamps(['2024-07-18'])
+    windows = event_windows(events['Timestamp'], minutes_before=60, minutes_after=120)
+
+    for path in (tmp_path / 'bars.parquet', tmp_path / 'bars.csv'):
+        if path.suffix == '.parquet':
+            df.to_parquet(path)
+        else:
+            df.to_csv(path, index=False)
+        bars = load_minute_bars(str(path), windows)
+        result = build_intraday_events(bars, events, offsets=[-60, 0])
+        np.testing.assert_array_equal(result['Close_m+0'], [14 * 60 + 15, 14 * 60 + 45])
+        np.testing.assert_array_equal(result['Close_m-60'], [13 * 60 + 15, 13 * 60 + 45])
@@ -0,0 +1,141 @@
+"""BarCache and fetch_with_cache against an offline fake provider"""
+import pandas as pd
+
+from stock_pipeline.market_data import BarCache, currency_with_cache, fetch_with_cache
+from stock_pipeline.stages.download import StockDataDownloader
+
+
+class FakeProvider:
+    """Serves daily bars from a fixed frame and records every request"""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.requests = []
+        self.currency_requests = 0
+
+    def history(self, symbol, start, end, interval='1d'):
+        self.requests.append((symbol, start, end, interval))
+        index = self.bars.index
+        return self.bars.loc[(index >= pd.Timestamp(start)) & (index < pd.Timestamp(end))].copy()
+
+    def currency(self, symbol):
+        self.currency_requests += 1
+        return 'EUR'
+
+
+def make_bars(start='2024-01-01', periods=30):
+    index = pd.bdate_range(start, periods=periods, name='Date')
+    close = pd.Series(range(periods), index=index, dtype=float) + 100.0
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Volume': 1000.0}, index=index)
+
+
+def test_second_run_fetches_only_the_tail(tmp_path):
+    bars = make_bars()
+    provider = FakeProvider(bars)
+    cache = BarCache(str(tmp_path))
+
+    first = fetch_with_cache(provider, cache, 'SAP.DE', '2024-01-01', '2024-01-20')
+    assert provider.requests == [('SAP.DE', '2024-01-01', '2024-01-20', '1d')]
+    assert cache.high_water_mark('SAP.DE', '1d') == first.index.max()
+
+    # A new run later on: only the bars from the high-water mark onwards are requested
+    second = fetch_with_cache(provider, BarCache(str(tmp_path)), 'SAP.DE', '2024-01-01', '2024-02-10')
+    assert provider.requests[1] == ('SAP.DE', first.index.max().strftime('%Y-%m-%d'), '2024-02-10', '1d')
+
+    expected = bars.loc[(bars.index >= '2024-01-01') & (bars.index < '2024-02-10')]
+    pd.testing.assert_frame_equal(second, expected, check_freq=False)
+
+
+def test_refetched_last_bar_replaces_the_cached_one(tmp_path):
+    bars = make_bars()
+    cache = BarCache(str(tmp_path))
+    fetch_with_cache(FakeProvider(bars), cache, 'SAP.DE', '2024-01-01', '2024-01-10')
+    last = cache.high_water_mark('SAP.DE', '1d')
+
+    revised = bars.copy()
+    revised.loc[last, 'Close'] = -1.0
+    result = fetch_with_cache(FakeProvider(revised), cache, 'SAP.DE', '2024-01-01', '2024-01-20')
+
+    assert result.loc[last, 'Close'] == -1.0
+    assert not result.index.duplicated().any()
+
+
+def test_earlier_start_refetches_the_full_range(tmp_path):
+    bars = make_bars()
+    provider = FakeProvider(bars)
+    cache = BarCache(str(tmp_path))
+    fetch_with_cache(provider, cache, 'SAP.DE', '2024-01-15', '2024-01-31')
+
+    result = fetch_with_cache(provider, cache, 'SAP.DE', '2024-01-01', '2024-01-31')
+
+    assert provider.requests[1][1] == '2024-01-01'
+    assert cache.covered_from('SAP.DE', '1d') == pd.Timestamp('2024-01-01')
+    assert result.index.min() == pd.Timestamp('2024-01-01')
+
+
+def test_covered_range_is_served_from_the_cache(tmp_path):
+    provider = FakeProvider(make_bars())
+    cache = BarCache(str(tmp_path))
+    fetch_with_cache(provider, cache, 'SAP.DE', '2024-01-01', '2024-01-31')
+
+    result = fetch_with_cache(provider, cache, 'SAP.DE', '2024-01-03', '2024-01-10')
+
+    assert len(provider.requests) == 1
+    assert result.index.min() == pd.Timestamp('2024-01-03')
+    assert result.index.max() < pd.Timestamp('2024-01-10')
+
+
+def test_currency_is_asked_once(tmp_path):
+    provider = FakeProvider(make_bars())
+    cache = BarCache(str(tmp_path))
+
+    assert currency_with_cache(provider, cache, 'SAP.DE') == 'EUR'
+    assert currency_with_cache(provider, BarCache(str(tmp_path)), 'SAP.DE') == 'EUR'
+    assert provider.currency_requests == 1
+
+
+class TimeoutProvider(FakeProvider):
+    """FakeProvider that also records the timeout of every request"""
+
+    def __init__(self, bars):
+        super().__init__(bars)
+        self.timeouts = []
+
+    def history(self, symbol, start, end, interval='1d', timeout=None):
+        self.timeouts.append(('history', timeout))
+        return super().history(symbol, start, end, interval)
+
+    def currency(self, symbol, timeout=None):
+        self.timeouts.append(('currency', timeout))
+        return super().currency(symbol)
+
+
+def test_download_passes_the_timeout_to_the_currency_lookup(tmp_path):
+    provider = TimeoutProvider(make_bars())
+    downloader = StockDataDownloader(str(tmp_path / "out"), "stocks.xlsx", cache_dir=str(tmp_path / "cache"),
+                                     provider=provider)
+
+    item = downloader.download_symbol('SAP.DE', '2024-01-01', '2024-02-01', timeout=7)
+
+    assert item['currency'] == 'EUR'
+    assert provider.timeouts == [('history', 7), ('currency', 7)]
+
+
+def test_earlier_range_before_the_cache_leaves_no_gap(tmp_path):
+    bars = make_bars(periods=70)
+    provider = FakeProvider(bars)
+    cache = BarCache(str(tmp_path))
+    fetch_with_cache(provider, cache, 'SAP.DE', '2024-02-01', '2024-03-01')
+
+    # Ends before the cached range: fetched up to the high-water mark
+    early = fetch_with_cache(provider, cache, 'SAP.DE', '2024-01-01', '2024-01-10')
+    assert early.index.max() < pd.Timestamp('2024-01-10')
+    assert provider.requests[1][1:3] == ('2024-01-01', '2024-03-01')
+
+    result = fetch_with_cache(provider, cache, 'SAP.DE', '2024-01-01', '2024-03-20')
+
+    expected = bars.loc[(bars.index >= '2024-01-01') & (bars.index < '2024-03-20')]
+    assert len(result) == 57
+    pd.testing.assert_frame_equal(result, expected, check_freq=False)
+    assert provider.requests[2][1] == '2024-02-29'
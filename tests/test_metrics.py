@@ -0,0 +1,44 @@
+"""Stage and benchmark metrics on platforms without the `resource` module (Windows)"""
+import json
+import sys
+
+from stock_pipeline import benchmark, metrics
+
+
+def test_records_without_resource_or_psutil(monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics, "resource", None)
+    monkeypatch.setitem(sys.modules, "psutil", None)
+    prometheus_path = tmp_path / "metrics.prom"
+
+    with metrics.recording(prometheus_path=str(prometheus_path)) as recorder:
+        with metrics.stage("build"):
+            with metrics.item("variant", "dataset"):
+                metrics.count(rows_out=10)
+            metrics.record_item("pdf", "a.pdf", 0.5)
+
+    assert len(recorder.records) == 3
+    for record in recorder.records:
+        assert record["max_rss_bytes"] is None
+        assert record["children_cpu_s"] is None
+
+    text = prometheus_path.read_text(encoding="utf-8")
+    assert "None" not in text
+    assert "max_rss_bytes{" not in text
+    assert 'stock_pipeline_stage_rows_out{stage="build",status="ok"} 10' in text
+
+
+def test_peak_memory_is_measured_where_available():
+    if metrics.resource is not None:
+        assert metrics.max_rss_bytes() > 0
+        assert metrics._children_cpu() >= 0
+
+
+def test_benchmark_records_without_resource_or_psutil(monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics, "resource", None)
+    monkeypatch.setitem(sys.modules, "psutil", None)
+    record = benchmark.measure(lambda: sum(range(1000)), repeat=1)
+    assert record["max_rss_bytes"] is None
+
+    path = tmp_path / "results.jsonl"
+    benchmark.append_results([record], str(path))
+    assert json.loads(path.read_text(encoding="utf-8"))["max_rss_bytes"] is None
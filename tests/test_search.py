@@ -0,0 +1,85 @@
+"""Vectorized grid search against scikit-learn's GridSearchCV with the notebook setup"""
+import numpy as np
+import pytest
+from sklearn.linear_model import BayesianRidge, LinearRegression, Ridge
+from sklearn.model_selection import GridSearchCV, KFold
+from sklearn.preprocessing import StandardScaler
+
+from stock_pipeline.search import best_params, cross_validate_grid, search
+
+N_SPLITS = 9
+
+# Grids of 04-hyperparamter-configuration.ipynb (max_iter is the current name of n_iter)
+GRIDS = {
+    "LinearRegression": (LinearRegression, {"fit_intercept": [True, False]}),
+    "Ridge": (Ridge, {"alpha": list(np.logspace(-7, 0.05, 5)), "fit_intercept": [True, False]}),
+    "BayesianRidge": (BayesianRidge, {"max_iter": [1, 3, 300], "tol": [1e-6, 1e-2],
+                                      "alpha_init": [None, 0.1], "lambda_init": [None, 0.01],
+                                      "fit_intercept": [True, False]}),
+}
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Scaled features and three percent-change targets, like the dataset variants"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(150, 7)) * rng.uniform(0.1, 10, 7) + rng.normal(0, 5, 7)
+    X = StandardScaler().fit_transform(X)
+    Y = X @ rng.normal(0, 0.5, size=(7, 3)) + rng.normal(0, 1, size=(150, 3))
+    return X, Y
+
+
+@pytest.fixture(scope="module")
+def grid_search(data):
+    """Fitted GridSearchCV per (model, target column), fitted once per module"""
+    X, Y = data
+    fitted = {}
+
+    def fit(model, t):
+        if (model, t) not in fitted:
+            estimator, param_grid = GRIDS[model]
+            fitted[model, t] = GridSearchCV(estimator(), param_grid, scoring="neg_mean_squared_error",
+                                            cv=KFold(n_splits=N_SPLITS, shuffle=False)).fit(X, Y[:, t])
+        return fitted[model, t]
+    return fit
+
+
+@pytest.mark.parametrize("model", list(GRIDS))
+def test_fold_mse_matches_grid_search_cv(data, grid_search, model):
+    X, Y = data
+
+    candidates, fold_mse = cross_validate_grid(X, Y, model, GRIDS[model][1], n_splits=N_SPLITS)
+
+    for t in range(Y.shape[1]):
+        cv_results = grid_search(model, t).cv_results_
+        assert candidates == list(cv_results["params"])
+        expected = -np.stack([cv_results[f"split{i}_test_score"] for i in range(N_SPLITS)])
+        np.testing.assert_allclose(fold_mse[:, :, t], expected, rtol=1e-14, atol=0)
+
+
+def test_notebook_n_iter_grid_keeps_grid_search_cv_order(data, grid_search):
+    X, Y = data
+    param_grid = dict(GRIDS["BayesianRidge"][1])
+    param_grid["n_iter"] = param_grid.pop("max_iter")
+
+    candidates, fold_mse = cross_validate_grid(X, Y, "BayesianRidge", param_grid, n_splits=N_SPLITS)
+
+    cv_results = grid_search("BayesianRidge", 0).cv_results_
+    assert candidates == list(cv_results["params"])
+    expected = -np.stack([cv_results[f"split{i}_test_score"] for i in range(N_SPLITS)])
+    np.testing.assert_allclose(fold_mse[:, :, 0], expected, rtol=1e-14, atol=0)
+
+
+@pytest.mark.parametrize("model", list(GRIDS))
+def test_best_params_match_grid_search_cv(data, grid_search, model):
+    X, Y = data
+    targets = ["Close", "Close_t+1", "Close_t+2"]
+
+    best = best_params(search({"dataset": (X, Y)}, targets, model, GRIDS[model][1],
+                              n_splits=N_SPLITS, workers=1))
+
+    for t, target in enumerate(targets):
+        gs = grid_search(model, t)
+        row = best[best["Target"] == target].iloc[0]
+        assert row["Candidate"] == gs.best_index_
+        np.testing.assert_allclose(row["CV_MSE"], -gs.best_score_, rtol=1e-14, atol=0)
@@ -0,0 +1,106 @@
+"""Offline runs of the sentiment stage with stub scorers"""
+import os
+
+import pandas as pd
+import pytest
+
+from stock_pipeline.sentiment import MODELS, StubScorer
+from stock_pipeline.stages import sentiment
+
+TEXTS = {
+    "14_December_2023": ("Inflation is expected to decline gradually over the coming year. "
+                         "The outlook for economic growth remains uncertain. "
+                         "Labour markets have stayed resilient despite weaker demand. "
+                         "Financing conditions continue to tighten across the euro area."),
+    "02_February_2023": ("The Governing Council decided to raise the key interest rates by 50 basis points. "
+                         "Growth slowed markedly in the fourth quarter of last year. "
+                         "Price pressures remain strong across many sectors of the economy."),
+}
+
+
+@pytest.fixture
+def root(tmp_path):
+    for folder, text in TEXTS.items():
+        date_folder = tmp_path / "02_Preprocessing" / "TEXT" / "ECB" / folder
+        date_folder.mkdir(parents=True)
+        (date_folder / "0_FULL.txt").write_text(text, encoding="utf-8")
+    return str(tmp_path)
+
+
+def output_path(root, filename):
+    return os.path.join(root, sentiment.DEFAULT_CONFIG["output_folder"], filename)
+
+
+def test_stub_run_writes_the_stub_workbook_only(root):
+    df = sentiment.run({"stub": True, "cache_file": None}, root=root)
+
+    assert os.path.isfile(output_path(root, sentiment.DEFAULT_CONFIG["stub_filename"]))
+    assert not os.path.exists(output_path(root, sentiment.DEFAULT_CONFIG["excel_filename"]))
+    assert list(df['Date']) == ["02_February_2023", "14_December_2023", "Average"]
+    score_columns = [f"{prefix}_{kind}" for prefix in MODELS for kind in ("Sentences", "Chunks")]
+    assert (df[score_columns] == 0.0).all().all()
+
+
+def test_stub_run_cannot_target_the_build_workbook(root):
+    config = {"stub": True, "cache_file": None,
+              "stub_filename": sentiment.DEFAULT_CONFIG["excel_filename"]}
+
+    with pytest.raises(ValueError):
+        sentiment.run(config, root=root)
+
+
+def test_injected_scorers_are_cached(root, capsys):
+    cache_file = "sentiment_cache.sqlite"
+    scorers = {"finbert": StubScorer(lambda text: len(text) / 100, name="length")}
+    config = {"stub": True, "cache_file": cache_file}
+
+    first = sentiment.run(config, root=root, scorers=scorers)
+    capsys.readouterr()
+    second = sentiment.run(config, root=root, scorers=scorers)
+    output = capsys.readouterr().out
+
+    assert os.path.isfile(os.path.join(root, cache_file))
+    pd.testing.assert_frame_equal(first, second)
+    assert (first['finbert_Sentences'] > 0).all()
+    assert "length: 0 cached" not in output and ", 0 scored" in output
+
+
+def test_token_chunks_fit_each_models_tokenizer(root, monkeypatch):
+    from stock_pipeline import sentiment as sentiment_module
+
+    def character_spans(model_name, revision=None):
+        # A "tokenizer" per model: FinBERT counts characters, RoBERTa words
+        if model_name == "finbert-like":
+            return lambda text: [(i, i + 1) for i in range(len(text))]
+        return sentiment_module.regex_token_spans
+
+    monkeypatch.setattr(sentiment_module, "hf_token_spans", character_spans)
+    scorers = {}
+    for prefix, model_name in (("FinBERT", "finbert-like"), ("RoBERTa", "roberta-like")):
+        scorer = object.__new__(sentiment_module.TransformersScorer)
+        scorer.name, scorer.revision = model_name, "main"
+        scorers[prefix] = scorer
+
+    chunkers = sentiment_module.model_chunkers(scorers, max_tokens=80)
+    segments = sentiment_module.segment_documents(TEXTS, {prefix: chunker
+                                                          for prefix, (chunker, _) in chunkers.items()})
+
+    for parts in segments.values():
+        finbert = sentiment_module.segment_chunks(parts, "FinBERT")
+        roberta = sentiment_module.segment_chunks(parts, "RoBERTa")
+        assert finbert and all(len(chunk) <= 80 for chunk in finbert)
+        assert len(finbert) > len(roberta)
+
+    stubs = {prefix: StubScorer(len) for prefix in scorers}
+    rows = sentiment_module.aggregate_scores(segments, sentiment_module.score_segments(segments, stubs))
+    for row, parts in zip(rows, segments.values()):
+        finbert = sentiment_module.segment_chunks(parts, "FinBERT")
+        assert row["FinBERT_Chunks"] == round(sum(map(len, finbert)) / len(finbert), 3)
+        assert row["Chunk_Count"] == len(finbert)
+
+
+def test_stub_run_with_token_chunks(root):
+    df = sentiment.run({"stub": True, "cache_file": None, "chunking": "tokens", "chunk_tokens": 20},
+                       root=root)
+
+    assert (df['Chunk_Count'].iloc[:-1] >= 2).all()
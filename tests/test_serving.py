@@ -0,0 +1,67 @@
+"""Request validation of predict_events and the /predict endpoint"""
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from stock_pipeline.serving import LatencyStats, MarketState, Predictor, make_handler, predict_events
+
+FEATURES = ['Close_t-4', 'Close_t-3', 'Close_t-2', 'Index_MDAX', 'Interest Rate_Old', 'Interest Rate_Change']
+
+
+@pytest.fixture
+def service():
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(30, len(FEATURES))), rng.normal(size=30)
+    bundle = {'model': LinearRegression().fit(X, y), 'feature_columns': FEATURES}
+    dates = pd.date_range('2024-01-01', periods=10).to_numpy()
+    closes = {name: (dates, np.linspace(100, 110, 10)) for name in ('DAX', 'MDAX')}
+    return Predictor({'Close': bundle}, 'test'), MarketState(closes, 4.0)
+
+
+def test_valid_event_is_predicted(service):
+    predictor, state = service
+    result = predict_events(predictor, state, [{'index': 'MDAX', 'interest_rate_change': 0.25}])
+    assert result[0]['index'] == 'MDAX'
+    assert set(result[0]['change_pct']) == {'Close'}
+
+
+@pytest.mark.parametrize('events, message', [
+    ([], "'events' must be a non-empty list"),
+    (None, "'events' must be a non-empty list"),
+    ([{'index': 'SDAX', 'interest_rate_change': 0.0}], "Event 0 has unknown index 'SDAX'"),
+    ([{'index': 'DAX'}], "Event 0 needs 'interest_rate_change'"),
+    ([{'index': 'DAX', 'interest_rate_change': 0.0}, {'index': 'DAX', 'interest_rate_change': 'up'}],
+     "Event 1 has non-numeric 'interest_rate_change'"),
+])
+def test_invalid_events_are_rejected_up_front(service, events, message):
+    predictor, state = service
+    with pytest.raises(ValueError, match=message):
+        predict_events(predictor, state, events)
+
+
+def test_endpoint_reports_validation_errors(service):
+    predictor, state = service
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(predictor, state, LatencyStats()))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/predict"
+        for body, message in [({'events': []}, "'events' must be a non-empty list of events"),
+                              ({}, "'events' must be a non-empty list of events"),
+                              ({'events': [{'index': 'DAX'}]},
+                               "Event 0 needs 'interest_rate_change' unless its 'date' is a stored event")]:
+            request = urllib.request.Request(url, data=json.dumps(body).encode('utf-8'), method='POST')
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(request, timeout=5)
+            assert error.value.code == 400
+            assert json.loads(error.value.read())['error'] == message
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,16 @@
+"""write_extraction into a date folder reused across reruns"""
+import os
+
+from stock_pipeline.text_extraction import write_extraction
+
+
+def test_write_extraction_removes_stale_section_files(tmp_path):
+    folder = tmp_path / "2024-01-25"
+    write_extraction({"text": "full", "sections": {"1_CONCLUSION": "a", "2_INFLATION": "b"}}, str(folder))
+    (folder / "notes.md").write_text("kept")
+
+    write_extraction({"text": "new", "sections": {"1_CONCLUSION": "c"}}, str(folder))
+
+    assert sorted(os.listdir(folder)) == ["0_FULL.txt", "1_CONCLUSION.txt", "notes.md"]
+    assert (folder / "0_FULL.txt").read_text(encoding="utf-8") == "new"
+    assert (folder / "1_CONCLUSION.txt").read_text(encoding="utf-8") == "c"
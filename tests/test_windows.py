@@ -0,0 +1,86 @@
+"""build_event_windows against the row-by-row loop of the original 03_Dataset Creation.py"""
+import numpy as np
+import pandas as pd
+
+from stock_pipeline.benchmark import synthetic_ohlcv
+from stock_pipeline.windows import build_event_windows
+
+INDEX_COLUMNS = ['Index_DAX', 'Index_MDAX', 'Index_SDAX']
+
+
+def stacked_stock_table(n_days=120):
+    """One-hot stock table like stock_data_combined_onehot.xlsx: instruments stacked, each by date"""
+    sheets = []
+    for seed, name in enumerate(INDEX_COLUMNS):
+        sheet = synthetic_ohlcv(n_days, seed=seed)[['Open', 'Close']]
+        for col in INDEX_COLUMNS:
+            sheet[col] = float(col == name)
+        sheets.append(sheet)
+    return pd.concat(sheets)
+
+
+def baseline_windows(df_stock, event_dates, n_lags, n_leads):
+    """The original per-event search, with the window sizes as parameters"""
+    common_dates = df_stock.index.intersection(event_dates)
+    df_neu = df_stock.loc[common_dates].copy()
+    close_loc = df_neu.columns.get_loc('Close')
+
+    for i in range(1, n_lags + 1):
+        df_neu.insert(i - 1, f'Close_t-{n_lags + 1 - i}', np.nan)
+    for i in range(1, n_leads + 1):
+        df_neu.insert(n_lags + close_loc + i, f'Close_t+{i}', np.nan)
+
+    for i in range(len(df_neu)):
+        row = df_neu.iloc[i]
+        column_with_one = [col for col in INDEX_COLUMNS if row[col] == 1.0][0]
+        mask = (df_stock.index == df_neu.index[i]) & (df_stock[column_with_one] == 1.0)
+
+        if mask.any():
+            iloc_position = np.where(mask)[0][0]
+            try:
+                for j in range(n_lags, 0, -1):
+                    df_neu.iloc[i, df_neu.columns.get_loc(f'Close_t-{j}')] = df_stock.iloc[iloc_position - j]['Close']
+                for j in range(1, n_leads + 1):
+                    df_neu.iloc[i, df_neu.columns.get_loc(f'Close_t+{j}')] = df_stock.iloc[iloc_position + j]['Close']
+            except IndexError:
+                pass
+    return df_neu
+
+
+def test_matches_the_baseline_loop():
+    df_stock = stacked_stock_table()
+    trading_days = df_stock.index.unique()
+    # Events away from the edges, where the baseline never reads across instruments
+    event_dates = trading_days[20:100:7]
+
+    expected = baseline_windows(df_stock, event_dates, n_lags=14, n_leads=3)
+    result = build_event_windows(df_stock, event_dates, n_lags=14, n_leads=3)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_other_window_sizes_match_the_baseline_loop():
+    df_stock = stacked_stock_table()
+    event_dates = df_stock.index.unique()[[10, 11, 50, 90]]
+
+    expected = baseline_windows(df_stock, event_dates, n_lags=5, n_leads=7)
+    result = build_event_windows(df_stock, event_dates, n_lags=5, n_leads=7)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_windows_do_not_leak_across_instruments():
+    df_stock = stacked_stock_table(n_days=30)
+    trading_days = df_stock.index.unique()
+    event_dates = trading_days[[1, 28]]
+
+    result = build_event_windows(df_stock, event_dates, n_lags=3, n_leads=3)
+
+    for _, row in result.iterrows():
+        closes = df_stock.loc[df_stock[row[INDEX_COLUMNS].astype(bool).idxmax()] == 1.0, 'Close']
+        position = closes.index.get_loc(row.name)
+        for k in range(1, 4):
+            lag = closes.iloc[position - k] if position - k >= 0 else np.nan
+            lead = closes.iloc[position + k] if position + k < len(closes) else np.nan
+            np.testing.assert_equal(row[f'Close_t-{k}'], lag)
+            np.testing.assert_equal(row[f'Close_t+{k}'], lead)